@@ -0,0 +1,8 @@
+"""
+Benchmarks for PetVet AI Services.
+
+- fake_provider: local OpenAI/Anthropic-compatible server
+- load: load driver for the HTTP API
+- micro: microbenchmarks for hot helpers
+- compare: flag regressions between two result files
+"""
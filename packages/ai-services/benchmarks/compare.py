@@ -0,0 +1,90 @@
+"""
+Compare two benchmark result files and flag regressions.
+
+Latencies (`*_ms`, `ns_per_op_*`) regress when they grow, throughput
+(`rps`) when it drops, by more than the threshold. Exits with status 1
+when anything regressed, so it can gate CI.
+
+    python -m benchmarks.compare baseline.json current.json --threshold 0.1
+"""
+import argparse
+import sys
+from typing import Any, Dict, Iterator, List, Tuple
+
+from .report import load_results
+
+# Sections holding measurements; environment and config are not compared
+MEASURED_SECTIONS = ("totals", "endpoints", "cases")
+
+
+def _metrics(results: Dict[str, Any]) -> Iterator[Tuple[str, float]]:
+    """Yield (dotted path, value) for every comparable measurement."""
+
+    def walk(prefix: str, node: Any) -> Iterator[Tuple[str, float]]:
+        if isinstance(node, dict):
+            for key, value in node.items():
+                yield from walk(f"{prefix}.{key}" if prefix else key, value)
+        elif isinstance(node, (int, float)) and not isinstance(node, bool):
+            yield prefix, float(node)
+
+    for section in MEASURED_SECTIONS:
+        if section in results:
+            yield from walk(section, results[section])
+
+
+def _direction(path: str) -> int:
+    """+1 if higher is worse, -1 if lower is worse, 0 if not compared."""
+    name = path.rsplit(".", 1)[-1]
+    if name.endswith("_ms") or name.startswith("ns_per_op"):
+        return 1
+    if name == "rps":
+        return -1
+    return 0
+
+
+def compare(
+    baseline: Dict[str, Any], current: Dict[str, Any], threshold: float
+) -> List[Dict[str, Any]]:
+    """
+    Find measurements that got worse by more than `threshold`.
+
+    Args:
+        baseline: Earlier results
+        current: New results
+        threshold: Allowed relative change (0.1 = 10%)
+
+    Returns:
+        One entry per regression with path, both values and relative change
+    """
+    before = dict(_metrics(baseline))
+    regressions = []
+    for path, value in _metrics(current):
+        direction = _direction(path)
+        old = before.get(path)
+        if not direction or not old:
+            continue
+        change = (value - old) / old
+        if change * direction > threshold:
+            regressions.append(
+                {"metric": path, "baseline": old, "current": value, "change": round(change, 3)}
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Flag regressions between benchmark results")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+
+    regressions = compare(load_results(args.baseline), load_results(args.current), args.threshold)
+    for r in regressions:
+        print(f"REGRESSION {r['metric']}: {r['baseline']} -> {r['current']} ({r['change']:+.1%})")
+    if not regressions:
+        print(f"No regressions above {args.threshold:.0%}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,510 @@
+"""
+Local OpenAI/Anthropic-compatible LLM provider for benchmarks.
+
+Serves chat completions, embeddings and messages (plain, tool-use and
+streamed) with a configurable latency distribution, error rates and
+response corpus, so the service can be load-tested without paid APIs.
+Answers are picked from the corpus by what the prompt asks for (symptom
+analysis, treatment protocol, image analysis).
+
+Run it and point the service at it:
+
+    python -m benchmarks.fake_provider --port 9100 --latency lognormal:0.8,0.5
+    OPENAI_BASE_URL=http://localhost:9100/v1 ANTHROPIC_BASE_URL=http://localhost:9100 ...
+"""
+import argparse
+import asyncio
+import hashlib
+import io
+import json
+import math
+import random
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+DEFAULT_CORPUS: Dict[str, List[Any]] = {
+    "symptoms": [
+        {
+            "needs_clarification": False,
+            "diagnosis": {
+                "primary": "Gastroenterite aguda",
+                "differentials": [
+                    {"condition": "Corpo estranho gastrointestinal", "probability": 20},
+                    {"condition": "Pancreatite", "probability": 10},
+                ],
+                "urgency_level": "medium",
+            },
+            "confidence": 0.86,
+        },
+        {
+            "needs_clarification": False,
+            "diagnosis": {
+                "primary": "Dermatite alergica",
+                "differentials": [{"condition": "Sarna sarcoptica", "probability": 15}],
+                "urgency_level": "low",
+            },
+            "confidence": 0.9,
+        },
+        {
+            "needs_clarification": True,
+            "clarifying_questions": [
+                "Ha quanto tempo os sintomas comecaram?",
+                "O animal esta se alimentando e bebendo agua?",
+            ],
+        },
+    ],
+    "treatment": [
+        {
+            "medications": [
+                {
+                    "name": "Maropitant",
+                    "dosage": "1 mg/kg",
+                    "route": "SC",
+                    "frequency": "SID",
+                    "duration": "3 dias",
+                    "instructions": "Aplicar pela manha",
+                },
+                {
+                    "name": "Omeprazol",
+                    "dosage": "1 mg/kg",
+                    "route": "VO",
+                    "frequency": "SID",
+                    "duration": "7 dias",
+                },
+            ],
+            "supportive_care": ["Dieta leve em pequenas porcoes", "Agua fresca a vontade"],
+            "monitoring": ["Frequencia de vomitos", "Apetite e hidratacao"],
+            "follow_up": "Retorno em 3 dias ou antes se piorar",
+            "warnings": ["Procure atendimento se houver sangue no vomito"],
+        }
+    ],
+    "image": [
+        {
+            "findings": ["Area de alopecia com eritema na regiao dorsal"],
+            "concerns": ["Possivel dermatite"],
+            "recommendations": ["Avaliacao dermatologica presencial"],
+            "urgency_level": "low",
+        }
+    ],
+    "default": ["Sou um assistente veterinario. Como posso ajudar?"],
+}
+
+# Tool (schema) names the orchestrator uses for Anthropic structured output
+TOOL_KINDS = {
+    "SymptomAnalysisResponse": "symptoms",
+    "TreatmentResponse": "treatment",
+    "ImageAnalysisResponse": "image",
+}
+
+STREAM_CHUNK_CHARS = 16
+
+
+@dataclass
+class LatencyModel:
+    """
+    Response delay distribution.
+
+    `kind` is fixed (a = seconds), uniform (a..b seconds) or lognormal
+    (median a seconds, shape b). Streams send the first chunk after
+    `first_chunk_fraction` of the delay and spread the rest evenly.
+    """
+
+    kind: str = "lognormal"
+    a: float = 0.8
+    b: float = 0.5
+    first_chunk_fraction: float = 0.3
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyModel":
+        """
+        Parse a spec such as "fixed:0.2", "uniform:0.1,0.5" or "lognormal:0.8,0.5".
+
+        Raises:
+            ValueError: If the spec is not understood
+        """
+        kind, _, params = spec.partition(":")
+        values = [float(v) for v in params.split(",") if v]
+        if kind == "fixed" and len(values) == 1:
+            return cls("fixed", values[0], 0.0)
+        if kind in ("uniform", "lognormal") and len(values) == 2:
+            return cls(kind, values[0], values[1])
+        raise ValueError(f"Invalid latency spec: {spec}")
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            return self.a
+        if self.kind == "uniform":
+            return rng.uniform(self.a, self.b)
+        return rng.lognormvariate(math.log(self.a), self.b)
+
+
+@dataclass
+class FakeProviderConfig:
+    """Behaviour of the fake provider."""
+
+    latency: LatencyModel = field(default_factory=LatencyModel)
+    error_rate: float = 0.0  # answered with 5xx
+    rate_limit_rate: float = 0.0  # answered with 429
+    corpus: Dict[str, List[Any]] = field(default_factory=lambda: dict(DEFAULT_CORPUS))
+    embedding_dimensions: int = 64
+    seed: Optional[int] = None
+
+
+def load_corpus(path: str) -> Dict[str, List[Any]]:
+    """
+    Load a response corpus, falling back to the defaults for missing kinds.
+
+    The file is a JSON object mapping a kind (symptoms, treatment, image,
+    default) to a list of answers; each answer is a JSON object or a string.
+    """
+    with open(path, encoding="utf-8") as f:
+        corpus = json.load(f)
+    return {**DEFAULT_CORPUS, **corpus}
+
+
+def _tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _message_text(content: Any) -> str:
+    """Text of an OpenAI or Anthropic message content (string or content parts)."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "\n".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return ""
+
+
+def _kind(text: str, tool_name: Optional[str] = None) -> str:
+    """Which corpus answers a prompt: by tool name, else by the JSON the prompt asks for."""
+    if tool_name in TOOL_KINDS:
+        return TOOL_KINDS[tool_name]
+    if "medications" in text:
+        return "treatment"
+    if "findings" in text:
+        return "image"
+    if "needs_clarification" in text:
+        return "symptoms"
+    return "default"
+
+
+def _chunks(text: str) -> List[str]:
+    return [text[i : i + STREAM_CHUNK_CHARS] for i in range(0, len(text), STREAM_CHUNK_CHARS)]
+
+
+def _embedding(text: str, dimensions: int) -> List[float]:
+    """Deterministic unit vector for a text, so repeated texts embed identically."""
+    rng = random.Random(hashlib.sha256(text.encode("utf-8")).digest())
+    vector = [rng.gauss(0.0, 1.0) for _ in range(dimensions)]
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+def _sample_png() -> bytes:
+    """A small PNG for image-analysis runs."""
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (256, 256), (180, 140, 100)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class FakeProvider:
+    """
+    State of a fake provider: random source, corpus and request counts.
+    """
+
+    def __init__(self, config: FakeProviderConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.requests: Counter = Counter()
+
+    def answer(self, kind: str) -> Any:
+        answers = self.config.corpus.get(kind) or self.config.corpus["default"]
+        return self.rng.choice(answers)
+
+    def answer_text(self, kind: str) -> str:
+        answer = self.answer(kind)
+        return answer if isinstance(answer, str) else json.dumps(answer, ensure_ascii=False)
+
+    def failure(self, api: str) -> Optional[Tuple[int, str]]:
+        """An injected error (status, message), or None to answer normally."""
+        roll = self.rng.random()
+        if roll < self.config.rate_limit_rate:
+            self.requests[f"{api}:rate_limited"] += 1
+            return 429, "Rate limit reached (injected)"
+        if roll < self.config.rate_limit_rate + self.config.error_rate:
+            self.requests[f"{api}:error"] += 1
+            return (529 if api == "anthropic" else 503), "Overloaded (injected)"
+        self.requests[f"{api}:ok"] += 1
+        return None
+
+    def delay(self) -> float:
+        return self.config.latency.sample(self.rng)
+
+
+def _openai_error(status: int, message: str) -> JSONResponse:
+    return JSONResponse(
+        {"error": {"message": message, "type": "server_error", "code": None}}, status_code=status
+    )
+
+
+def _anthropic_error(status: int, message: str) -> JSONResponse:
+    kind = "rate_limit_error" if status == 429 else "overloaded_error"
+    return JSONResponse(
+        {"type": "error", "error": {"type": kind, "message": message}}, status_code=status
+    )
+
+
+async def _paced(chunks: List[Any], delay: float, first_fraction: float) -> AsyncIterator[Any]:
+    """Yield chunks with the first after part of the delay and the rest spread evenly."""
+    await asyncio.sleep(delay * first_fraction)
+    gap = delay * (1 - first_fraction) / max(1, len(chunks) - 1)
+    for i, chunk in enumerate(chunks):
+        if i:
+            await asyncio.sleep(gap)
+        yield chunk
+
+
+def create_app(config: Optional[FakeProviderConfig] = None) -> FastAPI:
+    """
+    Create the fake provider application.
+
+    Args:
+        config: Latency, error and corpus settings (defaults if omitted)
+
+    Returns:
+        ASGI application serving the provider endpoints
+    """
+    provider = FakeProvider(config or FakeProviderConfig())
+    app = FastAPI(title="Fake LLM provider")
+    app.state.provider = provider
+    sample_png = _sample_png()
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        failure = provider.failure("openai")
+        delay = provider.delay()
+        if failure is not None:
+            await asyncio.sleep(delay * 0.1)
+            return _openai_error(*failure)
+
+        prompt = "\n".join(_message_text(m.get("content")) for m in body.get("messages", []))
+        text = provider.answer_text(_kind(prompt))
+        model = body.get("model", "fake")
+        usage = {
+            "prompt_tokens": _tokens(prompt),
+            "completion_tokens": _tokens(text),
+            "total_tokens": _tokens(prompt) + _tokens(text),
+            "prompt_tokens_details": {"cached_tokens": 0},
+        }
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+
+        if not body.get("stream"):
+            await asyncio.sleep(delay)
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": text},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": usage,
+            }
+
+        def chunk(choices: List[Dict[str, Any]], **extra: Any) -> str:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": choices,
+                **extra,
+            }
+            return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+        async def events() -> AsyncIterator[str]:
+            async for piece in _paced(
+                _chunks(text), delay, provider.config.latency.first_chunk_fraction
+            ):
+                yield chunk([{"index": 0, "delta": {"content": piece}, "finish_reason": None}])
+            yield chunk([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+            if (body.get("stream_options") or {}).get("include_usage"):
+                yield chunk([], usage=usage)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        failure = provider.failure("openai")
+        delay = provider.delay() * 0.1
+        await asyncio.sleep(delay)
+        if failure is not None:
+            return _openai_error(*failure)
+
+        inputs = body.get("input")
+        texts = inputs if isinstance(inputs, list) else [inputs]
+        dimensions = provider.config.embedding_dimensions
+        return {
+            "object": "list",
+            "data": [
+                {"object": "embedding", "index": i, "embedding": _embedding(str(t), dimensions)}
+                for i, t in enumerate(texts)
+            ],
+            "model": body.get("model", "fake-embedding"),
+            "usage": {"prompt_tokens": sum(_tokens(str(t)) for t in texts), "total_tokens": 0},
+        }
+
+    @app.post("/v1/messages")
+    async def messages(request: Request):
+        body = await request.json()
+        failure = provider.failure("anthropic")
+        delay = provider.delay()
+        if failure is not None:
+            await asyncio.sleep(delay * 0.1)
+            return _anthropic_error(*failure)
+
+        prompt = "\n".join(
+            [_message_text(body.get("system"))]
+            + [_message_text(m.get("content")) for m in body.get("messages", [])]
+        )
+        tool_name = (body.get("tool_choice") or {}).get("name")
+        kind = _kind(prompt, tool_name)
+        model = body.get("model", "fake")
+        message_id = f"msg_{uuid.uuid4().hex[:12]}"
+        input_tokens = _tokens(prompt)
+
+        if tool_name:
+            answer = provider.answer(kind)
+            content = [
+                {
+                    "type": "tool_use",
+                    "id": f"toolu_{uuid.uuid4().hex[:12]}",
+                    "name": tool_name,
+                    "input": answer if isinstance(answer, dict) else {"text": answer},
+                }
+            ]
+            output_tokens = _tokens(json.dumps(answer))
+        else:
+            text = provider.answer_text(kind)
+            content = [{"type": "text", "text": text}]
+            output_tokens = _tokens(text)
+
+        if not body.get("stream"):
+            await asyncio.sleep(delay)
+            return {
+                "id": message_id,
+                "type": "message",
+                "role": "assistant",
+                "model": model,
+                "content": content,
+                "stop_reason": "tool_use" if tool_name else "end_turn",
+                "stop_sequence": None,
+                "usage": {
+                    "input_tokens": input_tokens,
+                    "output_tokens": output_tokens,
+                    "cache_creation_input_tokens": 0,
+                    "cache_read_input_tokens": 0,
+                },
+            }
+
+        def event(name: str, payload: Dict[str, Any]) -> str:
+            return f"event: {name}\ndata: {json.dumps({'type': name, **payload})}\n\n"
+
+        async def events() -> AsyncIterator[str]:
+            yield event(
+                "message_start",
+                {
+                    "message": {
+                        "id": message_id,
+                        "type": "message",
+                        "role": "assistant",
+                        "model": model,
+                        "content": [],
+                        "stop_reason": None,
+                        "stop_sequence": None,
+                        "usage": {"input_tokens": input_tokens, "output_tokens": 1},
+                    }
+                },
+            )
+            yield event(
+                "content_block_start", {"index": 0, "content_block": {"type": "text", "text": ""}}
+            )
+            text = content[0].get("text", "")
+            async for piece in _paced(
+                _chunks(text), delay, provider.config.latency.first_chunk_fraction
+            ):
+                yield event(
+                    "content_block_delta",
+                    {"index": 0, "delta": {"type": "text_delta", "text": piece}},
+                )
+            yield event("content_block_stop", {"index": 0})
+            yield event(
+                "message_delta",
+                {
+                    "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                    "usage": {"output_tokens": output_tokens},
+                },
+            )
+            yield event("message_stop", {})
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "fake", "object": "model", "owned_by": "fake"}]}
+
+    @app.get("/images/sample.png")
+    async def sample_image():
+        return Response(sample_png, media_type="image/png")
+
+    @app.get("/stats")
+    async def stats():
+        return dict(provider.requests)
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument(
+        "--latency",
+        default="lognormal:0.8,0.5",
+        help="fixed:S, uniform:MIN,MAX or lognormal:MEDIAN,SIGMA (seconds)",
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction answered 5xx")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction answered 429")
+    parser.add_argument("--corpus", help="JSON file of answers per kind")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    config = FakeProviderConfig(
+        latency=LatencyModel.parse(args.latency),
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        corpus=load_corpus(args.corpus) if args.corpus else dict(DEFAULT_CORPUS),
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
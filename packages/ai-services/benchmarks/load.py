@@ -0,0 +1,327 @@
+"""
+Load driver for the diagnosis and NLP APIs.
+
+Virtual users repeatedly pick a scenario from a weighted mix and run it
+against a live service, closed-loop (each user waits for its response
+before the next request). Requests started during warm-up are not
+counted. Results (RPS and p50/p95/p99 per endpoint) are written as JSON.
+
+    python -m benchmarks.load --target http://localhost:8000 --concurrency 32 \
+        --duration 60 --mix analyze=3,consultation=2,intent=3 --out results/load.json
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from .report import environment, summarize, write_results
+
+SYMPTOMS = [
+    "Meu cachorro esta vomitando desde ontem e nao quer comer",
+    "Minha gata esta se cocando muito e com falhas no pelo",
+    "Ele esta com diarreia e muito quieto",
+    "Tosse seca que piora a noite ha uma semana",
+    "Esta mancando da pata traseira direita depois de correr",
+    "Bebendo muita agua e urinando mais que o normal",
+    "Olho direito vermelho e lacrimejando",
+    "Coceira na orelha e balanca muito a cabeca",
+]
+PETS = [
+    {"species": "dog", "breed": "SRD", "age": 5, "weight": 12.0, "sex": "male"},
+    {"species": "cat", "age": 3, "weight": 4.2, "sex": "female", "neutered": True},
+    {"species": "dog", "breed": "Labrador", "age": 11, "weight": 31.5},
+    {"species": "cat", "age": 1},
+]
+ANSWERS = [
+    ["Desde ontem a noite", "Sim, mas pouca agua"],
+    ["Ha uns tres dias", "Nao esta comendo nada"],
+    ["Comecou hoje", "Sim, normalmente"],
+]
+DIAGNOSES = [
+    {
+        "primary": "Gastroenterite aguda",
+        "differentials": [{"condition": "Pancreatite", "probability": 10}],
+        "urgency_level": "medium",
+    },
+    {
+        "primary": "Dermatite alergica",
+        "differentials": [{"condition": "Sarna sarcoptica", "probability": 15}],
+        "urgency_level": "low",
+    },
+]
+INTENT_TEXTS = [
+    "oi, bom dia",
+    "meu cachorro esta vomitando",
+    "quero falar com um veterinario",
+    "quanto custa a consulta?",
+    "ja dei o remedio, e agora?",
+    "minha gata nao come desde ontem e esta muito quieta",
+    "obrigado!",
+    "cancelar",
+]
+
+DEFAULT_MIX = "analyze=3,consultation=2,treatment=1,analyze_stream=1,intent=3"
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """
+    Parse a scenario mix such as "analyze=3,intent=1".
+
+    Raises:
+        ValueError: If a scenario is unknown or a weight is not positive
+    """
+    mix: Dict[str, float] = {}
+    for part in spec.split(","):
+        name, _, weight = part.strip().partition("=")
+        if name not in LoadDriver.SCENARIOS:
+            known = ", ".join(LoadDriver.SCENARIOS)
+            raise ValueError(f"Unknown scenario: {name} (known: {known})")
+        mix[name] = float(weight or 1)
+        if mix[name] <= 0:
+            raise ValueError(f"Weight for {name} must be positive")
+    return mix
+
+
+class LoadDriver:
+    """
+    Runs a weighted scenario mix against the API with concurrent users.
+
+    Args:
+        client: HTTP client whose base URL is the service
+        mix: Scenario name -> relative weight
+        seed: Random seed for reproducible request sequences
+        image_url: Image the `image` scenario asks the service to analyze
+    """
+
+    SCENARIOS = (
+        "analyze",
+        "consultation",
+        "treatment",
+        "analyze_stream",
+        "treatment_stream",
+        "image",
+        "intent",
+    )
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        mix: Dict[str, float],
+        seed: Optional[int] = None,
+        image_url: Optional[str] = None,
+    ):
+        if "image" in mix and not image_url:
+            raise ValueError("The image scenario needs an image URL")
+        self.client = client
+        self.mix = mix
+        self.seed = seed
+        self.image_url = image_url
+        self._latencies: Dict[str, List[float]] = defaultdict(list)
+        self._statuses: Dict[str, Counter] = defaultdict(Counter)
+        self._measure_from = 0.0
+
+    async def run(self, concurrency: int, duration: float, warmup: float = 0.0) -> Dict[str, Any]:
+        """
+        Run the mix and summarize what was measured after warm-up.
+
+        Args:
+            concurrency: Number of virtual users
+            duration: Measured seconds
+            warmup: Seconds run before measuring
+
+        Returns:
+            Totals and per-endpoint summaries
+        """
+        start = time.perf_counter()
+        self._measure_from = start + warmup
+        deadline = self._measure_from + duration
+        await asyncio.gather(*(self._user(i, deadline) for i in range(concurrency)))
+        elapsed = time.perf_counter() - self._measure_from
+
+        endpoints = {}
+        all_latencies: List[float] = []
+        all_errors = 0
+        for name in sorted(self._statuses):
+            errors = sum(n for status, n in self._statuses[name].items() if not 200 <= status < 300)
+            endpoints[name] = {
+                **summarize(self._latencies[name], errors, elapsed),
+                "statuses": {str(status): n for status, n in sorted(self._statuses[name].items())},
+            }
+            if ":" not in name:
+                all_latencies.extend(self._latencies[name])
+                all_errors += errors
+        return {"totals": summarize(all_latencies, all_errors, elapsed), "endpoints": endpoints}
+
+    async def _user(self, index: int, deadline: float) -> None:
+        rng = random.Random(None if self.seed is None else self.seed + index)
+        names = list(self.mix)
+        weights = [self.mix[name] for name in names]
+        while time.perf_counter() < deadline:
+            scenario = rng.choices(names, weights)[0]
+            await getattr(self, f"_scenario_{scenario}")(rng)
+
+    def _record(self, endpoint: str, started: float, status: int) -> None:
+        if started < self._measure_from:
+            return
+        self._statuses[endpoint][status] += 1
+        if 200 <= status < 300:
+            self._latencies[endpoint].append(time.perf_counter() - started)
+
+    async def _post(self, endpoint: str, path: str, body: Dict[str, Any]) -> Optional[Any]:
+        """POST and record the latency; returns the JSON body on success."""
+        started = time.perf_counter()
+        try:
+            response = await self.client.post(path, json=body)
+        except httpx.HTTPError:
+            self._record(endpoint, started, 599)
+            return None
+        self._record(endpoint, started, response.status_code)
+        return response.json() if response.is_success else None
+
+    async def _stream(self, endpoint: str, path: str, body: Dict[str, Any]) -> None:
+        """POST to an SSE endpoint, recording time to first event and to the end."""
+        started = time.perf_counter()
+        try:
+            async with self.client.stream("POST", path, json=body) as response:
+                first = True
+                async for line in response.aiter_lines():
+                    if first and line.startswith("event:"):
+                        self._record(f"{endpoint}:first_event", started, response.status_code)
+                        first = False
+                status = response.status_code
+        except httpx.HTTPError:
+            status = 599
+        self._record(endpoint, started, status)
+
+    @staticmethod
+    def _symptom_request(rng: random.Random) -> Dict[str, Any]:
+        return {
+            "symptoms": rng.choice(SYMPTOMS),
+            "pet_id": f"pet-{rng.randrange(1000)}",
+            "consultation_id": str(uuid.uuid4()),
+            "pet_info": rng.choice(PETS),
+        }
+
+    async def _scenario_analyze(self, rng: random.Random) -> None:
+        await self._post("analyze", "/api/v1/diagnosis/analyze", self._symptom_request(rng))
+
+    async def _scenario_consultation(self, rng: random.Random) -> None:
+        """A WhatsApp consultation: analysis, follow-up answers if asked, then treatment."""
+        request = self._symptom_request(rng)
+        result = await self._post("analyze", "/api/v1/diagnosis/analyze", request)
+        if result is not None and result.get("needs_clarification"):
+            result = await self._post(
+                "analyze_follow_up",
+                "/api/v1/diagnosis/analyze",
+                {
+                    "pet_id": request["pet_id"],
+                    "consultation_id": request["consultation_id"],
+                    "clarifying_answers": rng.choice(ANSWERS),
+                },
+            )
+        if result is None or not result.get("diagnosis"):
+            return
+        await self._post(
+            "treatment",
+            "/api/v1/diagnosis/treatment",
+            {
+                "consultation_id": request["consultation_id"],
+                "diagnosis": result["diagnosis"],
+                "pet_info": request["pet_info"],
+            },
+        )
+
+    def _treatment_request(self, rng: random.Random) -> Dict[str, Any]:
+        return {
+            "consultation_id": str(uuid.uuid4()),
+            "diagnosis": rng.choice(DIAGNOSES),
+            "pet_info": rng.choice(PETS),
+        }
+
+    async def _scenario_treatment(self, rng: random.Random) -> None:
+        await self._post("treatment", "/api/v1/diagnosis/treatment", self._treatment_request(rng))
+
+    async def _scenario_analyze_stream(self, rng: random.Random) -> None:
+        await self._stream(
+            "analyze_stream", "/api/v1/diagnosis/analyze/stream", self._symptom_request(rng)
+        )
+
+    async def _scenario_treatment_stream(self, rng: random.Random) -> None:
+        await self._stream(
+            "treatment_stream", "/api/v1/diagnosis/treatment/stream", self._treatment_request(rng)
+        )
+
+    async def _scenario_image(self, rng: random.Random) -> None:
+        await self._post(
+            "image",
+            "/api/v1/diagnosis/image",
+            {
+                "image_url": self.image_url,
+                "pet_id": f"pet-{rng.randrange(1000)}",
+                "context": rng.choice([None, "Lesao na pele do dorso"]),
+            },
+        )
+
+    async def _scenario_intent(self, rng: random.Random) -> None:
+        await self._post("intent", "/api/v1/nlp/intent", {"text": rng.choice(INTENT_TEXTS)})
+
+
+async def run_load(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run the load test described by command-line arguments."""
+    mix = parse_mix(args.mix)
+    limits = httpx.Limits(
+        max_connections=args.concurrency, max_keepalive_connections=args.concurrency
+    )
+    async with httpx.AsyncClient(
+        base_url=args.target, timeout=args.timeout, limits=limits
+    ) as client:
+        driver = LoadDriver(client, mix, seed=args.seed, image_url=args.image_url)
+        measured = await driver.run(args.concurrency, args.duration, args.warmup)
+
+    return {
+        "benchmark": "load",
+        "environment": environment(),
+        "config": {
+            "target": args.target,
+            "mix": mix,
+            "concurrency": args.concurrency,
+            "duration_seconds": args.duration,
+            "warmup_seconds": args.warmup,
+            "seed": args.seed,
+        },
+        **measured,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load-test PetVet AI Services")
+    parser.add_argument("--target", default="http://localhost:8000")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="scenario=weight,...")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=60.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--image-url", help="image for the image scenario")
+    parser.add_argument("--out", default="benchmarks/results/load.json")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_load(args))
+    write_results(args.out, results)
+
+    print(f"{'endpoint':<28}{'count':>8}{'err':>6}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for name, stats in {**results["endpoints"], "TOTAL": results["totals"]}.items():
+        print(
+            f"{name:<28}{stats['count']:>8}{stats['errors']:>6}{stats['rps']:>9.1f}"
+            f"{stats['p50_ms']:>9.0f}{stats['p95_ms']:>9.0f}{stats['p99_ms']:>9.0f}"
+        )
+    print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
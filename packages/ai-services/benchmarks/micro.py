@@ -0,0 +1,149 @@
+"""
+Microbenchmarks for per-request helpers.
+
+Times JSON answer parsing (clean, wrapped in prose, truncated), pet info
+formatting and intent classification (the engine and the endpoint
+handler). Each case reports the best and median time per call over
+several repeats; results are written as JSON.
+
+    python -m benchmarks.micro --out benchmarks/results/micro.json
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import timeit
+from typing import Any, Awaitable, Callable, Dict, List
+
+from src.diagnosis.analyzer import TREATMENT_FALLBACKS, VeterinaryAnalyzer
+from src.diagnosis.schemas import SymptomAnalysisResponse, TreatmentResponse
+from src.nlp.intent import IntentEngine
+from src.routers.nlp import IntentRequest, classify_intent
+
+from .fake_provider import DEFAULT_CORPUS
+from .load import INTENT_TEXTS, PETS
+from .report import environment, write_results
+
+SYMPTOM_JSON = json.dumps(DEFAULT_CORPUS["symptoms"][0], ensure_ascii=False)
+TREATMENT_JSON = json.dumps(DEFAULT_CORPUS["treatment"][0], ensure_ascii=False)
+# What models often send instead of bare JSON
+WRAPPED_JSON = f"Claro! Segue a analise:\n```json\n{SYMPTOM_JSON}\n```\nEspero ter ajudado."
+# Answer cut off by max_tokens, repaired and completed with fallbacks
+TRUNCATED_JSON = TREATMENT_JSON[: int(len(TREATMENT_JSON) * 0.6)]
+
+
+def bench(func: Callable[[], Any], number: int, repeat: int) -> Dict[str, float]:
+    """
+    Time a callable.
+
+    Args:
+        func: Function to call with no arguments
+        number: Calls per repeat
+        repeat: Number of repeats
+
+    Returns:
+        Best and median nanoseconds per call
+    """
+    runs = timeit.repeat(func, number=number, repeat=repeat)
+    per_call = [run / number * 1e9 for run in runs]
+    return {
+        "ns_per_op_best": round(min(per_call), 1),
+        "ns_per_op_median": round(statistics.median(per_call), 1),
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def bench_async(func: Callable[[], Awaitable[Any]], number: int, repeat: int) -> Dict[str, float]:
+    """Like bench, for a coroutine function awaited on one event loop."""
+
+    async def timed() -> List[float]:
+        runs = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                await func()
+            runs.append(time.perf_counter() - start)
+        return runs
+
+    per_call = [run / number * 1e9 for run in asyncio.run(timed())]
+    return {
+        "ns_per_op_best": round(min(per_call), 1),
+        "ns_per_op_median": round(statistics.median(per_call), 1),
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def run_micro(number: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    """Run every microbenchmark case."""
+    analyzer = VeterinaryAnalyzer(llm=None)
+    engine = IntentEngine()
+    requests = [IntentRequest(text=text) for text in INTENT_TEXTS]
+    texts = iter(INTENT_TEXTS * (number * repeat))
+
+    def classify_all() -> None:
+        for text in INTENT_TEXTS:
+            engine.classify(text)
+
+    async def handle_all() -> None:
+        for request in requests:
+            await classify_intent(request, engine)
+
+    cases: Dict[str, Callable[[], Dict[str, float]]] = {
+        "parse_json_response.clean": lambda: bench(
+            lambda: analyzer._parse_json_response(SYMPTOM_JSON, SymptomAnalysisResponse),
+            number,
+            repeat,
+        ),
+        "parse_json_response.wrapped": lambda: bench(
+            lambda: analyzer._parse_json_response(WRAPPED_JSON, SymptomAnalysisResponse),
+            number,
+            repeat,
+        ),
+        "parse_json_response.truncated": lambda: bench(
+            lambda: analyzer._parse_json_response(
+                TRUNCATED_JSON, TreatmentResponse, TREATMENT_FALLBACKS
+            ),
+            number,
+            repeat,
+        ),
+        "format_pet_info.full": lambda: bench(
+            lambda: analyzer._format_pet_info(PETS[0]), number, repeat
+        ),
+        "format_pet_info.minimal": lambda: bench(
+            lambda: analyzer._format_pet_info(PETS[3]), number, repeat
+        ),
+        "classify_intent.engine": lambda: bench(
+            lambda: engine.classify(next(texts)), number, repeat
+        ),
+        # Per batch of len(INTENT_TEXTS) texts
+        "classify_intent.engine_batch": lambda: bench(classify_all, number // 10, repeat),
+        "classify_intent.endpoint_batch": lambda: bench_async(handle_all, number // 10, repeat),
+    }
+    return {name: case() for name, case in cases.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Microbenchmarks for PetVet AI Services")
+    parser.add_argument("--number", type=int, default=2000, help="calls per repeat")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", default="benchmarks/results/micro.json")
+    args = parser.parse_args()
+
+    results = {
+        "benchmark": "micro",
+        "environment": environment(),
+        "config": {"number": args.number, "repeat": args.repeat},
+        "cases": run_micro(args.number, args.repeat),
+    }
+    write_results(args.out, results)
+
+    for name, stats in results["cases"].items():
+        print(f"{name:<36}{stats['ns_per_op_median']:>12.0f} ns/op")
+    print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Latency summaries and JSON result files.
+"""
+import json
+import math
+import os
+import platform
+import subprocess
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted values (0.0 if empty)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, float]:
+    """
+    Summarize request latencies.
+
+    Args:
+        latencies: Latencies in seconds of successful requests
+        errors: Number of failed requests
+        elapsed: Measurement window in seconds
+
+    Returns:
+        Count, errors, rps and mean/p50/p95/p99/max latency in milliseconds
+    """
+    values = sorted(latencies)
+    count = len(values) + errors
+    return {
+        "count": count,
+        "errors": errors,
+        "rps": round(count / elapsed, 2) if elapsed > 0 else 0.0,
+        "mean_ms": round(1000 * sum(values) / len(values), 2) if values else 0.0,
+        "p50_ms": round(1000 * percentile(values, 0.50), 2),
+        "p95_ms": round(1000 * percentile(values, 0.95), 2),
+        "p99_ms": round(1000 * percentile(values, 0.99), 2),
+        "max_ms": round(1000 * values[-1], 2) if values else 0.0,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> Dict[str, Any]:
+    """Where and on what the benchmark ran, stored with the results."""
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def write_results(path: str, results: Dict[str, Any]) -> None:
+    """Write results as stable, diff-friendly JSON (sorted keys, one field per line)."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
@@ -0,0 +1 @@
+"""Caching layer for PetVet AI Services."""
@@ -0,0 +1,122 @@
+"""
+Key/value storage backends shared by the caching layer.
+
+Every backend stores strings with an optional TTL. Redis is the production
+backend; the in-memory backend is used in tests and when Redis is disabled.
+"""
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional, Protocol, Tuple
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend(Protocol):
+    """Minimal async key/value interface used by the caches."""
+
+    async def get(self, key: str) -> Optional[str]:
+        ...
+
+    async def set(self, key: str, value: str, ttl_seconds: Optional[int] = None) -> None:
+        ...
+
+    async def delete(self, key: str) -> None:
+        ...
+
+    async def close(self) -> None:
+        ...
+
+
+class MemoryBackend:
+    """
+    Bounded in-process backend with TTL and LRU eviction.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[str, Optional[float]]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+
+        self._data.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: str, ttl_seconds: Optional[int] = None) -> None:
+        expires_at = time.monotonic() + ttl_seconds if ttl_seconds else None
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    async def close(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class RedisBackend:
+    """
+    Redis backend. Connection errors are logged and treated as misses so a
+    Redis outage degrades to uncached behaviour instead of failing requests.
+    """
+
+    def __init__(self, redis_url: str, client: Optional[Redis] = None):
+        self.client = client or Redis.from_url(redis_url, decode_responses=True)
+
+    async def get(self, key: str) -> Optional[str]:
+        try:
+            return await self.client.get(key)
+        except (RedisError, OSError) as e:
+            logger.warning(f"Redis GET failed for {key}: {e}")
+            return None
+
+    async def set(self, key: str, value: str, ttl_seconds: Optional[int] = None) -> None:
+        try:
+            await self.client.set(key, value, ex=ttl_seconds or None)
+        except (RedisError, OSError) as e:
+            logger.warning(f"Redis SET failed for {key}: {e}")
+
+    async def delete(self, key: str) -> None:
+        try:
+            await self.client.delete(key)
+        except (RedisError, OSError) as e:
+            logger.warning(f"Redis DELETE failed for {key}: {e}")
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+def create_backend(kind: str, redis_url: str, max_entries: int = 1024) -> CacheBackend:
+    """
+    Create a cache backend by name.
+
+    Args:
+        kind: Backend name (redis or memory)
+        redis_url: Redis connection URL, used by the redis backend
+        max_entries: Capacity of the memory backend
+
+    Returns:
+        Configured backend
+    """
+    if kind == "redis":
+        return RedisBackend(redis_url)
+    if kind == "memory":
+        return MemoryBackend(max_entries=max_entries)
+    raise ValueError(f"Unknown cache backend: {kind}")
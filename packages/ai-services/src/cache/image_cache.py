@@ -0,0 +1,222 @@
+"""
+Perceptual-hash cache for image analysis results.
+
+A resent or re-compressed photo hashes to (nearly) the same 64-bit dHash and
+aHash, so a lookup is a Hamming-distance scan over recent entries. Both
+hashes must be within the threshold, which keeps unrelated images that
+happen to share one hash from matching.
+"""
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from .backends import CacheBackend
+from .response_cache import normalize_text
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ImageHashes:
+    """Perceptual hashes of one image."""
+
+    dhash: int
+    ahash: int
+
+
+@dataclass
+class _ImageEntry:
+    hashes: ImageHashes
+    context: str
+    result: Dict[str, Any]
+    expires_at: float
+
+
+class ImageResultCache:
+    """
+    Bounded in-process index of analyzed images with LRU eviction and TTL.
+
+    Optionally mirrors entries to a backend (Redis) so a new process can
+    warm its index with `load()`.
+    """
+
+    def __init__(
+        self,
+        max_distance: int = 6,
+        max_entries: int = 1024,
+        backend: Optional[CacheBackend] = None,
+        ttl_seconds: int = 3600,
+        namespace: str = "petvet:image",
+    ):
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.namespace = namespace
+
+        self._entries: "OrderedDict[str, _ImageEntry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._hit_distances: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(
+        self, hashes: ImageHashes, context: Optional[str] = None
+    ) -> Optional[Tuple[Dict[str, Any], int]]:
+        """
+        Return the result for the closest matching image with the same context.
+
+        Args:
+            hashes: Perceptual hashes of the incoming image
+            context: Context text sent with the image
+
+        Returns:
+            Tuple of (result, dHash distance), or None on miss
+        """
+        context = normalize_text(context or "")
+        now = time.monotonic()
+        best: Optional[Tuple[int, str]] = None
+        expired: List[str] = []
+
+        for entry_id, entry in self._entries.items():
+            if entry.expires_at <= now:
+                expired.append(entry_id)
+                continue
+            if entry.context != context:
+                continue
+            distance = (entry.hashes.dhash ^ hashes.dhash).bit_count()
+            if distance > self.max_distance:
+                continue
+            if (entry.hashes.ahash ^ hashes.ahash).bit_count() > self.max_distance:
+                continue
+            if best is None or distance < best[0]:
+                best = (distance, entry_id)
+
+        for entry_id in expired:
+            del self._entries[entry_id]
+
+        if best is None:
+            self.misses += 1
+            return None
+
+        distance, entry_id = best
+        self._entries.move_to_end(entry_id)
+        self.hits += 1
+        self._hit_distances[distance] = self._hit_distances.get(distance, 0) + 1
+        return self._entries[entry_id].result, distance
+
+    def _insert(
+        self,
+        entry_id: str,
+        hashes: ImageHashes,
+        context: str,
+        result: Dict[str, Any],
+        ttl_seconds: float,
+    ) -> Optional[str]:
+        """Insert an entry; returns the id of the entry evicted to make room."""
+        self._entries[entry_id] = _ImageEntry(
+            hashes, context, result, time.monotonic() + ttl_seconds
+        )
+        self._entries.move_to_end(entry_id)
+        if len(self._entries) <= self.max_entries:
+            return None
+
+        evicted, _ = self._entries.popitem(last=False)
+        self.evictions += 1
+        return evicted
+
+    async def add(
+        self, hashes: ImageHashes, context: Optional[str], result: Dict[str, Any]
+    ) -> None:
+        """
+        Add an analysis result (and mirror it to the backend, if configured).
+
+        Args:
+            hashes: Perceptual hashes of the analyzed image
+            context: Context text sent with the image
+            result: Successful image analysis result
+        """
+        context = normalize_text(context or "")
+        entry_id = uuid.uuid4().hex
+        evicted = self._insert(entry_id, hashes, context, result, self.ttl_seconds)
+
+        if self.backend is None:
+            return
+
+        entry = {
+            "dhash": hashes.dhash,
+            "ahash": hashes.ahash,
+            "context": context,
+            "result": result,
+            "created_at": time.time(),
+        }
+        await self.backend.set(
+            f"{self.namespace}:entry:{entry_id}", json.dumps(entry), self.ttl_seconds
+        )
+        if evicted:
+            await self.backend.delete(f"{self.namespace}:entry:{evicted}")
+
+        manifest = [e for e in await self._read_manifest() if e != evicted]
+        manifest.append(entry_id)
+        await self.backend.set(
+            f"{self.namespace}:manifest",
+            json.dumps(manifest[-self.max_entries :]),
+            self.ttl_seconds,
+        )
+
+    async def _read_manifest(self) -> List[str]:
+        raw = await self.backend.get(f"{self.namespace}:manifest")
+        if not raw:
+            return []
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            return []
+
+    async def load(self) -> int:
+        """
+        Warm the in-process index from the backend.
+
+        Returns:
+            Number of entries loaded
+        """
+        if self.backend is None:
+            return 0
+
+        loaded = 0
+        for entry_id in await self._read_manifest():
+            raw = await self.backend.get(f"{self.namespace}:entry:{entry_id}")
+            if not raw:
+                continue
+            try:
+                entry = json.loads(raw)
+                hashes = ImageHashes(int(entry["dhash"]), int(entry["ahash"]))
+                remaining = self.ttl_seconds - (time.time() - float(entry["created_at"]))
+            except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+                continue
+            if remaining > 0:
+                self._insert(entry_id, hashes, entry["context"], entry["result"], remaining)
+                loaded += 1
+
+        logger.info(f"Image cache warmed with {loaded} entries")
+        return loaded
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit-rate stats and the distance distribution of hits."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_distance": self.max_distance,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "hit_distance_histogram": {str(d): n for d, n in sorted(self._hit_distances.items())},
+        }
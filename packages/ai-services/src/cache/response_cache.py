@@ -0,0 +1,105 @@
+"""
+Exact-match response cache for veterinary analysis results.
+"""
+import hashlib
+import json
+import logging
+from typing import Any, Dict, Optional
+
+from .backends import CacheBackend
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Normalize free text so trivially different inputs share a key."""
+    return " ".join(text.lower().split())
+
+
+def canonical_hash(payload: Dict[str, Any]) -> str:
+    """
+    Hash a JSON-serializable payload independently of key order.
+
+    None values are dropped so that omitted and explicitly-null fields
+    produce the same key.
+    """
+
+    def _clean(value: Any) -> Any:
+        if isinstance(value, dict):
+            return {k: _clean(v) for k, v in value.items() if v is not None}
+        if isinstance(value, (list, tuple)):
+            return [_clean(v) for v in value]
+        return value
+
+    canonical = json.dumps(
+        _clean(payload), sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    TTL cache for analyzer results keyed by a canonical request hash.
+
+    Only successful, parsed LLM answers are stored; callers must never pass
+    fallback/default answers to `set`.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        ttl_seconds: int = 3600,
+        namespace: str = "petvet:analysis",
+    ):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def make_key(self, kind: str, payload: Dict[str, Any]) -> str:
+        """
+        Build a cache key for a request.
+
+        Args:
+            kind: Request kind (e.g. symptoms, treatment)
+            payload: Request fields that determine the answer
+
+        Returns:
+            Namespaced cache key
+        """
+        return f"{self.namespace}:{kind}:{canonical_hash(payload)}"
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a cached result, or None on miss."""
+        raw = await self.backend.get(key)
+        if raw is None:
+            self.misses += 1
+            return None
+
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            logger.warning(f"Discarding corrupt cache entry {key}")
+            await self.backend.delete(key)
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return value
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a successful result."""
+        await self.backend.set(key, json.dumps(value, ensure_ascii=False), self.ttl_seconds)
+        self.stores += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
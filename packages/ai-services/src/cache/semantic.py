@@ -0,0 +1,283 @@
+"""
+Embedding-based near-duplicate cache for symptom descriptions.
+
+Vectors live in a single preallocated NumPy matrix. Each row belongs to a
+scope (species/age band) so a dog's analysis is never served for a cat.
+Rows are L2-normalized, so a lookup is one matrix-vector product. Rows
+expire `ttl_seconds` after they are added, like the exact-match cache.
+"""
+import base64
+import json
+import logging
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .backends import CacheBackend
+
+logger = logging.getLogger(__name__)
+
+# Similarity buckets used for threshold-precision stats
+SIMILARITY_BUCKETS = (0.80, 0.85, 0.90, 0.92, 0.94, 0.96, 0.98)
+
+
+def _bucket(similarity: float) -> str:
+    """Return the label of the bucket a similarity falls into."""
+    label = "<0.80"
+    for edge in SIMILARITY_BUCKETS:
+        if similarity >= edge:
+            label = f">={edge:.2f}"
+    return label
+
+
+class SemanticCache:
+    """
+    Bounded cosine-similarity cache with LRU eviction.
+
+    Expired rows never match and are reused before live rows are evicted.
+
+    Optionally mirrors entries to a backend (Redis) so a new process can
+    warm its index with `load()`.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.92,
+        max_entries: int = 2048,
+        backend: Optional[CacheBackend] = None,
+        ttl_seconds: int = 3600,
+        namespace: str = "petvet:semantic",
+    ):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.namespace = namespace
+
+        self._vectors: Optional[np.ndarray] = None
+        self._scopes = np.full(max_entries, -1, dtype=np.int32)
+        self._last_used = np.zeros(max_entries, dtype=np.int64)
+        self._expires_at = np.zeros(max_entries, dtype=np.float64)  # monotonic time
+        self._entry_ids: List[Optional[str]] = [None] * max_entries
+        self._results: List[Optional[Dict[str, Any]]] = [None] * max_entries
+        self._scope_codes: Dict[str, int] = {}
+        self._clock = 0
+        self._size = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._best_similarity: Dict[str, int] = {}
+        self._verifications: Dict[str, Dict[str, int]] = {}
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _scope_code(self, scope: str) -> int:
+        if scope not in self._scope_codes:
+            self._scope_codes[scope] = len(self._scope_codes)
+        return self._scope_codes[scope]
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(array))
+        return array / norm if norm else array
+
+    def search(self, scope: str, vector: List[float]) -> Tuple[Optional[int], float]:
+        """
+        Find the most similar entry in a scope.
+
+        Returns:
+            Tuple of (slot or None, similarity)
+        """
+        code = self._scope_codes.get(scope)
+        if code is None or self._vectors is None or self._size == 0:
+            return None, 0.0
+
+        query = self._normalize(vector)
+        if query.shape[0] != self._vectors.shape[1]:
+            return None, 0.0
+
+        similarities = self._vectors[: self._size] @ query
+        similarities[self._scopes[: self._size] != code] = -1.0
+        similarities[self._expires_at[: self._size] <= time.monotonic()] = -1.0
+        slot = int(np.argmax(similarities))
+        best = float(similarities[slot])
+        if best < -0.5:
+            return None, 0.0
+        return slot, best
+
+    def lookup(self, scope: str, vector: List[float]) -> Optional[Tuple[Dict[str, Any], float]]:
+        """
+        Return a cached result whose similarity clears the threshold.
+
+        Args:
+            scope: Species/age-band scope
+            vector: Embedding of the normalized symptoms
+
+        Returns:
+            Tuple of (result, similarity), or None on miss
+        """
+        slot, similarity = self.search(scope, vector)
+        if slot is not None:
+            bucket = _bucket(similarity)
+            self._best_similarity[bucket] = self._best_similarity.get(bucket, 0) + 1
+
+        if slot is None or similarity < self.threshold:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._clock += 1
+        self._last_used[slot] = self._clock
+        return self._results[slot], similarity
+
+    def _allocate_slot(self) -> Tuple[int, Optional[str]]:
+        """Return a free slot and the id of the entry it replaces, if any."""
+        if self._size < self.max_entries:
+            slot = self._size
+            self._size += 1
+            return slot, None
+
+        expired = np.flatnonzero(self._expires_at[: self._size] <= time.monotonic())
+        if expired.size:
+            slot = int(expired[0])
+        else:
+            slot = int(np.argmin(self._last_used[: self._size]))
+            self.evictions += 1
+        return slot, self._entry_ids[slot]
+
+    def _insert(
+        self,
+        scope: str,
+        vector: np.ndarray,
+        result: Dict[str, Any],
+        entry_id: str,
+        ttl_seconds: Optional[float] = None,
+    ) -> Optional[str]:
+        """Insert a normalized vector; returns the replaced entry id, if any."""
+        if self._vectors is None:
+            self._vectors = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+        elif vector.shape[0] != self._vectors.shape[1]:
+            logger.warning("Embedding dimension changed; ignoring semantic cache entry")
+            return None
+
+        slot, evicted = self._allocate_slot()
+        self._clock += 1
+        self._vectors[slot] = vector
+        self._scopes[slot] = self._scope_code(scope)
+        self._last_used[slot] = self._clock
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._expires_at[slot] = time.monotonic() + ttl
+        self._entry_ids[slot] = entry_id
+        self._results[slot] = result
+        return evicted
+
+    async def add(self, scope: str, vector: List[float], result: Dict[str, Any]) -> None:
+        """
+        Add an analysis result to the index (and backend, if configured).
+
+        Args:
+            scope: Species/age-band scope
+            vector: Embedding of the normalized symptoms
+            result: Successful analysis result
+        """
+        normalized = self._normalize(vector)
+        entry_id = uuid.uuid4().hex
+        evicted = self._insert(scope, normalized, result, entry_id)
+
+        if self.backend is None:
+            return
+
+        entry = {
+            "scope": scope,
+            "vector": base64.b64encode(normalized.tobytes()).decode("ascii"),
+            "result": result,
+            "created_at": time.time(),
+        }
+        await self.backend.set(
+            f"{self.namespace}:entry:{entry_id}", json.dumps(entry), self.ttl_seconds
+        )
+        if evicted:
+            await self.backend.delete(f"{self.namespace}:entry:{evicted}")
+
+        manifest = [e for e in await self._read_manifest() if e != evicted]
+        manifest.append(entry_id)
+        await self.backend.set(
+            f"{self.namespace}:manifest",
+            json.dumps(manifest[-self.max_entries :]),
+            self.ttl_seconds,
+        )
+
+    async def _read_manifest(self) -> List[str]:
+        raw = await self.backend.get(f"{self.namespace}:manifest")
+        if not raw:
+            return []
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            return []
+
+    async def load(self) -> int:
+        """
+        Warm the in-process index from the backend.
+
+        Returns:
+            Number of entries loaded
+        """
+        if self.backend is None:
+            return 0
+
+        loaded = 0
+        for entry_id in await self._read_manifest():
+            raw = await self.backend.get(f"{self.namespace}:entry:{entry_id}")
+            if not raw:
+                continue
+            try:
+                entry = json.loads(raw)
+                vector = np.frombuffer(base64.b64decode(entry["vector"]), dtype=np.float32)
+                remaining = self.ttl_seconds - (time.time() - float(entry["created_at"]))
+            except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+                continue
+            if remaining > 0:
+                self._insert(entry["scope"], vector, entry["result"], entry_id, remaining)
+                loaded += 1
+
+        logger.info(f"Semantic cache warmed with {loaded} entries")
+        return loaded
+
+    def record_verification(self, similarity: float, agreed: bool) -> None:
+        """
+        Record whether a shadow re-analysis agreed with a cached hit.
+
+        Args:
+            similarity: Similarity of the hit that was verified
+            agreed: Whether the fresh answer matched the cached one
+        """
+        bucket = self._verifications.setdefault(_bucket(similarity), {"agreed": 0, "total": 0})
+        bucket["total"] += 1
+        if agreed:
+            bucket["agreed"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit-rate and threshold-precision stats."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": self._size,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "best_similarity_histogram": dict(self._best_similarity),
+            "precision_by_similarity": {
+                bucket: {
+                    **counts,
+                    "precision": round(counts["agreed"] / counts["total"], 4),
+                }
+                for bucket, counts in self._verifications.items()
+            },
+        }
@@ -1,9 +1,10 @@
 """
 Configuration settings for PetVet AI Services.
 """
-from typing import List
+from typing import Annotated, Any, Dict, List, Optional
 
-from pydantic_settings import BaseSettings
+from pydantic import field_validator
+from pydantic_settings import BaseSettings, NoDecode
 
 
 class Settings(BaseSettings):
@@ -17,19 +18,156 @@ class Settings(BaseSettings):
     # OpenAI
     openai_api_key: str = ""
     openai_model: str = "gpt-4-turbo-preview"
+    openai_fast_model: str = "gpt-4o-mini"  # first tier of the model cascade
+    openai_embedding_model: str = "text-embedding-3-small"
+    openai_base_url: Optional[str] = None  # e.g. the benchmark fake provider
 
     # Anthropic
     anthropic_api_key: str = ""
     anthropic_model: str = "claude-3-opus-20240229"
+    anthropic_fast_model: str = "claude-3-haiku-20240307"
+    anthropic_base_url: Optional[str] = None
+
+    # LLM provider HTTP connection pools
+    llm_http_max_connections: int = 100
+    llm_http_max_keepalive_connections: int = 20
+    llm_http_keepalive_expiry_seconds: float = 60.0
+    llm_http_timeout_seconds: float = 60.0
+    llm_http_connect_timeout_seconds: float = 5.0
+    llm_http2: bool = False  # requires the h2 package
+    llm_prewarm_connections: int = 2  # per provider at startup; 0 disables
+
+    # LLM orchestration
+    llm_singleflight_enabled: bool = True
+    llm_max_attempts: int = 3  # rounds over the healthy providers
+
+    # Record provider answers, or replay them instead of calling providers
+    llm_replay_mode: str = "off"  # off, record or replay
+    llm_replay_path: str = "recordings/llm.jsonl.gz"
+    llm_replay_speed: float = 1.0  # replay time divisor; 0 answers without delay
+
+    # Structured output: schema-constrained answers validated into the API models
+    llm_structured_output_enabled: bool = True
+    openai_structured_mode: str = "json_object"  # json_schema (gpt-4o-2024-08-06+) or json_object
+
+    # Model cascade: fast model first, large model when the answer is not good enough
+    llm_cascade_enabled: bool = True
+    llm_cascade_confidence_threshold: float = 0.7  # below this the large model is asked
+
+    # Provider rate limits: requests and estimated tokens per minute (0 disables)
+    llm_rate_limit_enabled: bool = True
+    llm_rate_limit_backend: str = "memory"  # memory, or redis to share budgets across tasks
+    openai_rpm: int = 500
+    openai_tpm: int = 150_000
+    anthropic_rpm: int = 50
+    anthropic_tpm: int = 40_000
+    llm_rate_limit_max_wait_seconds: float = 10.0  # then the call is rejected
+    llm_rate_limit_bulk_max_wait_seconds: float = 120.0
+
+    # Provider routing and circuit breakers
+    llm_router_ewma_alpha: float = 0.2
+    llm_circuit_failure_threshold: int = 3  # consecutive failures that open the circuit
+    llm_circuit_error_rate_threshold: float = 0.5
+    llm_circuit_open_seconds: float = 30.0  # before a half-open probe is allowed
+
+    # Hedging: race the other provider when the primary is slower than usual
+    llm_hedging_enabled: bool = False
+    llm_hedge_percentile: float = 0.95  # primary latency percentile used as hedge delay
+    llm_hedge_initial_delay_seconds: float = 8.0  # until enough latency samples exist
+    llm_hedge_min_delay_seconds: float = 1.0
+    llm_hedge_max_delay_seconds: float = 20.0
+    llm_hedge_budget_ratio: float = 0.1  # max share of calls that may be hedged
 
     # Redis
     redis_url: str = "redis://localhost:6379"
 
     # CORS
-    cors_origins: List[str] = ["http://localhost:3000", "http://localhost:3001"]
+    cors_origins: Annotated[List[str], NoDecode] = [
+        "http://localhost:3000",
+        "http://localhost:3001",
+    ]
 
     # Cache settings
     cache_ttl_seconds: int = 3600  # 1 hour
+    cache_enabled: bool = True
+    cache_backend: str = "redis"  # redis or memory
+    cache_max_entries: int = 1024  # memory backend only
+
+    # Semantic (near-duplicate) symptom cache; opt-in, and only used with an OpenAI key
+    semantic_cache_enabled: bool = False
+    semantic_cache_threshold: float = 0.92  # cosine similarity
+    semantic_cache_max_entries: int = 2048
+    semantic_cache_persist: bool = False  # mirror entries to the cache backend
+    semantic_cache_verify_rate: float = 0.05  # share of hits re-checked against the LLM
+
+    # Local red-flag triage ahead of the LLM
+    triage_enabled: bool = True
+
+    # Consultation state kept between clarifying rounds (on the cache backend)
+    consultation_state_enabled: bool = True
+    consultation_state_ttl_seconds: int = 24 * 3600
+    consultation_state_max_entries: int = 1024  # in-process fallback copy
+
+    # Speculative treatment-protocol generation after a diagnosis
+    treatment_prefetch_enabled: bool = True
+    treatment_prefetch_ttl_seconds: float = 300.0
+    treatment_prefetch_max_pending: int = 256  # held prefetches per process
+
+    # Image preprocessing before vision analysis
+    image_preprocessing_enabled: bool = True
+    image_max_edge: int = 1024  # pixels, longest side after downscaling
+    image_max_bytes: int = 10 * 1024 * 1024  # download cap
+    image_jpeg_quality: int = 85
+    image_preprocess_workers: int = 2  # threads for decode/resize
+    image_fetch_timeout_seconds: float = 10.0
+    # Hosts images may be fetched from (comma-separated, subdomains included);
+    # empty allows any public host. Private and loopback addresses are refused.
+    image_fetch_allowed_hosts: Annotated[List[str], NoDecode] = []
+    image_fetch_allow_private_networks: bool = False  # local benchmarks only
+
+    # Perceptual-hash cache for resent images
+    image_cache_enabled: bool = True
+    image_cache_max_distance: int = 6  # Hamming distance on 64-bit dHash and aHash
+    image_cache_max_entries: int = 1024
+    image_cache_persist: bool = False  # mirror entries to the cache backend
+
+    # Bulk diagnosis jobs
+    bulk_jobs_enabled: bool = True
+    bulk_jobs_backend: str = "redis"  # redis or memory
+    bulk_jobs_concurrency: int = 4  # worker tasks per process
+    bulk_jobs_max_items: int = 10_000  # per submitted job
+    bulk_jobs_ttl_seconds: int = 7 * 24 * 3600  # status and results retention
+    bulk_jobs_yield_threshold: int = 8  # in-flight interactive requests that pause workers
+
+    # Prometheus metrics at /metrics
+    metrics_enabled: bool = True
+
+    # Request tracing (W3C traceparent in, spans out)
+    tracing_exporter: str = "none"  # none, memory or otlp
+    tracing_service_name: str = "petvet-ai-services"
+    otlp_endpoint: str = "http://localhost:4318"  # OTLP/HTTP collector
+    otlp_headers: Dict[str, str] = {}  # JSON, e.g. {"authorization": "Bearer ..."}
+    tracing_batch_size: int = 512
+    tracing_flush_seconds: float = 5.0
+
+    # Background dependency checks behind /health/ready
+    health_monitor_enabled: bool = True
+    health_check_interval_seconds: float = 15.0
+    health_check_timeout_seconds: float = 3.0
+    health_max_loop_lag_seconds: float = 0.5  # above this the task reports not ready
+    health_redis_required: bool = False  # opt in for Redis-backed bulk jobs; caches degrade
+
+    # NLP
+    nlp_batch_max_items: int = 1000
+    nlp_batch_max_chars: int = 500_000  # total text size per batch request
+
+    @field_validator("cors_origins", "image_fetch_allowed_hosts", mode="before")
+    @classmethod
+    def _split_comma_separated(cls, value: Any) -> Any:
+        """Accept a comma-separated string as well as a list."""
+        if isinstance(value, str):
+            return [item.strip() for item in value.split(",") if item.strip()]
+        return value
 
     class Config:
         env_file = ".env"
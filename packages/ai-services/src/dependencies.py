@@ -0,0 +1,221 @@
+"""
+Shared service construction and FastAPI dependencies.
+
+Services are built once in the application lifespan and stored on
+`app.state`; routers receive them through the getters below.
+"""
+from functools import partial
+from typing import Optional
+
+from fastapi import Request
+from redis.asyncio import Redis
+
+from .cache.backends import create_backend
+from .cache.image_cache import ImageResultCache
+from .cache.response_cache import ResponseCache
+from .cache.semantic import SemanticCache
+from .config import settings
+from .diagnosis.analyzer import VeterinaryAnalyzer
+from .diagnosis.consultation import ConsultationStore
+from .diagnosis.images import ImagePreprocessor
+from .diagnosis.prefetch import TreatmentPrefetcher
+from .diagnosis.triage import TriageEngine
+from .jobs.manager import BulkJobManager, InteractiveLoad
+from .jobs.store import create_job_store
+from .llm.cascade import ModelCascade
+from .llm.orchestrator import LLMOrchestrator
+from .nlp.intent import IntentEngine
+from .telemetry.health import DependencyMonitor
+
+
+def build_analyzer(llm: LLMOrchestrator) -> VeterinaryAnalyzer:
+    """
+    Build the analyzer and its caches from settings.
+
+    Args:
+        llm: Shared orchestrator
+
+    Returns:
+        Configured analyzer
+    """
+    backend = None
+    if (
+        settings.cache_enabled
+        or settings.semantic_cache_persist
+        or settings.image_cache_persist
+        or settings.consultation_state_enabled
+    ):
+        backend = create_backend(
+            settings.cache_backend, settings.redis_url, settings.cache_max_entries
+        )
+
+    cache = (
+        ResponseCache(backend, ttl_seconds=settings.cache_ttl_seconds)
+        if settings.cache_enabled
+        else None
+    )
+    semantic_cache = (
+        SemanticCache(
+            threshold=settings.semantic_cache_threshold,
+            max_entries=settings.semantic_cache_max_entries,
+            backend=backend if settings.semantic_cache_persist else None,
+            ttl_seconds=settings.cache_ttl_seconds,
+        )
+        # Embeddings come from OpenAI, so the cache needs its client
+        if settings.semantic_cache_enabled and llm.openai_client is not None
+        else None
+    )
+    image_cache = (
+        ImageResultCache(
+            max_distance=settings.image_cache_max_distance,
+            max_entries=settings.image_cache_max_entries,
+            backend=backend if settings.image_cache_persist else None,
+            ttl_seconds=settings.cache_ttl_seconds,
+        )
+        # Hashes come from the preprocessor, so the cache needs it enabled
+        if settings.image_cache_enabled and settings.image_preprocessing_enabled
+        else None
+    )
+    image_preprocessor = (
+        ImagePreprocessor(
+            max_edge=settings.image_max_edge,
+            max_bytes=settings.image_max_bytes,
+            jpeg_quality=settings.image_jpeg_quality,
+            max_workers=settings.image_preprocess_workers,
+            timeout_seconds=settings.image_fetch_timeout_seconds,
+            allowed_hosts=settings.image_fetch_allowed_hosts,
+            allow_private_networks=settings.image_fetch_allow_private_networks,
+        )
+        if settings.image_preprocessing_enabled
+        else None
+    )
+
+    return VeterinaryAnalyzer(
+        llm,
+        cache=cache,
+        semantic_cache=semantic_cache,
+        semantic_verify_rate=settings.semantic_cache_verify_rate,
+        structured_output=settings.llm_structured_output_enabled,
+        image_preprocessor=image_preprocessor,
+        image_cache=image_cache,
+        triage=TriageEngine() if settings.triage_enabled else None,
+        cascade=(
+            ModelCascade(confidence_threshold=settings.llm_cascade_confidence_threshold)
+            if settings.llm_cascade_enabled
+            else None
+        ),
+        consultations=(
+            ConsultationStore(
+                backend,
+                ttl_seconds=settings.consultation_state_ttl_seconds,
+                max_entries=settings.consultation_state_max_entries,
+            )
+            if settings.consultation_state_enabled
+            else None
+        ),
+        prefetcher=(
+            TreatmentPrefetcher(
+                ttl_seconds=settings.treatment_prefetch_ttl_seconds,
+                max_pending=settings.treatment_prefetch_max_pending,
+            )
+            if settings.treatment_prefetch_enabled
+            else None
+        ),
+    )
+
+
+def build_job_manager(analyzer: VeterinaryAnalyzer, load: InteractiveLoad) -> BulkJobManager:
+    """
+    Build the bulk job manager from settings.
+
+    Args:
+        analyzer: Shared analyzer
+        load: Interactive request counter the workers yield to
+
+    Returns:
+        Job manager (not yet started)
+    """
+    store = create_job_store(
+        settings.bulk_jobs_backend, settings.redis_url, settings.bulk_jobs_ttl_seconds
+    )
+    return BulkJobManager(
+        analyzer,
+        store,
+        concurrency=settings.bulk_jobs_concurrency,
+        load=load,
+        yield_threshold=settings.bulk_jobs_yield_threshold,
+    )
+
+
+def _redis_in_use() -> bool:
+    """Whether any enabled component stores its state in Redis."""
+    cache = settings.cache_backend == "redis" and (
+        settings.cache_enabled
+        or settings.semantic_cache_persist
+        or settings.image_cache_persist
+        or settings.consultation_state_enabled
+    )
+    jobs = settings.bulk_jobs_enabled and settings.bulk_jobs_backend == "redis"
+    limits = settings.llm_rate_limit_enabled and settings.llm_rate_limit_backend == "redis"
+    return cache or jobs or limits
+
+
+def build_health_monitor(llm: LLMOrchestrator) -> DependencyMonitor:
+    """
+    Build the background dependency monitor from settings.
+
+    Providers are not checked while replaying recorded answers.
+
+    Args:
+        llm: Shared orchestrator, whose providers are checked and routed
+
+    Returns:
+        Monitor (not yet started)
+    """
+    timeout = settings.health_check_timeout_seconds
+    redis = (
+        Redis.from_url(settings.redis_url, socket_timeout=timeout, socket_connect_timeout=timeout)
+        if _redis_in_use()
+        else None
+    )
+    provider_checks = {}
+    if llm.replay is None or not llm.replay.replaying:
+        provider_checks = {
+            name: partial(llm.check_provider, name, timeout)
+            for name in llm.router.providers
+            if name in llm.http_clients
+        }
+    return DependencyMonitor(
+        redis=redis,
+        provider_checks=provider_checks,
+        router=llm.router,
+        interval=settings.health_check_interval_seconds,
+        timeout=timeout,
+        max_loop_lag=settings.health_max_loop_lag_seconds,
+        redis_required=settings.health_redis_required,
+    )
+
+
+def get_llm(request: Request) -> LLMOrchestrator:
+    """Dependency returning the shared LLM orchestrator."""
+    return request.app.state.llm
+
+
+def get_analyzer(request: Request) -> VeterinaryAnalyzer:
+    """Dependency returning the shared veterinary analyzer."""
+    return request.app.state.analyzer
+
+
+def get_intent_engine(request: Request) -> IntentEngine:
+    """Dependency returning the precompiled intent engine."""
+    return request.app.state.intent_engine
+
+
+def get_job_manager(request: Request) -> BulkJobManager:
+    """Dependency returning the bulk diagnosis job manager."""
+    return request.app.state.job_manager
+
+
+def get_health_monitor(request: Request) -> Optional[DependencyMonitor]:
+    """Dependency returning the dependency monitor, or None when it is disabled."""
+    return request.app.state.health_monitor
@@ -1,11 +1,30 @@
 """
 Veterinary Diagnosis Analyzer using LLM.
 """
-import json
+import asyncio
+import copy
 import logging
-from typing import Any, Dict, List, Optional
+import random
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Coroutine, Dict, List, Optional, Set, Tuple, Type
 
+from pydantic import BaseModel, ValidationError
+
+from ..cache.image_cache import ImageResultCache
+from ..cache.response_cache import ResponseCache, canonical_hash, normalize_text
+from ..cache.semantic import SemanticCache
+from ..llm import repair
+from ..llm.cascade import ModelCascade
 from ..llm.orchestrator import LLMOrchestrator
+from ..llm.ratelimit import Priority, current_priority, llm_priority
+from ..llm.streaming import IncrementalJSONParser, Path, match_path
+from ..telemetry.metrics import DEFAULT_RESPONSES, PARSE_FAILURES, STAGE_DURATION
+from ..telemetry.tracing import set_attributes, traced
+from .consultation import ConsultationNotFoundError, ConsultationState, ConsultationStore
+from .images import ImagePreprocessor, PreparedImage
+from .prefetch import TreatmentPrefetcher
+from .schemas import Diagnosis, ImageAnalysisResponse, SymptomAnalysisResponse, TreatmentResponse
+from .triage import TriageEngine, TriageResult
 
 logger = logging.getLogger(__name__)
 
@@ -21,118 +40,619 @@ Diretrizes:
 
 IMPORTANTE: Voce NAO substitui um veterinario presencial. Sempre indique quando uma avaliacao presencial e necessaria."""
 
+# Urgencies that always get the large model when the cascade is enabled
+HIGH_URGENCY_LEVELS = ("high", "emergency")
+
+DEFAULT_SYMPTOM_RESPONSE: Dict[str, Any] = {
+    "needs_clarification": True,
+    "clarifying_questions": [
+        "Ha quanto tempo esses sintomas comecaram?",
+        "O animal esta comendo e bebendo normalmente?",
+        "Houve alguma mudanca recente na rotina ou alimentacao?",
+    ],
+}
+
+DEFAULT_TREATMENT_RESPONSE: Dict[str, Any] = {
+    "medications": [],
+    "supportive_care": ["Manter hidratacao", "Repouso"],
+    "monitoring": ["Observar melhora dos sintomas"],
+    "follow_up": "Se nao houver melhora em 48-72h, procure um veterinario presencial.",
+    "warnings": ["Este protocolo nao substitui avaliacao veterinaria presencial."],
+}
+
+# Values for required fields a salvaged (e.g. truncated) treatment lacks
+TREATMENT_FALLBACKS: Dict[str, Any] = {
+    "follow_up": DEFAULT_TREATMENT_RESPONSE["follow_up"],
+}
+
+# Fields sent to streaming clients as soon as the model has written them
+SYMPTOM_STREAM_FIELDS: Tuple[Path, ...] = (
+    ("needs_clarification",),
+    ("diagnosis", "urgency_level"),
+    ("diagnosis", "primary"),
+    ("clarifying_questions", "*"),
+    ("confidence",),
+)
+
+TREATMENT_STREAM_FIELDS: Tuple[Path, ...] = (
+    ("medications", "*"),
+    ("warnings", "*"),
+    ("follow_up",),
+)
+
+# Fixed instruction blocks. They are sent ahead of the patient data, which is
+# the only part that changes between calls, so providers can cache them.
+SYMPTOM_INITIAL_INSTRUCTIONS = """Analise os sintomas do paciente abaixo e determine:
+1. Se voce precisa de mais informacoes para um diagnostico preciso
+2. Ou se ja pode fornecer um diagnostico
+
+Se precisar de mais informacoes, use "needs_clarification": true, liste ate 3
+perguntas esclarecedoras em "clarifying_questions" e deixe "diagnosis" e
+"confidence" como null.
+Se ja pode diagnosticar, use "needs_clarification": false, forneca "diagnosis"
+e "confidence" e deixe "clarifying_questions" como null.
+
+Responda EXATAMENTE neste formato JSON (JSON valido, sem comentarios):
+{
+    "needs_clarification": false,
+    "clarifying_questions": null,
+    "diagnosis": {
+        "primary": "diagnostico principal",
+        "differentials": [
+            {"condition": "condicao 1", "probability": 30},
+            {"condition": "condicao 2", "probability": 20}
+        ],
+        "urgency_level": "low|medium|high|emergency"
+    },
+    "confidence": 0.75
+}"""
+
+# Sent after the answers in follow-up rounds, behind the first round's prefix
+SYMPTOM_FINAL_INSTRUCTIONS = """Com base nas informacoes acima, forneca sua analise clinica completa.
+
+Responda EXATAMENTE neste formato JSON:
+{
+    "needs_clarification": false,
+    "diagnosis": {
+        "primary": "diagnostico principal",
+        "differentials": [
+            {"condition": "condicao 1", "probability": 30},
+            {"condition": "condicao 2", "probability": 20}
+        ],
+        "urgency_level": "low|medium|high|emergency"
+    },
+    "confidence": 0.85
+}"""
+
+TREATMENT_INSTRUCTIONS = """Forneca um protocolo de tratamento completo para o paciente e diagnostico abaixo.
+
+Responda EXATAMENTE neste formato JSON:
+{
+    "medications": [
+        {
+            "name": "nome do medicamento",
+            "dosage": "dosagem (ex: 10mg/kg)",
+            "route": "via de administracao (oral, topica, etc)",
+            "frequency": "frequencia (ex: a cada 12h)",
+            "duration": "duracao (ex: 7 dias)",
+            "instructions": "instrucoes especiais"
+        }
+    ],
+    "supportive_care": [
+        "cuidado de suporte 1",
+        "cuidado de suporte 2"
+    ],
+    "monitoring": [
+        "o que monitorar 1",
+        "o que monitorar 2"
+    ],
+    "follow_up": "orientacao de acompanhamento",
+    "warnings": [
+        "alerta importante 1"
+    ]
+}"""
+
+
+@dataclass
+class _SymptomLookup:
+    """Prompt and cache state for one symptom analysis request."""
+
+    instructions: str
+    prompt: str
+    result: Optional[Dict[str, Any]] = None
+    cache_key: Optional[str] = None
+    scope: Optional[str] = None
+    embedding: Optional[List[float]] = None
+
 
 class VeterinaryAnalyzer:
     """
     AI-powered veterinary analysis engine.
     """
 
-    def __init__(self, llm: LLMOrchestrator):
+    def __init__(
+        self,
+        llm: LLMOrchestrator,
+        cache: Optional[ResponseCache] = None,
+        semantic_cache: Optional[SemanticCache] = None,
+        semantic_verify_rate: float = 0.0,
+        structured_output: bool = False,
+        image_preprocessor: Optional[ImagePreprocessor] = None,
+        image_cache: Optional[ImageResultCache] = None,
+        triage: Optional[TriageEngine] = None,
+        cascade: Optional[ModelCascade] = None,
+        prefetcher: Optional[TreatmentPrefetcher] = None,
+        consultations: Optional[ConsultationStore] = None,
+    ):
         self.llm = llm
+        self.cache = cache
+        self.semantic_cache = semantic_cache
+        self.semantic_verify_rate = semantic_verify_rate
+        self.structured_output = structured_output
+        self.image_preprocessor = image_preprocessor
+        self.image_cache = image_cache
+        self.triage = triage
+        self.cascade = cascade
+        self.prefetcher = prefetcher
+        self.consultations = consultations
+        self._background_tasks: Set[asyncio.Task] = set()
+
+    async def aclose(self) -> None:
+        """Cancel background work and close cache backends."""
+        if self.prefetcher is not None:
+            await self.prefetcher.aclose()
+        for task in list(self._background_tasks):
+            task.cancel()
+        await asyncio.gather(*self._background_tasks, return_exceptions=True)
+
+        if self.image_preprocessor is not None:
+            await self.image_preprocessor.aclose()
+
+        # The caches may share one backend
+        backends = {}
+        for cache in (self.cache, self.semantic_cache, self.image_cache, self.consultations):
+            if cache is not None and cache.backend is not None:
+                backends[id(cache.backend)] = cache.backend
+        for backend in backends.values():
+            await backend.close()
 
+    @traced("analyzer.analyze_symptoms")
     async def analyze_symptoms(
         self,
-        symptoms: str,
+        symptoms: Optional[str],
         pet_info: Optional[Dict[str, Any]] = None,
         clarifying_answers: Optional[List[str]] = None,
+        consultation_id: Optional[str] = None,
+        fallback: bool = True,
     ) -> Dict[str, Any]:
         """
         Analyze symptoms and provide diagnosis.
 
+        A follow-up for a consultation with stored state may omit the
+        symptoms and send only its new clarifying answers. When a diagnosis
+        is returned for a consultation, its treatment protocol is prefetched
+        in the background.
+
         Args:
-            symptoms: Description of symptoms
+            symptoms: Description of symptoms, or None for a follow-up
             pet_info: Information about the pet
             clarifying_answers: Answers to clarifying questions
+            consultation_id: Consultation the analysis belongs to
+            fallback: Return the safe default when the model call or parsing
+                fails; False lets the error propagate
 
         Returns:
-            Analysis result with diagnosis or clarifying questions
+            Analysis result with diagnosis or clarifying questions, plus the
+            local `triage` signal when red flags were found
+
+        Raises:
+            ConsultationNotFoundError: If a follow-up has no stored state
+            Exception: Model or parse errors, when `fallback` is False
         """
-        pet_context = self._format_pet_info(pet_info) if pet_info else "Informacoes do pet nao fornecidas."
+        state = await self._open_round(consultation_id, symptoms, pet_info, clarifying_answers)
+        with STAGE_DURATION.time("symptoms", "triage"):
+            signal = self._assess(state)
+        with STAGE_DURATION.time("symptoms", "cache_lookup"):
+            lookup = await self._lookup_symptoms(state)
+        set_attributes(
+            **{
+                "consultation.id": consultation_id,
+                "consultation.round": len(state.questions) + 1,
+                "triage.urgency": signal.urgency_level,
+                "cache.hit": lookup.result is not None,
+            }
+        )
+        if lookup.result is not None:
+            await self._save_round(consultation_id, state, lookup.result)
+            self._prefetch_treatment(consultation_id, lookup.result, state.pet_info)
+            return self._with_triage(lookup.result, signal)
 
-        if clarifying_answers:
-            # We have answers, provide final diagnosis
-            prompt = f"""Paciente: {pet_context}
+        try:
+            with STAGE_DURATION.time("symptoms", "llm"), llm_priority(
+                self._urgency_priority(signal.urgency_level)
+            ):
+                result, repaired = await self._diagnose(
+                    lookup.instructions, lookup.prompt, signal
+                )
 
-Sintomas relatados: {symptoms}
+            logger.info(
+                f"Symptom analysis completed: needs_clarification={result.get('needs_clarification')}"
+            )
 
-Informacoes adicionais fornecidas:
-{chr(10).join(f'- {a}' for a in clarifying_answers)}
+            await self._save_round(consultation_id, state, result)
+            if not repaired:
+                await self._store_symptoms(lookup, result)
+                self._prefetch_treatment(consultation_id, result, state.pet_info)
 
-Com base nessas informacoes, forneca sua analise clinica completa.
+            return self._with_triage(result, signal)
+        except Exception as e:
+            logger.error(f"Error in symptom analysis: {e}")
+            if not fallback:
+                raise
+            # Return a safe default
+            DEFAULT_RESPONSES.inc("symptoms")
+            result = copy.deepcopy(DEFAULT_SYMPTOM_RESPONSE)
+            await self._save_round(consultation_id, state, result)
+            return self._with_triage(result, signal)
 
-Responda EXATAMENTE neste formato JSON:
-{{
-    "needs_clarification": false,
-    "diagnosis": {{
-        "primary": "diagnostico principal",
-        "differentials": [
-            {{"condition": "condicao 1", "probability": 30}},
-            {{"condition": "condicao 2", "probability": 20}}
-        ],
-        "urgency_level": "low|medium|high|emergency"
-    }},
-    "confidence": 0.85
-}}"""
-        else:
+    async def stream_symptoms(
+        self,
+        symptoms: Optional[str],
+        pet_info: Optional[Dict[str, Any]] = None,
+        clarifying_answers: Optional[List[str]] = None,
+        consultation_id: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a symptom analysis.
+
+        Yields a `triage` event first when the local check finds red flags,
+        then `partial` events for key fields as soon as the model has
+        written them, then a single `final` event with the full result
+        (or the safe default if the completion failed).
+
+        Args:
+            symptoms: Description of symptoms, or None for a follow-up
+            pet_info: Information about the pet
+            clarifying_answers: Answers to clarifying questions
+            consultation_id: Consultation the analysis belongs to
+
+        Yields:
+            Events of the form {"event": ..., "data": ...}
+
+        Raises:
+            ConsultationNotFoundError: If a follow-up has no stored state
+        """
+        state = await self._open_round(consultation_id, symptoms, pet_info, clarifying_answers)
+        async for event in self._stream_round(state, consultation_id):
+            yield event
+
+    async def start_symptom_stream(
+        self,
+        symptoms: Optional[str],
+        pet_info: Optional[Dict[str, Any]] = None,
+        clarifying_answers: Optional[List[str]] = None,
+        consultation_id: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Open the consultation round now and return its event stream.
+
+        Same events as `stream_symptoms`, but a missing consultation is
+        raised before the response starts, so the API can answer 404.
+
+        Raises:
+            ConsultationNotFoundError: If a follow-up has no stored state
+        """
+        state = await self._open_round(consultation_id, symptoms, pet_info, clarifying_answers)
+        return self._stream_round(state, consultation_id)
+
+    async def _stream_round(
+        self, state: ConsultationState, consultation_id: Optional[str]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Events of an opened symptom-analysis round."""
+        signal = self._assess(state)
+        if signal.red_flags:
+            yield {"event": "triage", "data": signal.to_dict()}
+
+        lookup = await self._lookup_symptoms(state)
+        if lookup.result is not None:
+            await self._save_round(consultation_id, state, lookup.result)
+            self._prefetch_treatment(consultation_id, lookup.result, state.pet_info)
+            yield {"event": "final", "data": self._with_triage(lookup.result, signal)}
+            return
+
+        result, repaired = None, False
+        async for event in self._stream_json(
+            lookup.instructions,
+            lookup.prompt,
+            1500,
+            SYMPTOM_STREAM_FIELDS,
+            SymptomAnalysisResponse,
+            priority=self._urgency_priority(signal.urgency_level),
+        ):
+            if event["event"] == "final":
+                repaired = event["repaired"]
+                try:
+                    result = self._complete_symptom_answer(event["data"])
+                except ValueError as e:
+                    logger.error(f"Error in streamed analysis: {e}")
+            else:
+                yield event
+
+        if result is None:
+            DEFAULT_RESPONSES.inc("symptoms")
+            result = copy.deepcopy(DEFAULT_SYMPTOM_RESPONSE)
+        elif not repaired:
+            await self._store_symptoms(lookup, result)
+            self._prefetch_treatment(consultation_id, result, state.pet_info)
+        await self._save_round(consultation_id, state, result)
+        yield {"event": "final", "data": self._with_triage(result, signal)}
+
+    async def _open_round(
+        self,
+        consultation_id: Optional[str],
+        symptoms: Optional[str],
+        pet_info: Optional[Dict[str, Any]],
+        clarifying_answers: Optional[List[str]],
+    ) -> ConsultationState:
+        """
+        Consultation state for this round.
+
+        A follow-up (no symptoms) extends the stored state with its answers.
+        A request that resends the stored symptoms and pet replaces the
+        answers but keeps the questions they respond to; any other request
+        starts the consultation over.
+        """
+        stored = None
+        if self.consultations is not None and consultation_id is not None:
+            stored = await self.consultations.get(consultation_id)
+
+        if symptoms is None:
+            if stored is None:
+                raise ConsultationNotFoundError(
+                    f"No stored state for consultation {consultation_id}; resend the symptoms"
+                )
+            stored.answers.extend(clarifying_answers or [])
+            return stored
+
+        answers = list(clarifying_answers or [])
+        if stored is not None and stored.symptoms == symptoms and stored.pet_info == pet_info:
+            stored.answers = answers
+            return stored
+        return ConsultationState(
+            symptoms, self._patient_prompt(symptoms, pet_info), pet_info, answers=answers
+        )
+
+    async def _save_round(
+        self, consultation_id: Optional[str], state: ConsultationState, result: Dict[str, Any]
+    ) -> None:
+        """Remember the questions shown and the analysis returned for the next round."""
+        if self.consultations is None or consultation_id is None:
+            return
+        for question in result.get("clarifying_questions") or []:
+            if question not in state.questions:
+                state.questions.append(question)
+        state.result = result
+        await self.consultations.save(consultation_id, state)
+
+    def _assess(self, state: ConsultationState) -> TriageResult:
+        """Run the local red-flag triage over the description and answers."""
+        if self.triage is None:
+            return TriageResult()
+        text = " ".join([state.symptoms, *state.answers])
+        signal = self.triage.assess(text, (state.pet_info or {}).get("species"))
+        if signal.red_flags:
+            logger.info(f"Triage red flags: {signal.red_flags} ({signal.urgency_level})")
+        return signal
+
+    @staticmethod
+    def _with_triage(result: Dict[str, Any], signal: TriageResult) -> Dict[str, Any]:
+        """Attach the triage signal without touching the (possibly cached) result."""
+        if not signal.red_flags:
+            return result
+        return {**result, "triage": signal.to_dict()}
+
+    async def _lookup_symptoms(self, state: ConsultationState) -> "_SymptomLookup":
+        """Build the prompt and consult the exact and semantic caches."""
+        lookup = _SymptomLookup(*self._build_symptom_prompt(state))
+
+        if self.cache is not None:
+            lookup.cache_key = self.cache.make_key(
+                "symptoms",
+                {
+                    "symptoms": normalize_text(state.symptoms),
+                    "pet_info": state.pet_info,
+                    "clarifying_answers": [normalize_text(a) for a in state.answers],
+                },
+            )
+            cached = await self.cache.get(lookup.cache_key)
+            if cached is not None:
+                logger.info("Symptom analysis served from cache")
+                lookup.result = cached
+                return lookup
+
+        # Near-duplicate lookup only applies to first-round descriptions
+        if self.semantic_cache is not None and not state.answers:
+            lookup.scope = self._pet_scope(state.pet_info)
+            lookup.embedding = await self._embed_symptoms(state.symptoms)
+            hit = None
+            if lookup.embedding:
+                hit = self.semantic_cache.lookup(lookup.scope, lookup.embedding)
+            if hit:
+                result, similarity = hit
+                logger.info(
+                    f"Symptom analysis served from semantic cache (similarity={similarity:.3f})"
+                )
+                if random.random() < self.semantic_verify_rate:
+                    self._spawn(
+                        self._verify_semantic_hit(
+                            lookup.instructions, lookup.prompt, result, similarity
+                        )
+                    )
+                lookup.result = result
+
+        return lookup
+
+    async def _store_symptoms(self, lookup: "_SymptomLookup", result: Dict[str, Any]) -> None:
+        """Store a successful symptom analysis in the caches (never a repaired one)."""
+        if lookup.cache_key:
+            await self.cache.set(lookup.cache_key, result)
+        if lookup.embedding:
+            await self.semantic_cache.add(lookup.scope, lookup.embedding, result)
+
+    def _patient_prompt(self, symptoms: str, pet_info: Optional[Dict[str, Any]]) -> str:
+        """Build the first-round patient prompt."""
+        pet_context = self._format_pet_info(pet_info) if pet_info else "Informacoes do pet nao fornecidas."
+
+        return f"""Paciente: {pet_context}
+
+Sintomas relatados: {symptoms}"""
+
+    @staticmethod
+    def _build_symptom_prompt(state: ConsultationState) -> Tuple[str, str]:
+        """Build the symptom analysis instructions and patient prompt for a round."""
+        if not state.answers:
             # Initial analysis - may need clarification
-            prompt = f"""Paciente: {pet_context}
+            return SYMPTOM_INITIAL_INSTRUCTIONS, state.prompt
 
-Sintomas relatados: {symptoms}
+        # Follow-up: the first round's instructions and patient data go
+        # unchanged in the prefix, so only the new exchange is uncached
+        prefix = f"{SYMPTOM_INITIAL_INSTRUCTIONS}\n\n{state.prompt}"
+        sections = []
+        diagnosis = (state.result or {}).get("diagnosis")
+        if diagnosis:
+            sections.append(
+                f"Sua analise anterior: {diagnosis.get('primary')} "
+                f"(urgencia: {diagnosis.get('urgency_level')})"
+            )
+        if state.questions:
+            sections.append(
+                "Perguntas feitas ao tutor:\n" + "\n".join(f"- {q}" for q in state.questions)
+            )
+        sections.append(
+            "Informacoes adicionais fornecidas:\n" + "\n".join(f"- {a}" for a in state.answers)
+        )
+        sections.append(SYMPTOM_FINAL_INSTRUCTIONS)
+        return prefix, "\n\n".join(sections)
 
-Analise os sintomas e determine:
-1. Se voce precisa de mais informacoes para um diagnostico preciso
-2. Ou se ja pode fornecer um diagnostico
+    async def _diagnose(
+        self, instructions: str, prompt: str, signal: TriageResult
+    ) -> Tuple[Dict[str, Any], bool]:
+        """Run a symptom analysis, through the model cascade if enabled; (result, repaired)."""
+        if self.cascade is None:
+            return await self._run_symptom_analysis(instructions, prompt)
 
-Se precisar de mais informacoes, liste ate 3 perguntas esclarecedoras.
-Se ja pode diagnosticar, forneca o diagnostico.
+        return await self.cascade.run(
+            "symptoms",
+            lambda tier: self._run_symptom_analysis(instructions, prompt, tier),
+            self._symptom_escalation,
+            # The fast answer would be escalated for its urgency anyway
+            skip_reason=(
+                f"triage_{signal.urgency_level}"
+                if signal.urgency_level in HIGH_URGENCY_LEVELS
+                else None
+            ),
+        )
 
-Responda EXATAMENTE neste formato JSON:
-{{
-    "needs_clarification": true/false,
-    "clarifying_questions": ["pergunta 1", "pergunta 2"] // se needs_clarification = true
-    "diagnosis": {{ // se needs_clarification = false
-        "primary": "diagnostico principal",
-        "differentials": [
-            {{"condition": "condicao 1", "probability": 30}},
-            {{"condition": "condicao 2", "probability": 20}}
-        ],
-        "urgency_level": "low|medium|high|emergency"
-    }},
-    "confidence": 0.75 // se diagnosis presente
-}}"""
+    def _symptom_escalation(self, answer: Tuple[Dict[str, Any], bool]) -> Optional[str]:
+        """Why a fast-tier symptom analysis should be redone by the large model."""
+        result, repaired = answer
+        if repaired:
+            return "repaired"
+        diagnosis = result.get("diagnosis")
+        if not diagnosis:
+            return None  # clarifying questions only
+        if diagnosis.get("urgency_level") in HIGH_URGENCY_LEVELS:
+            return "urgency"
+        confidence = result.get("confidence")
+        if confidence is None or confidence < self.cascade.confidence_threshold:
+            return "low_confidence"
+        return None
 
-        try:
-            response = await self.llm.complete(
+    async def _run_symptom_analysis(
+        self, instructions: str, prompt: str, tier: str = "large"
+    ) -> Tuple[Dict[str, Any], bool]:
+        """Call the LLM for a symptom prompt; returns (result, repaired)."""
+        if self.structured_output:
+            answer = await self.llm.complete_structured(
                 prompt=prompt,
+                response_model=SymptomAnalysisResponse,
                 system_prompt=SYSTEM_PROMPT,
+                prompt_prefix=instructions,
                 temperature=0.3,
                 max_tokens=1500,
+                tier=tier,
             )
+            return answer.model_dump(exclude_none=True), False
 
-            # Parse JSON response
-            result = self._parse_json_response(response)
+        response = await self.llm.complete(
+            prompt=prompt,
+            system_prompt=SYSTEM_PROMPT,
+            prompt_prefix=instructions,
+            temperature=0.3,
+            max_tokens=1500,
+            tier=tier,
+        )
 
-            logger.info(
-                f"Symptom analysis completed: needs_clarification={result.get('needs_clarification')}"
-            )
+        result, repaired = self._parse_json_response(response, SymptomAnalysisResponse)
+        return self._complete_symptom_answer(result), repaired
 
-            return result
+    @staticmethod
+    def _complete_symptom_answer(result: Dict[str, Any]) -> Dict[str, Any]:
+        """Infer a missing needs_clarification and reject answers with nothing usable."""
+        result.setdefault("needs_clarification", "diagnosis" not in result)
+        if not result.get("diagnosis") and not result.get("clarifying_questions"):
+            raise ValueError("Answer has neither a diagnosis nor clarifying questions")
+        return result
+
+    async def _embed_symptoms(self, symptoms: str) -> Optional[List[float]]:
+        """Embed normalized symptoms; failures disable the lookup for this call."""
+        try:
+            return await self.llm.embed(normalize_text(symptoms))
         except Exception as e:
-            logger.error(f"Error in symptom analysis: {e}")
-            # Return a safe default
-            return {
-                "needs_clarification": True,
-                "clarifying_questions": [
-                    "Ha quanto tempo esses sintomas comecaram?",
-                    "O animal esta comendo e bebendo normalmente?",
-                    "Houve alguma mudanca recente na rotina ou alimentacao?",
-                ],
-            }
+            logger.warning(f"Symptom embedding failed, skipping semantic cache: {e}")
+            return None
 
+    async def _verify_semantic_hit(
+        self, instructions: str, prompt: str, cached: Dict[str, Any], similarity: float
+    ) -> None:
+        """Re-run a sampled semantic hit to measure threshold precision."""
+        try:
+            with llm_priority(Priority.BULK):
+                fresh, _ = await self._run_symptom_analysis(instructions, prompt)
+        except Exception as e:
+            logger.debug(f"Semantic cache verification skipped: {e}")
+            return
+
+        agreed = self._same_outcome(cached, fresh)
+        self.semantic_cache.record_verification(similarity, agreed)
+        if not agreed:
+            logger.info(f"Semantic cache disagreement at similarity={similarity:.3f}")
+
+    @staticmethod
+    def _same_outcome(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+        """Whether two analyses would lead the tutor to the same next step."""
+        if bool(a.get("needs_clarification")) != bool(b.get("needs_clarification")):
+            return False
+
+        diag_a = a.get("diagnosis") or {}
+        diag_b = b.get("diagnosis") or {}
+        return diag_a.get("urgency_level") == diag_b.get("urgency_level") and normalize_text(
+            str(diag_a.get("primary", ""))
+        ) == normalize_text(str(diag_b.get("primary", "")))
+
+    def _spawn(self, coro: Coroutine[Any, Any, Any]) -> asyncio.Task:
+        """Run a coroutine in the background, keeping a reference until it finishes."""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+
+    @traced("analyzer.get_treatment_protocol")
     async def get_treatment_protocol(
         self,
         diagnosis: Dict[str, Any],
         pet_info: Optional[Dict[str, Any]] = None,
+        consultation_id: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         Generate treatment protocol for diagnosis.
@@ -140,71 +660,282 @@ Responda EXATAMENTE neste formato JSON:
         Args:
             diagnosis: Diagnosis information
             pet_info: Pet information for dosage calculation
+            consultation_id: Consultation whose prefetched protocol may be used
 
         Returns:
             Treatment protocol
         """
+        set_attributes(**{"consultation.id": consultation_id})
+        cache_key = self._treatment_cache_key(diagnosis, pet_info)
+        if cache_key:
+            with STAGE_DURATION.time("treatment", "cache_lookup"):
+                cached = await self.cache.get(cache_key)
+            if cached is not None:
+                logger.info("Treatment protocol served from cache")
+                set_attributes(**{"cache.hit": True})
+                return cached
+
+        with STAGE_DURATION.time("treatment", "prefetch_wait"):
+            prefetched = await self._take_prefetched_treatment(consultation_id, diagnosis)
+        set_attributes(**{"cache.hit": False, "prefetch.hit": prefetched is not None})
+        if prefetched is not None:
+            return prefetched
+
+        try:
+            with STAGE_DURATION.time("treatment", "llm"):
+                return await self._generate_treatment(diagnosis, pet_info)
+        except Exception as e:
+            logger.error(f"Error generating treatment: {e}")
+            DEFAULT_RESPONSES.inc("treatment")
+            return copy.deepcopy(DEFAULT_TREATMENT_RESPONSE)
+
+    @traced("analyzer.generate_treatment")
+    async def _generate_treatment(
+        self, diagnosis: Dict[str, Any], pet_info: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Generate a treatment protocol and cache it; errors propagate."""
+        prompt = self._build_treatment_prompt(diagnosis, pet_info)
+        with llm_priority(self._urgency_priority(diagnosis.get("urgency_level"))):
+            result, repaired = await self._treat(prompt, diagnosis.get("urgency_level"))
+
+        logger.info(
+            f"Treatment protocol generated: {len(result.get('medications', []))} medications"
+        )
+
+        cache_key = self._treatment_cache_key(diagnosis, pet_info)
+        if cache_key and not repaired:
+            await self.cache.set(cache_key, result)
+
+        return result
+
+    def _prefetch_treatment(
+        self,
+        consultation_id: Optional[str],
+        result: Dict[str, Any],
+        pet_info: Optional[Dict[str, Any]],
+    ) -> None:
+        """Start generating the treatment protocol for a diagnosis in the background."""
+        if self.prefetcher is None or consultation_id is None:
+            return
+        if result.get("needs_clarification") or not result.get("diagnosis"):
+            return
+        try:
+            # The form the treatment endpoint receives the diagnosis back in
+            diagnosis = Diagnosis.model_validate(result["diagnosis"]).model_dump()
+        except ValidationError:
+            return
+
+        async def generate() -> Dict[str, Any]:
+            # Speculative work queues behind live requests; _generate_treatment
+            # still raises emergencies to EMERGENCY
+            with llm_priority(max(current_priority(), Priority.NLP)):
+                return await self._generate_treatment(diagnosis, pet_info)
+
+        key = self._prefetch_key(consultation_id, diagnosis)
+        if self.prefetcher.start(key, generate):
+            logger.info(f"Prefetching treatment protocol for consultation {consultation_id}")
+
+    async def _take_prefetched_treatment(
+        self,
+        consultation_id: Optional[str],
+        diagnosis: Dict[str, Any],
+    ) -> Optional[Dict[str, Any]]:
+        """Prefetched protocol for the consultation and diagnosis, if any."""
+        if self.prefetcher is None or consultation_id is None:
+            return None
+        result = await self.prefetcher.take(
+            self._prefetch_key(consultation_id, diagnosis)
+        )
+        if result is not None:
+            logger.info(f"Treatment protocol served from prefetch for {consultation_id}")
+        return result
+
+    @staticmethod
+    def _prefetch_key(consultation_id: str, diagnosis: Dict[str, Any]) -> str:
+        """
+        Prefetch key: the consultation plus a hash of the diagnosis.
+
+        Pet info is left out: the consultation already fixes the pet, and
+        the flow sends fewer pet fields to /treatment than to /analyze.
+        """
+        return f"{consultation_id}:{canonical_hash(diagnosis)}"
+
+    async def _treat(
+        self, prompt: str, urgency_level: Optional[str]
+    ) -> Tuple[Dict[str, Any], bool]:
+        """Generate a treatment protocol, through the cascade if enabled; (result, repaired)."""
+        if self.cascade is None:
+            return await self._run_treatment(prompt)
+
+        # Protocols carry no confidence; only invalid or repaired answers escalate
+        return await self.cascade.run(
+            "treatment",
+            lambda tier: self._run_treatment(prompt, tier),
+            lambda answer: "repaired" if answer[1] else None,
+            skip_reason="urgency" if urgency_level in HIGH_URGENCY_LEVELS else None,
+        )
+
+    async def _run_treatment(
+        self, prompt: str, tier: str = "large"
+    ) -> Tuple[Dict[str, Any], bool]:
+        """Call the LLM for a treatment prompt; returns (result, repaired)."""
+        if self.structured_output:
+            answer = await self.llm.complete_structured(
+                prompt=prompt,
+                response_model=TreatmentResponse,
+                system_prompt=SYSTEM_PROMPT,
+                prompt_prefix=TREATMENT_INSTRUCTIONS,
+                temperature=0.3,
+                max_tokens=2000,
+                tier=tier,
+            )
+            return answer.model_dump(exclude_none=True), False
+
+        response = await self.llm.complete(
+            prompt=prompt,
+            system_prompt=SYSTEM_PROMPT,
+            prompt_prefix=TREATMENT_INSTRUCTIONS,
+            temperature=0.3,
+            max_tokens=2000,
+            tier=tier,
+        )
+
+        return self._parse_json_response(response, TreatmentResponse, TREATMENT_FALLBACKS)
+
+    async def stream_treatment_protocol(
+        self,
+        diagnosis: Dict[str, Any],
+        pet_info: Optional[Dict[str, Any]] = None,
+        consultation_id: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a treatment protocol.
+
+        Each medication is emitted as soon as it is complete, followed by a
+        `final` event with the full protocol. A cached or prefetched protocol
+        is sent as the `final` event alone.
+
+        Args:
+            diagnosis: Diagnosis information
+            pet_info: Pet information for dosage calculation
+            consultation_id: Consultation whose prefetched protocol may be used
+
+        Yields:
+            Events of the form {"event": ..., "data": ...}
+        """
+        cache_key = self._treatment_cache_key(diagnosis, pet_info)
+        if cache_key:
+            cached = await self.cache.get(cache_key)
+            if cached is not None:
+                yield {"event": "final", "data": cached}
+                return
+
+        prefetched = await self._take_prefetched_treatment(consultation_id, diagnosis)
+        if prefetched is not None:
+            yield {"event": "final", "data": prefetched}
+            return
+
+        prompt = self._build_treatment_prompt(diagnosis, pet_info)
+        result, repaired = None, False
+        async for event in self._stream_json(
+            TREATMENT_INSTRUCTIONS,
+            prompt,
+            2000,
+            TREATMENT_STREAM_FIELDS,
+            TreatmentResponse,
+            TREATMENT_FALLBACKS,
+            priority=self._urgency_priority(diagnosis.get("urgency_level")),
+        ):
+            if event["event"] == "final":
+                result, repaired = event["data"], event["repaired"]
+            else:
+                yield event
+
+        if result is None:
+            DEFAULT_RESPONSES.inc("treatment")
+            yield {"event": "final", "data": copy.deepcopy(DEFAULT_TREATMENT_RESPONSE)}
+            return
+
+        if cache_key and not repaired:
+            await self.cache.set(cache_key, result)
+        yield {"event": "final", "data": result}
+
+    @staticmethod
+    def _urgency_priority(urgency_level: Optional[str]) -> Priority:
+        """LLM priority for a consultation: live emergencies go first."""
+        priority = current_priority()
+        if urgency_level == "emergency" and priority != Priority.BULK:
+            return Priority.EMERGENCY
+        return priority
+
+    def _treatment_cache_key(
+        self, diagnosis: Dict[str, Any], pet_info: Optional[Dict[str, Any]]
+    ) -> Optional[str]:
+        """Cache key for a treatment request, or None if caching is off."""
+        if self.cache is None:
+            return None
+        return self.cache.make_key("treatment", {"diagnosis": diagnosis, "pet_info": pet_info})
+
+    def _build_treatment_prompt(
+        self, diagnosis: Dict[str, Any], pet_info: Optional[Dict[str, Any]]
+    ) -> str:
+        """Build the treatment protocol patient prompt (see TREATMENT_INSTRUCTIONS)."""
         pet_context = self._format_pet_info(pet_info) if pet_info else ""
 
         prompt = f"""Paciente: {pet_context}
 
 Diagnostico:
 - Principal: {diagnosis.get('primary', 'Nao especificado')}
-- Nivel de urgencia: {diagnosis.get('urgency_level', 'medium')}
+- Nivel de urgencia: {diagnosis.get('urgency_level', 'medium')}"""
 
-Forneca um protocolo de tratamento completo.
+        return prompt
 
-Responda EXATAMENTE neste formato JSON:
-{{
-    "medications": [
-        {{
-            "name": "nome do medicamento",
-            "dosage": "dosagem (ex: 10mg/kg)",
-            "route": "via de administracao (oral, topica, etc)",
-            "frequency": "frequencia (ex: a cada 12h)",
-            "duration": "duracao (ex: 7 dias)",
-            "instructions": "instrucoes especiais"
-        }}
-    ],
-    "supportive_care": [
-        "cuidado de suporte 1",
-        "cuidado de suporte 2"
-    ],
-    "monitoring": [
-        "o que monitorar 1",
-        "o que monitorar 2"
-    ],
-    "follow_up": "orientacao de acompanhamento",
-    "warnings": [
-        "alerta importante 1"
-    ]
-}}"""
+    async def _stream_json(
+        self,
+        instructions: str,
+        prompt: str,
+        max_tokens: int,
+        fields: Tuple[Path, ...],
+        response_model: Type[BaseModel],
+        defaults: Optional[Dict[str, Any]] = None,
+        priority: Optional[Priority] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a JSON completion, emitting watched fields as they complete.
 
+        The last event is `final` with the parsed result and whether it had
+        to be repaired; it is omitted if the completion failed or could not
+        be parsed.
+        """
+        parser = IncrementalJSONParser()
+        chunks: List[str] = []
         try:
-            response = await self.llm.complete(
+            async for delta in self.llm.stream(
                 prompt=prompt,
                 system_prompt=SYSTEM_PROMPT,
+                prompt_prefix=instructions,
                 temperature=0.3,
-                max_tokens=2000,
-            )
+                max_tokens=max_tokens,
+                priority=priority,
+            ):
+                chunks.append(delta)
+                for path, value in parser.feed(delta):
+                    if match_path(path, fields):
+                        yield {
+                            "event": "partial",
+                            "data": {"field": ".".join(str(p) for p in path), "value": value},
+                        }
 
-            result = self._parse_json_response(response)
-
-            logger.info(
-                f"Treatment protocol generated: {len(result.get('medications', []))} medications"
+            result, repaired = self._parse_json_response(
+                "".join(chunks), response_model, defaults
             )
-
-            return result
         except Exception as e:
-            logger.error(f"Error generating treatment: {e}")
-            return {
-                "medications": [],
-                "supportive_care": ["Manter hidratacao", "Repouso"],
-                "monitoring": ["Observar melhora dos sintomas"],
-                "follow_up": "Se nao houver melhora em 48-72h, procure um veterinario presencial.",
-                "warnings": ["Este protocolo nao substitui avaliacao veterinaria presencial."],
-            }
+            logger.error(f"Error in streamed analysis: {e}")
+            return
+
+        yield {"event": "final", "data": result, "repaired": repaired}
 
+    @traced("analyzer.analyze_image")
     async def analyze_image(
         self,
         image_url: str,
@@ -236,20 +967,33 @@ Responda em formato JSON:
     "urgency_level": "low|medium|high|emergency"
 }}"""
 
+        prepared = await self._prepare_image(image_url)
+        if prepared is not None and self.image_cache is not None:
+            hit = self.image_cache.lookup(prepared.hashes, context)
+            set_attributes(**{"cache.hit": hit is not None})
+            if hit is not None:
+                result, distance = hit
+                logger.info(f"Image analysis served from cache (distance={distance})")
+                return copy.deepcopy(result)
+
         try:
             response = await self.llm.analyze_with_vision(
-                image_url=image_url,
+                image_url=prepared.data_url if prepared is not None else image_url,
                 prompt=prompt,
                 system_prompt=SYSTEM_PROMPT,
             )
 
-            result = self._parse_json_response(response)
+            result, repaired = self._parse_json_response(response, ImageAnalysisResponse)
 
             logger.info(f"Image analysis completed: urgency={result.get('urgency_level')}")
 
+            if prepared is not None and self.image_cache is not None and not repaired:
+                await self.image_cache.add(prepared.hashes, context, result)
+
             return result
         except Exception as e:
             logger.error(f"Error analyzing image: {e}")
+            DEFAULT_RESPONSES.inc("image")
             return {
                 "findings": ["Nao foi possivel analisar a imagem automaticamente."],
                 "concerns": [],
@@ -257,6 +1001,26 @@ Responda em formato JSON:
                 "urgency_level": "low",
             }
 
+    async def _prepare_image(self, image_url: str) -> Optional[PreparedImage]:
+        """Downscale and hash the image; None means send the original URL."""
+        if self.image_preprocessor is None or image_url.startswith("data:"):
+            return None
+
+        try:
+            return await self.image_preprocessor.prepare(image_url)
+        except Exception as e:
+            logger.warning(f"Image preprocessing failed, sending original URL: {e}")
+            return None
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Return stats for every enabled cache."""
+        caches = {
+            "response": self.cache,
+            "semantic": self.semantic_cache,
+            "image": self.image_cache,
+        }
+        return {name: cache.stats() for name, cache in caches.items() if cache is not None}
+
     def _format_pet_info(self, pet_info: Dict[str, Any]) -> str:
         """Format pet information for prompt."""
         parts = []
@@ -288,24 +1052,57 @@ Responda em formato JSON:
 
         return "\n".join(parts) if parts else "Informacoes nao disponiveis"
 
-    def _parse_json_response(self, response: str) -> Dict[str, Any]:
-        """Parse JSON from LLM response."""
+    def _pet_scope(self, pet_info: Optional[Dict[str, Any]]) -> str:
+        """Species/age-band scope used to partition the semantic cache."""
+        if not pet_info:
+            return "unknown"
+
+        species = str(pet_info.get("species") or "unknown").lower()
+        age = pet_info.get("age")
+        if age is None:
+            band = "idade-desconhecida"
+        elif age < 1:
+            band = "filhote"
+        elif age < 8:
+            band = "adulto"
+        else:
+            band = "senior"
+
+        return f"{species}:{band}"
+
+    @traced("llm.parse")
+    def _parse_json_response(
+        self,
+        response: str,
+        response_model: Optional[Type[BaseModel]] = None,
+        defaults: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Parse JSON from LLM response.
+
+        Malformed or truncated JSON is repaired before giving up, and the
+        result is completed against `response_model` when one is given.
+
+        Returns:
+            (result, repaired): `repaired` is True when the JSON had to be
+            fixed or fields were filled in or dropped; such answers are
+            served but never cached
+        """
+        schema = response_model.__name__ if response_model is not None else "none"
+        set_attributes(**{"llm.schema": schema, "llm.response_chars": len(response)})
         try:
-            # Try to extract JSON from response
-            response = response.strip()
-
-            # Handle markdown code blocks
-            if "```json" in response:
-                start = response.find("```json") + 7
-                end = response.find("```", start)
-                response = response[start:end].strip()
-            elif "```" in response:
-                start = response.find("```") + 3
-                end = response.find("```", start)
-                response = response[start:end].strip()
-
-            return json.loads(response)
-        except json.JSONDecodeError as e:
+            result, repaired = repair.salvage(response)
+        except ValueError as e:
+            PARSE_FAILURES.inc(schema)
             logger.error(f"Failed to parse JSON response: {e}")
             logger.debug(f"Response was: {response}")
             raise
+
+        if not isinstance(result, dict):
+            PARSE_FAILURES.inc(schema)
+            raise ValueError(f"Expected a JSON object, got {type(result).__name__}")
+        if response_model is not None:
+            filled = repair.fill_missing(result, response_model, defaults)
+            repaired = repaired or filled != result
+            result = filled
+        return result, repaired
@@ -0,0 +1,94 @@
+"""
+Per-consultation state carried between clarifying rounds.
+
+After the first round of a consultation the service keeps the patient
+prompt it sent, the questions the tutor was shown and the last parsed
+analysis. Follow-up requests only carry the new answers; the stored prompt
+is replayed verbatim so providers can serve it from their prompt cache.
+"""
+import json
+import logging
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+from ..cache.backends import CacheBackend, MemoryBackend
+
+logger = logging.getLogger(__name__)
+
+
+class ConsultationNotFoundError(LookupError):
+    """Raised when a follow-up arrives for a consultation with no stored state."""
+
+
+@dataclass
+class ConsultationState:
+    """What a consultation has sent and been shown so far."""
+
+    symptoms: str
+    prompt: str  # first-round patient prompt, replayed as the cached prefix
+    pet_info: Optional[Dict[str, Any]] = None
+    questions: List[str] = field(default_factory=list)
+    answers: List[str] = field(default_factory=list)
+    result: Optional[Dict[str, Any]] = None
+
+
+class ConsultationStore:
+    """
+    Consultation state keyed by consultation id, with a TTL.
+
+    State is written to the shared backend (Redis in production) and to a
+    bounded in-process copy, which serves reads when the backend misses,
+    e.g. during a Redis outage.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[CacheBackend] = None,
+        ttl_seconds: int = 24 * 3600,
+        max_entries: int = 1024,
+        namespace: str = "petvet:consultation",
+    ):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.namespace = namespace
+        self._local = MemoryBackend(max_entries=max_entries)
+
+    def _key(self, consultation_id: str) -> str:
+        return f"{self.namespace}:{consultation_id}"
+
+    async def get(self, consultation_id: str) -> Optional[ConsultationState]:
+        """
+        Load the state of a consultation.
+
+        Args:
+            consultation_id: Consultation to load
+
+        Returns:
+            The stored state, or None if there is none (or it expired)
+        """
+        key = self._key(consultation_id)
+        raw = await self.backend.get(key) if self.backend is not None else None
+        if raw is None:
+            raw = await self._local.get(key)
+        if raw is None:
+            return None
+
+        try:
+            return ConsultationState(**json.loads(raw))
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Discarding unreadable state for consultation {consultation_id}: {e}")
+            return None
+
+    async def save(self, consultation_id: str, state: ConsultationState) -> None:
+        """
+        Store the state of a consultation, resetting its TTL.
+
+        Args:
+            consultation_id: Consultation to store
+            state: State after the latest round
+        """
+        key = self._key(consultation_id)
+        raw = json.dumps(asdict(state), ensure_ascii=False)
+        await self._local.set(key, raw, self.ttl_seconds)
+        if self.backend is not None:
+            await self.backend.set(key, raw, self.ttl_seconds)
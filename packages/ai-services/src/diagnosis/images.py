@@ -0,0 +1,237 @@
+"""
+Image preprocessing for vision analysis.
+
+Phone photos are fetched once with a size cap, decoded, EXIF-rotated,
+downscaled and re-encoded as a compact JPEG data URL, so the vision
+provider neither downloads nor tokenizes the full-resolution original.
+Decoding and resizing are CPU-bound and run in a bounded thread pool.
+Perceptual hashes are computed in the same pass for the image result cache.
+
+Image URLs come from callers, so only public http(s) addresses are fetched,
+checked again at every redirect, optionally limited to a host allowlist.
+"""
+import asyncio
+import base64
+import io
+import ipaddress
+import logging
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Optional, Sequence, Tuple
+
+import httpx
+from PIL import Image, ImageOps
+
+from ..cache.image_cache import ImageHashes
+
+logger = logging.getLogger(__name__)
+
+_HASH_SIZE = 8  # 8x8 comparisons -> 64-bit hashes
+MAX_REDIRECTS = 5
+
+
+def dhash(image: Image.Image) -> int:
+    """Difference hash: whether each pixel is brighter than its right neighbour."""
+    pixels = (
+        image.convert("L").resize((_HASH_SIZE + 1, _HASH_SIZE), Image.Resampling.BILINEAR).tobytes()
+    )
+    value = 0
+    for row in range(_HASH_SIZE):
+        offset = row * (_HASH_SIZE + 1)
+        for col in range(_HASH_SIZE):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def ahash(image: Image.Image) -> int:
+    """Average hash: whether each pixel is brighter than the mean."""
+    pixels = (
+        image.convert("L").resize((_HASH_SIZE, _HASH_SIZE), Image.Resampling.BILINEAR).tobytes()
+    )
+    mean = sum(pixels) / len(pixels)
+    value = 0
+    for pixel in pixels:
+        value = (value << 1) | (pixel > mean)
+    return value
+
+
+class ImageTooLargeError(ValueError):
+    """Raised when an image exceeds the download size cap."""
+
+
+class UnsafeImageURLError(ValueError):
+    """Raised when an image URL is not an allowed public http(s) address."""
+
+
+async def resolve_host(host: str, port: int) -> List[str]:
+    """Resolve a host name to its IP addresses without blocking the event loop."""
+    infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    return [info[4][0] for info in infos]
+
+
+def is_public_address(address: str) -> bool:
+    """Whether an IP address is globally routable (not private, loopback, link-local...)."""
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+@dataclass
+class PreparedImage:
+    """A preprocessed image ready for the vision model."""
+
+    data_url: str
+    hashes: ImageHashes
+
+
+class ImagePreprocessor:
+    """
+    Fetches and shrinks images before they are sent to a vision model.
+
+    Args:
+        max_edge: Longest side in pixels after downscaling
+        max_bytes: Download size cap
+        jpeg_quality: JPEG quality of the re-encoded image
+        max_workers: Threads for decoding and resizing
+        timeout_seconds: Download timeout
+        client: HTTP client to fetch with (it must not follow redirects itself)
+        allowed_hosts: If set, only these hosts and their subdomains are fetched
+        allow_private_networks: Also fetch from private and loopback addresses
+            (local benchmarks only)
+        resolve: Host name resolver, (host, port) -> IP addresses
+    """
+
+    def __init__(
+        self,
+        max_edge: int = 1024,
+        max_bytes: int = 10 * 1024 * 1024,
+        jpeg_quality: int = 85,
+        max_workers: int = 2,
+        timeout_seconds: float = 10.0,
+        client: Optional[httpx.AsyncClient] = None,
+        allowed_hosts: Sequence[str] = (),
+        allow_private_networks: bool = False,
+        resolve: Callable[[str, int], Awaitable[List[str]]] = resolve_host,
+    ):
+        self.max_edge = max_edge
+        self.max_bytes = max_bytes
+        self.jpeg_quality = jpeg_quality
+        self.allowed_hosts = [host.lower().strip(".") for host in allowed_hosts]
+        self.allow_private_networks = allow_private_networks
+        self._resolve = resolve
+        # Redirects are followed by fetch(), which checks every hop
+        self.client = client or httpx.AsyncClient(timeout=httpx.Timeout(timeout_seconds))
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="image-preprocess"
+        )
+
+    async def aclose(self) -> None:
+        """Close the HTTP client and stop the worker threads."""
+        await self.client.aclose()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def prepare(self, image_url: str) -> PreparedImage:
+        """
+        Fetch an image, downscale it to a JPEG data URL and hash it.
+
+        Args:
+            image_url: HTTP(S) URL of the image
+
+        Returns:
+            `data:image/jpeg;base64,...` URL and perceptual hashes
+
+        Raises:
+            UnsafeImageURLError: If the URL, or a redirect, is not an allowed public address
+            ImageTooLargeError: If the download exceeds the size cap
+            httpx.HTTPError: If the image cannot be fetched
+            PIL.UnidentifiedImageError: If the bytes are not an image
+        """
+        data = await self.fetch(image_url)
+        loop = asyncio.get_running_loop()
+        jpeg, hashes = await loop.run_in_executor(self._executor, self.shrink, data)
+        return PreparedImage(
+            data_url="data:image/jpeg;base64," + base64.b64encode(jpeg).decode("ascii"),
+            hashes=hashes,
+        )
+
+    async def fetch(self, image_url: str) -> bytes:
+        """Download an image, aborting as soon as it exceeds `max_bytes`."""
+        url = httpx.URL(image_url)
+        for _ in range(MAX_REDIRECTS + 1):
+            await self.check_url(url)
+            async with self.client.stream("GET", url) as response:
+                location = response.headers.get("location") if response.is_redirect else None
+                if location:
+                    url = url.join(location)
+                    continue
+                response.raise_for_status()
+
+                declared = response.headers.get("content-length")
+                if declared and declared.isdigit() and int(declared) > self.max_bytes:
+                    raise ImageTooLargeError(f"Image is {declared} bytes (max {self.max_bytes})")
+
+                buf = bytearray()
+                async for chunk in response.aiter_bytes():
+                    buf.extend(chunk)
+                    if len(buf) > self.max_bytes:
+                        raise ImageTooLargeError(f"Image exceeds {self.max_bytes} bytes")
+                return bytes(buf)
+        raise httpx.TooManyRedirects(f"More than {MAX_REDIRECTS} redirects for {image_url}")
+
+    async def check_url(self, url: httpx.URL) -> None:
+        """
+        Allow only http(s) URLs whose host is allowed and resolves to public addresses.
+
+        Raises:
+            UnsafeImageURLError: If the URL must not be fetched
+        """
+        if url.scheme not in ("http", "https") or not url.host:
+            raise UnsafeImageURLError(f"Image URL must be http(s): {url.scheme}:")
+        host = url.host.lower()
+        if self.allowed_hosts and not any(
+            host == allowed or host.endswith("." + allowed) for allowed in self.allowed_hosts
+        ):
+            raise UnsafeImageURLError(f"Image host is not allowed: {host}")
+        if self.allow_private_networks:
+            return
+
+        try:
+            addresses = [str(ipaddress.ip_address(host))]
+        except ValueError:
+            port = url.port or (443 if url.scheme == "https" else 80)
+            try:
+                addresses = await self._resolve(host, port)
+            except OSError as e:
+                raise UnsafeImageURLError(f"Cannot resolve image host {host}: {e}") from e
+        if not addresses or not all(is_public_address(a) for a in addresses):
+            raise UnsafeImageURLError(f"Image host {host} is not a public address")
+
+    def shrink(self, data: bytes) -> Tuple[bytes, ImageHashes]:
+        """
+        Decode, orient, downscale and re-encode an image as JPEG, and hash it.
+
+        Runs in a worker thread.
+        """
+        with Image.open(io.BytesIO(data)) as image:
+            # Let the JPEG decoder skip detail we would throw away anyway
+            image.draft("RGB", (self.max_edge, self.max_edge))
+            image = ImageOps.exif_transpose(image)
+
+            if image.mode in ("RGBA", "LA", "P"):
+                image = image.convert("RGBA")
+                background = Image.new("RGB", image.size, (255, 255, 255))
+                background.paste(image, mask=image.getchannel("A"))
+                image = background
+            elif image.mode != "RGB":
+                image = image.convert("RGB")
+
+            image.thumbnail((self.max_edge, self.max_edge), Image.Resampling.LANCZOS)
+            hashes = ImageHashes(dhash=dhash(image), ahash=ahash(image))
+
+            out = io.BytesIO()
+            image.save(out, format="JPEG", quality=self.jpeg_quality, optimize=True)
+
+        logger.debug(f"Image preprocessed: {len(data)} -> {out.tell()} bytes, {image.size}")
+        return out.getvalue(), hashes
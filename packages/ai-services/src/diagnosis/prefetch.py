@@ -0,0 +1,152 @@
+"""
+Speculative treatment-protocol prefetch.
+
+The WhatsApp flow asks for a treatment protocol right after it receives a
+diagnosis, so the analyzer starts generating it as soon as the diagnosis is
+known. A later treatment request for the same consultation and diagnosis
+picks up the running (or finished) call instead of starting a new one.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Prefetch:
+    """A prefetched call and when it stops being usable."""
+
+    task: asyncio.Task
+    expires_at: float
+
+
+class TreatmentPrefetcher:
+    """
+    Registry of speculative treatment calls keyed by consultation and diagnosis.
+
+    Entries expire `ttl_seconds` after they start; an expired call that is
+    still running is cancelled. At most `max_pending` entries are held; when
+    the registry is full the oldest finished entry makes room, or the oldest
+    entry if none has finished. A prefetch that fails is dropped so the
+    caller falls back to a normal call.
+    """
+
+    def __init__(self, ttl_seconds: float = 300.0, max_pending: int = 256):
+        self.ttl_seconds = ttl_seconds
+        self.max_pending = max_pending
+        self._entries: "OrderedDict[str, _Prefetch]" = OrderedDict()
+        self._stats = {
+            "started": 0,
+            "evicted": 0,
+            "served_pending": 0,
+            "served_ready": 0,
+            "misses": 0,
+            "failed": 0,
+            "expired": 0,
+        }
+
+    def start(self, key: str, call: Callable[[], Awaitable[Dict[str, Any]]]) -> bool:
+        """
+        Start a prefetch unless one is already held for the key.
+
+        Args:
+            key: Consultation and diagnosis key
+            call: Makes the treatment call
+
+        Returns:
+            Whether a new prefetch was started
+        """
+        self._sweep()
+        if key in self._entries:
+            return False
+        if self.max_pending <= 0:
+            return False
+        if len(self._entries) >= self.max_pending:
+            self._evict()
+
+        task = asyncio.create_task(call())
+        task.add_done_callback(self._retrieve_exception)
+        self._entries[key] = _Prefetch(task, time.monotonic() + self.ttl_seconds)
+        self._stats["started"] += 1
+        return True
+
+    async def take(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the prefetched result for the key, waiting for it if needed.
+
+        The entry is consumed on success. Cancelling the caller does not
+        cancel the prefetch, which stays available for a retried request.
+
+        Args:
+            key: Consultation and diagnosis key
+
+        Returns:
+            The treatment protocol, or None if there is no usable prefetch
+        """
+        self._sweep()
+        entry = self._entries.get(key)
+        if entry is None:
+            self._stats["misses"] += 1
+            return None
+
+        ready = entry.task.done()
+        try:
+            result = await asyncio.shield(entry.task)
+        except asyncio.CancelledError:
+            if not entry.task.cancelled():
+                raise  # the caller was cancelled, not the prefetch
+            self._entries.pop(key, None)
+            self._stats["misses"] += 1
+            return None
+        except Exception as e:
+            logger.info(f"Treatment prefetch failed, generating again: {e}")
+            self._entries.pop(key, None)
+            self._stats["failed"] += 1
+            return None
+
+        self._entries.pop(key, None)
+        self._stats["served_ready" if ready else "served_pending"] += 1
+        return result
+
+    def _sweep(self) -> None:
+        """Drop expired entries, cancelling calls that are still running."""
+        now = time.monotonic()
+        # Entries are in start order, so expiry order too
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry.expires_at > now:
+                break
+            del self._entries[key]
+            entry.task.cancel()
+            self._stats["expired"] += 1
+
+    def _evict(self) -> None:
+        """Drop the oldest finished entry, or the oldest entry if all are running."""
+        key = next(
+            (k for k, entry in self._entries.items() if entry.task.done()),
+            next(iter(self._entries)),
+        )
+        self._entries.pop(key).task.cancel()
+        self._stats["evicted"] += 1
+
+    @staticmethod
+    def _retrieve_exception(task: asyncio.Task) -> None:
+        """Mark failures as seen; unconsumed prefetches may fail unobserved."""
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return prefetch counters and the number of held entries."""
+        return {**self._stats, "pending": len(self._entries)}
+
+    async def aclose(self) -> None:
+        """Cancel all held prefetches."""
+        tasks = [entry.task for entry in self._entries.values()]
+        self._entries.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,77 @@
+"""
+Response models for veterinary analyses.
+
+These models are both the API response schemas and the structured-output
+schemas the LLM is asked to fill in, except SymptomAnalysisResult, which
+adds fields the service computes itself.
+"""
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class Differential(BaseModel):
+    """Differential diagnosis."""
+
+    condition: str
+    probability: int
+
+
+class Diagnosis(BaseModel):
+    """Diagnosis result."""
+
+    primary: str
+    differentials: List[Differential]
+    urgency_level: str
+
+
+class SymptomAnalysisResponse(BaseModel):
+    """Response for symptom analysis."""
+
+    needs_clarification: bool
+    clarifying_questions: Optional[List[str]] = None
+    diagnosis: Optional[Diagnosis] = None
+    confidence: Optional[float] = None
+
+
+class TriageSignal(BaseModel):
+    """Red flags found by the local triage before the LLM answered."""
+
+    urgency_level: Optional[str] = None
+    red_flags: List[str]
+
+
+class SymptomAnalysisResult(SymptomAnalysisResponse):
+    """Symptom analysis as returned by the API, with the local triage signal."""
+
+    triage: Optional[TriageSignal] = None
+
+
+class Medication(BaseModel):
+    """Medication in treatment protocol."""
+
+    name: str
+    dosage: str
+    route: str
+    frequency: str
+    duration: str
+    instructions: Optional[str] = None
+
+
+class TreatmentResponse(BaseModel):
+    """Treatment protocol response."""
+
+    medications: List[Medication]
+    supportive_care: List[str]
+    monitoring: List[str]
+    follow_up: str
+    warnings: Optional[List[str]] = None
+
+
+class ImageAnalysisResponse(BaseModel):
+    """Response for image analysis."""
+
+    findings: List[str]
+    concerns: List[str]
+    recommendations: List[str]
+    urgency_level: str
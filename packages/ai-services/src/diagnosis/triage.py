@@ -0,0 +1,305 @@
+"""
+Local red-flag triage that runs before any LLM call.
+
+Portuguese red-flag phrases are compiled once into a token trie, the same
+way as the intent keywords, so checking a description is a single pass over
+its tokens and takes microseconds. A hit flags the consultation as a
+suspected emergency long before the model has written `urgency_level`.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..nlp.intent import normalize, tokenize
+
+URGENCY_ORDER = {"high": 1, "emergency": 2}
+
+# Words that negate a red flag appearing right after them ("nao teve convulsao")
+NEGATIONS = frozenset({"nao", "sem", "nunca", "nem"})
+_NEGATION_WINDOW = 2  # tokens looked at before a match
+
+SPECIES_ALIASES = {
+    "dog": "dog",
+    "cachorro": "dog",
+    "cadela": "dog",
+    "cao": "dog",
+    "canino": "dog",
+    "cat": "cat",
+    "gato": "cat",
+    "gata": "cat",
+    "felino": "cat",
+}
+
+
+@dataclass(frozen=True)
+class RedFlag:
+    """A red-flag sign, its urgency and any species-specific urgency."""
+
+    urgency: str
+    patterns: Tuple[str, ...]
+    species_urgency: Dict[str, str] = field(default_factory=dict)
+
+
+# A trailing "*" on any word matches words starting with the prefix.
+RED_FLAGS: Dict[str, RedFlag] = {
+    "convulsao": RedFlag("emergency", ("convuls*", "epilep*", "se debatendo")),
+    "dificuldade_respiratoria": RedFlag(
+        "emergency",
+        (
+            "dificuldade para respirar",
+            "dificuldade pra respirar",
+            "dificuldade de respirar",
+            "dificuldade respiratoria",
+            "nao consegue respirar",
+            "nao esta respirando",
+            "falta de ar",
+            "sufoc*",
+            "engasg*",
+            "respirando com a boca aberta",
+            "respirando de boca aberta",
+        ),
+    ),
+    "obstrucao_urinaria": RedFlag(
+        "high",
+        (
+            "nao urin*",
+            "nao consegue urinar",
+            "nao consegue fazer xixi",
+            "nao faz xixi",
+            "nao esta fazendo xixi",
+            "sem urinar",
+            "sem fazer xixi",
+            "forc* para urinar",
+            "forc* pra urinar",
+            "forc* para fazer xixi",
+            "forc* pra fazer xixi",
+        ),
+        {"cat": "emergency"},
+    ),
+    "intoxicacao": RedFlag(
+        "emergency",
+        (
+            "envenen*",
+            "intoxic*",
+            "veneno",
+            "chumbinho",
+            "raticida",
+            "xilitol",
+            "comeu chocolate",
+            "ingeriu chocolate",
+            "comeu uva*",
+            "comeu remedio",
+            "ingeriu remedio",
+        ),
+    ),
+    "trauma": RedFlag(
+        "emergency",
+        ("atropel*", "caiu da janela", "caiu do predio", "queda de altura", "osso exposto"),
+    ),
+    "hemorragia": RedFlag(
+        "emergency",
+        (
+            "hemorrag*",
+            "sangrando muito",
+            "sangramento intenso",
+            "sangra sem parar",
+            "sangrando sem parar",
+            "muito sangue",
+        ),
+    ),
+    "distensao_abdominal": RedFlag(
+        "high",
+        (
+            "barriga inchada",
+            "barriga dura",
+            "barriga distendida",
+            "abdomen inchado",
+            "abdomen distendido",
+            "tenta vomitar sem",
+            "tentando vomitar sem",
+        ),
+        {"dog": "emergency"},
+    ),
+    "inconsciencia": RedFlag(
+        "emergency",
+        ("desmai*", "inconsciente", "desacordado", "nao responde", "nao acorda", "colaps*"),
+    ),
+    "mucosas_alteradas": RedFlag(
+        "emergency",
+        (
+            "gengiva* roxa*",
+            "gengiva* azul*",
+            "gengiva* branca*",
+            "gengiva* palida*",
+            "gengiva* esta* roxa*",
+            "gengiva* esta* azul*",
+            "gengiva* esta* branca*",
+            "gengiva* esta* palida*",
+            "lingua roxa",
+            "lingua azul*",
+            "cianose",
+        ),
+    ),
+    "parto_complicado": RedFlag(
+        "emergency",
+        ("filhote preso", "filhote entalado", "parto travado", "parto complicado"),
+    ),
+    "hipertermia": RedFlag("emergency", ("insolacao", "hipertermia", "febre muito alta")),
+    "animal_peconhento": RedFlag(
+        "emergency",
+        (
+            "picad* de cobra",
+            "picad* de escorpiao",
+            "mordid* de cobra",
+            "mordid* por cobra",
+            "mordeu um sapo",
+            "mordeu sapo",
+            "lambeu um sapo",
+            "lambeu sapo",
+        ),
+    ),
+    "proptose_ocular": RedFlag("emergency", ("olho saltado", "olho para fora", "olho pra fora")),
+    "paralisia": RedFlag(
+        "high",
+        (
+            "paralis*",
+            "paralitic*",
+            "nao mexe as patas",
+            "arrastando as patas",
+            "nao consegue andar",
+            "nao consegue levantar",
+            "nao se levanta",
+        ),
+    ),
+    "sangue_no_vomito_ou_fezes": RedFlag(
+        "high",
+        (
+            "vomit* sangue",
+            "vomit* com sangue",
+            "fezes com sangue",
+            "coco com sangue",
+            "diarreia com sangue",
+        ),
+    ),
+    "queimadura": RedFlag("high", ("queimad*",)),
+}
+
+_HITS = "\0"  # trie key holding the (label, negatable) payloads
+_PREFIXES = "\1"  # trie key holding {first char: [(prefix, child node)]} edges
+
+
+@dataclass
+class TriageResult:
+    """Red flags found in a description and the urgency they imply."""
+
+    urgency_level: Optional[str] = None
+    red_flags: List[str] = field(default_factory=list)
+    matches: List[str] = field(default_factory=list)
+
+    @property
+    def is_emergency(self) -> bool:
+        return self.urgency_level == "emergency"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"urgency_level": self.urgency_level, "red_flags": list(self.red_flags)}
+
+
+def normalize_species(species: Optional[str]) -> Optional[str]:
+    """Map a free-text species ("Cão", "felino", "dog") to dog/cat, if known."""
+    if not species:
+        return None
+    return SPECIES_ALIASES.get(normalize(species).strip())
+
+
+class TriageEngine:
+    """
+    Precompiled red-flag matcher.
+
+    A flag matches unless one of the two words before it is a negation
+    ("nao", "sem", ...); phrases that start with a negation, like
+    "nao urina", are red flags in their own right. When the species is
+    unknown, species-specific urgencies apply as the most severe case.
+    """
+
+    def __init__(self, red_flags: Optional[Dict[str, RedFlag]] = None):
+        self.red_flags = red_flags or RED_FLAGS
+        self._trie: Dict[str, Any] = {}
+        for label, flag in self.red_flags.items():
+            for pattern in flag.patterns:
+                self._add(label, pattern)
+
+    def _add(self, label: str, pattern: str) -> None:
+        words = normalize(pattern).split()
+        node = self._trie
+        for word in words:
+            if word.endswith("*"):
+                edges = node.setdefault(_PREFIXES, {}).setdefault(word[0], [])
+                child = next((n for p, n in edges if p == word[:-1]), None)
+                if child is None:
+                    child = {}
+                    edges.append((word[:-1], child))
+                node = child
+            else:
+                node = node.setdefault(word, {})
+        node.setdefault(_HITS, []).append((label, words[0] not in NEGATIONS))
+
+    def _match(self, tokens: List[str]) -> List[Tuple[str, int, int]]:
+        """All (label, start, end) hits, ignoring negated ones."""
+        hits: List[Tuple[str, int, int]] = []
+        for start in range(len(tokens)):
+            frontier = [self._trie]
+            end = start
+            while frontier and end < len(tokens):
+                token = tokens[end]
+                end += 1
+                advanced = []
+                for node in frontier:
+                    child = node.get(token)
+                    if child is not None:
+                        advanced.append(child)
+                    prefixes = node.get(_PREFIXES)
+                    if prefixes is not None:
+                        for prefix, child in prefixes.get(token[0], ()):
+                            if token.startswith(prefix):
+                                advanced.append(child)
+                for node in advanced:
+                    for label, negatable in node.get(_HITS, ()):
+                        if negatable and NEGATIONS.intersection(
+                            tokens[max(0, start - _NEGATION_WINDOW) : start]
+                        ):
+                            continue
+                        hits.append((label, start, end))
+                frontier = advanced
+        return hits
+
+    def _urgency(self, flag: RedFlag, species: Optional[str]) -> str:
+        if species is not None:
+            return flag.species_urgency.get(species, flag.urgency)
+        return max((flag.urgency, *flag.species_urgency.values()), key=lambda u: URGENCY_ORDER[u])
+
+    def assess(self, text: str, species: Optional[str] = None) -> TriageResult:
+        """
+        Check a description for red flags.
+
+        Args:
+            text: Symptoms (and any clarifying answers) in free text
+            species: Pet species, in English or Portuguese
+
+        Returns:
+            Red flags found and the highest urgency they imply
+        """
+        tokens = tokenize(text)
+        species = normalize_species(species)
+        result = TriageResult()
+
+        for label, start, end in self._match(tokens):
+            phrase = " ".join(tokens[start:end])
+            if phrase not in result.matches:
+                result.matches.append(phrase)
+            if label in result.red_flags:
+                continue
+            result.red_flags.append(label)
+            urgency = self._urgency(self.red_flags[label], species)
+            if URGENCY_ORDER[urgency] > URGENCY_ORDER.get(result.urgency_level or "", 0):
+                result.urgency_level = urgency
+
+        return result
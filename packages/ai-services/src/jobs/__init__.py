@@ -0,0 +1 @@
+"""Bulk diagnosis jobs for PetVet AI Services."""
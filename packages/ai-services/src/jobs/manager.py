@@ -0,0 +1,157 @@
+"""
+Bulk diagnosis jobs processed by a bounded background worker pool.
+"""
+import asyncio
+import logging
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from ..diagnosis.analyzer import VeterinaryAnalyzer
+from ..llm.ratelimit import Priority, llm_priority
+from ..telemetry.tracing import tracer
+from .store import JobStore
+
+logger = logging.getLogger(__name__)
+
+
+class InteractiveLoad:
+    """
+    Counts in-flight interactive requests so bulk work can yield to them.
+    """
+
+    def __init__(self):
+        self.in_flight = 0
+        self._changed = asyncio.Condition()
+
+    @asynccontextmanager
+    async def track(self) -> AsyncIterator[None]:
+        """Mark an interactive request as in flight for the duration of the block."""
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            async with self._changed:
+                self._changed.notify_all()
+
+    async def wait_below(self, limit: int) -> None:
+        """Wait until fewer than `limit` interactive requests are in flight."""
+        if self.in_flight < limit:
+            return
+        async with self._changed:
+            await self._changed.wait_for(lambda: self.in_flight < limit)
+
+
+class BulkJobManager:
+    """
+    Accepts batches of symptom analyses and runs them in the background.
+
+    At most `concurrency` items are analyzed at once, and workers pause while
+    `yield_threshold` or more interactive requests are in flight, so bulk QA
+    runs never crowd out live consultations.
+    """
+
+    def __init__(
+        self,
+        analyzer: VeterinaryAnalyzer,
+        store: JobStore,
+        concurrency: int = 4,
+        load: Optional[InteractiveLoad] = None,
+        yield_threshold: int = 8,
+        poll_seconds: float = 1.0,
+    ):
+        self.analyzer = analyzer
+        self.store = store
+        self.concurrency = concurrency
+        self.load = load or InteractiveLoad()
+        self.yield_threshold = yield_threshold
+        self.poll_seconds = poll_seconds
+        self._workers: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        """Start the worker pool."""
+        if self._workers:
+            return
+        self._workers = [
+            asyncio.create_task(self._work(i), name=f"bulk-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+        logger.info(f"Started {self.concurrency} bulk diagnosis workers")
+
+    async def aclose(self) -> None:
+        """Stop the workers and close the store."""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        await self.store.close()
+
+    async def submit(
+        self, items: List[Dict[str, Any]], meta: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Queue a batch of symptom analysis requests.
+
+        Args:
+            items: Validated SymptomAnalysisRequest payloads
+            meta: Free-form job metadata (e.g. the submitting clinic)
+
+        Returns:
+            The new job id
+        """
+        job_id = uuid.uuid4().hex
+        await self.store.create(job_id, len(items), meta or {})
+        await self.store.enqueue(job_id, items)
+        logger.info(f"Queued bulk job {job_id} with {len(items)} items")
+        return job_id
+
+    async def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return job status and progress, or None if the job is unknown."""
+        job = await self.store.get(job_id)
+        if job is None:
+            return None
+        done = job["completed"] + job["failed"]
+        job["progress"] = round(done / job["total"], 4) if job["total"] else 1.0
+        return job
+
+    async def results(
+        self, job_id: str, offset: int = 0, limit: int = 1000
+    ) -> List[Dict[str, Any]]:
+        """Return result lines in completion order."""
+        return await self.store.results(job_id, offset, limit)
+
+    async def _work(self, worker_id: int) -> None:
+        while True:
+            try:
+                queued = await self.store.dequeue(self.poll_seconds)
+                if queued is None:
+                    continue
+                await self.load.wait_below(self.yield_threshold)
+                await self._process(*queued)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Bulk worker {worker_id} error: {e}")
+                await asyncio.sleep(self.poll_seconds)
+
+    async def _process(self, job_id: str, index: int, payload: Dict[str, Any]) -> None:
+        line: Dict[str, Any] = {"index": index, "consultation_id": payload.get("consultation_id")}
+        try:
+            with llm_priority(Priority.BULK), tracer.span(
+                "jobs.process_item", **{"job.id": job_id, "job.index": index}
+            ):
+                line["result"] = await self.analyzer.analyze_symptoms(
+                    symptoms=payload["symptoms"],
+                    pet_info=payload.get("pet_info"),
+                    clarifying_answers=payload.get("clarifying_answers"),
+                    # A canned default is not a result; record the item as failed
+                    fallback=False,
+                )
+            failed = False
+        except Exception as e:
+            logger.error(f"Bulk job {job_id} item {index} failed: {e}")
+            line["error"] = str(e)
+            failed = True
+
+        await self.store.record(job_id, line, failed)
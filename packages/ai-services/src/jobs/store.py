@@ -0,0 +1,204 @@
+"""
+Queue and result storage for bulk diagnosis jobs.
+
+Redis is the production store, so queued items survive restarts and any
+replica's workers can pick them up. The in-memory store is used in tests
+and single-process deployments.
+"""
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional, Protocol, Tuple
+
+from redis.asyncio import Redis
+
+# A queued unit of work: (job_id, item index, request payload)
+QueueItem = Tuple[str, int, Dict[str, Any]]
+
+
+class JobStore(Protocol):
+    """Storage interface used by the bulk job manager."""
+
+    async def create(self, job_id: str, total: int, meta: Dict[str, Any]) -> None:
+        ...
+
+    async def enqueue(self, job_id: str, items: List[Dict[str, Any]]) -> None:
+        ...
+
+    async def dequeue(self, timeout: float) -> Optional[QueueItem]:
+        ...
+
+    async def record(self, job_id: str, line: Dict[str, Any], failed: bool) -> None:
+        ...
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    async def results(self, job_id: str, offset: int, limit: int) -> List[Dict[str, Any]]:
+        ...
+
+    async def close(self) -> None:
+        ...
+
+
+def _new_job(job_id: str, total: int, meta: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "job_id": job_id,
+        "status": "queued",
+        "total": total,
+        "completed": 0,
+        "failed": 0,
+        "created_at": time.time(),
+        "finished_at": None,
+        "meta": meta,
+    }
+
+
+class MemoryJobStore:
+    """
+    In-process job store backed by an asyncio queue.
+    """
+
+    def __init__(self):
+        self._queue: "asyncio.Queue[QueueItem]" = asyncio.Queue()
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._results: Dict[str, List[Dict[str, Any]]] = {}
+
+    async def create(self, job_id: str, total: int, meta: Dict[str, Any]) -> None:
+        self._jobs[job_id] = _new_job(job_id, total, meta)
+        self._results[job_id] = []
+
+    async def enqueue(self, job_id: str, items: List[Dict[str, Any]]) -> None:
+        for index, payload in enumerate(items):
+            self._queue.put_nowait((job_id, index, payload))
+
+    async def dequeue(self, timeout: float) -> Optional[QueueItem]:
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def record(self, job_id: str, line: Dict[str, Any], failed: bool) -> None:
+        job = self._jobs[job_id]
+        self._results[job_id].append(line)
+        job["failed" if failed else "completed"] += 1
+        job["status"] = "running"
+        if job["completed"] + job["failed"] >= job["total"]:
+            job["status"] = "completed"
+            job["finished_at"] = time.time()
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(job_id)
+        return dict(job) if job is not None else None
+
+    async def results(self, job_id: str, offset: int, limit: int) -> List[Dict[str, Any]]:
+        return self._results.get(job_id, [])[offset : offset + limit]
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisJobStore:
+    """
+    Redis job store.
+
+    Keys:
+        {ns}:queue            list of queued items (RPUSH / BLPOP)
+        {ns}:{id}             hash with job status and counters
+        {ns}:{id}:results     list of result lines in completion order
+
+    An item taken by a worker that then dies is not re-queued.
+    """
+
+    def __init__(
+        self,
+        redis_url: str,
+        ttl_seconds: int = 7 * 24 * 3600,
+        namespace: str = "petvet:jobs",
+        client: Optional[Redis] = None,
+    ):
+        self.client = client or Redis.from_url(redis_url, decode_responses=True)
+        self.ttl_seconds = ttl_seconds
+        self.namespace = namespace
+
+    def _key(self, job_id: str, suffix: str = "") -> str:
+        return f"{self.namespace}:{job_id}{suffix}"
+
+    async def create(self, job_id: str, total: int, meta: Dict[str, Any]) -> None:
+        job = _new_job(job_id, total, meta)
+        job["meta"] = json.dumps(meta)
+        job["finished_at"] = ""
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hset(self._key(job_id), mapping=job)
+            pipe.expire(self._key(job_id), self.ttl_seconds)
+            await pipe.execute()
+
+    async def enqueue(self, job_id: str, items: List[Dict[str, Any]]) -> None:
+        lines = [
+            json.dumps([job_id, index, payload], ensure_ascii=False)
+            for index, payload in enumerate(items)
+        ]
+        for start in range(0, len(lines), 500):
+            await self.client.rpush(f"{self.namespace}:queue", *lines[start : start + 500])
+
+    async def dequeue(self, timeout: float) -> Optional[QueueItem]:
+        popped = await self.client.blpop([f"{self.namespace}:queue"], timeout=max(1, int(timeout)))
+        if popped is None:
+            return None
+        job_id, index, payload = json.loads(popped[1])
+        return job_id, index, payload
+
+    async def record(self, job_id: str, line: Dict[str, Any], failed: bool) -> None:
+        key = self._key(job_id)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.rpush(self._key(job_id, ":results"), json.dumps(line, ensure_ascii=False))
+            pipe.expire(self._key(job_id, ":results"), self.ttl_seconds)
+            pipe.hincrby(key, "failed" if failed else "completed", 1)
+            pipe.hset(key, "status", "running")
+            pipe.hmget(key, "total", "completed", "failed")
+            *_, counts = await pipe.execute()
+
+        total, completed, failed_count = (int(c or 0) for c in counts)
+        if completed + failed_count >= total:
+            await self.client.hset(key, mapping={"status": "completed", "finished_at": time.time()})
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raw = await self.client.hgetall(self._key(job_id))
+        if not raw:
+            return None
+        return {
+            "job_id": job_id,
+            "status": raw["status"],
+            "total": int(raw["total"]),
+            "completed": int(raw["completed"]),
+            "failed": int(raw["failed"]),
+            "created_at": float(raw["created_at"]),
+            "finished_at": float(raw["finished_at"]) if raw.get("finished_at") else None,
+            "meta": json.loads(raw.get("meta") or "{}"),
+        }
+
+    async def results(self, job_id: str, offset: int, limit: int) -> List[Dict[str, Any]]:
+        lines = await self.client.lrange(self._key(job_id, ":results"), offset, offset + limit - 1)
+        return [json.loads(line) for line in lines]
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+def create_job_store(kind: str, redis_url: str, ttl_seconds: int) -> JobStore:
+    """
+    Create a job store by name.
+
+    Args:
+        kind: Store name (redis or memory)
+        redis_url: Redis connection URL, used by the redis store
+        ttl_seconds: How long job status and results are kept
+
+    Returns:
+        Configured store
+    """
+    if kind == "redis":
+        return RedisJobStore(redis_url, ttl_seconds=ttl_seconds)
+    if kind == "memory":
+        return MemoryJobStore()
+    raise ValueError(f"Unknown job store: {kind}")
@@ -0,0 +1,120 @@
+"""
+Two-tier model cascade: answer with the fast model, escalate when needed.
+"""
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ModelCascade:
+    """
+    Runs a call on the fast model tier and repeats it on the large tier when
+    the fast call fails or `escalate` returns a reason to distrust its answer.
+
+    Callers can skip the fast tier for requests it would be escalated from
+    anyway (e.g. suspected emergencies), which saves the wasted round trip.
+    Tier, escalation reason and latency are logged per request and counted
+    per kind of call.
+    """
+
+    def __init__(self, confidence_threshold: float = 0.7):
+        self.confidence_threshold = confidence_threshold
+        self._stats: Dict[str, Dict[str, Any]] = {}
+
+    async def run(
+        self,
+        kind: str,
+        call: Callable[[str], Awaitable[T]],
+        escalate: Callable[[T], Optional[str]],
+        skip_reason: Optional[str] = None,
+    ) -> T:
+        """
+        Get an answer, trying the fast tier first.
+
+        Args:
+            kind: Name of the call for logs and stats (e.g. symptoms)
+            call: Makes the call on the given tier ("fast" or "large")
+            escalate: Returns why a fast answer is not good enough, or None
+            skip_reason: If set, go straight to the large tier for this reason
+
+        Returns:
+            The accepted answer
+        """
+        start = time.perf_counter()
+        reason = skip_reason
+        if reason is None:
+            try:
+                answer = await call("fast")
+                reason = escalate(answer)
+            except Exception as e:
+                logger.info(f"Fast-tier {kind} call failed, escalating: {e}")
+                reason = "fast_failed"
+            if reason is None:
+                self._record(kind, "fast", None, skipped=False, start=start)
+                return answer
+
+        answer = await call("large")
+        self._record(kind, "large", reason, skipped=skip_reason is not None, start=start)
+        return answer
+
+    def _record(
+        self, kind: str, tier: str, reason: Optional[str], skipped: bool, start: float
+    ) -> None:
+        latency_ms = (time.perf_counter() - start) * 1000
+        stats = self._stats.setdefault(
+            kind,
+            {
+                "requests": 0,
+                "fast_answers": 0,
+                "escalations": 0,
+                "direct_to_large": 0,
+                "reasons": {},
+                "latency_ms_total": {"fast": 0.0, "large": 0.0},
+            },
+        )
+        stats["requests"] += 1
+        stats["latency_ms_total"][tier] += latency_ms
+        if tier == "fast":
+            stats["fast_answers"] += 1
+        elif skipped:
+            stats["direct_to_large"] += 1
+        else:
+            stats["escalations"] += 1
+        if reason is not None:
+            stats["reasons"][reason] = stats["reasons"].get(reason, 0) + 1
+
+        logger.info(
+            f"Cascade {kind}: tier={tier} reason={reason or '-'} latency_ms={latency_ms:.0f} "
+            f"escalation_rate={self._escalation_rate(stats):.2f}"
+        )
+
+    @staticmethod
+    def _escalation_rate(stats: Dict[str, Any]) -> float:
+        tried_fast = stats["fast_answers"] + stats["escalations"]
+        return stats["escalations"] / tried_fast if tried_fast else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return per-kind counters, escalation rate and mean latency per tier."""
+        report: Dict[str, Any] = {}
+        for kind, stats in self._stats.items():
+            answered = {
+                "fast": stats["fast_answers"],
+                "large": stats["escalations"] + stats["direct_to_large"],
+            }
+            report[kind] = {
+                "requests": stats["requests"],
+                "fast_answers": stats["fast_answers"],
+                "escalations": stats["escalations"],
+                "direct_to_large": stats["direct_to_large"],
+                "escalation_rate": round(self._escalation_rate(stats), 4),
+                "reasons": dict(stats["reasons"]),
+                "mean_latency_ms": {
+                    tier: round(stats["latency_ms_total"][tier] / n, 1) if n else None
+                    for tier, n in answered.items()
+                },
+            }
+        return report
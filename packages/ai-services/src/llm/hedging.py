@@ -0,0 +1,173 @@
+"""
+Request hedging support: latency percentiles and a hedge budget.
+"""
+import asyncio
+import logging
+import math
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class LatencyWindow:
+    """
+    Sliding window of recent successful call latencies for one provider.
+    """
+
+    def __init__(self, size: int = 200):
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Return the q-th percentile (0-1) or None without samples."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))
+        return ordered[index]
+
+
+class HedgeBudget:
+    """
+    Caps hedges to a fraction of traffic.
+
+    Every call earns `ratio` tokens and every hedge spends one, so over time
+    at most `ratio` of calls are hedged. `burst` bounds how many hedges can
+    be fired back-to-back after a quiet period.
+    """
+
+    def __init__(self, ratio: float = 0.1, burst: float = 5.0):
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens = burst
+
+    def earn(self) -> None:
+        self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return True
+        return False
+
+
+class Hedger:
+    """
+    Races a primary call against a delayed secondary call.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        initial_delay: float = 8.0,
+        min_delay: float = 1.0,
+        max_delay: float = 20.0,
+        min_samples: int = 20,
+        budget: Optional[HedgeBudget] = None,
+    ):
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self.budget = budget or HedgeBudget()
+        self.windows: Dict[str, LatencyWindow] = {}
+
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.budget_denied = 0
+
+    def record_latency(self, provider: str, seconds: float) -> None:
+        """Record a successful call latency."""
+        self.windows.setdefault(provider, LatencyWindow()).record(seconds)
+
+    def delay_for(self, provider: str) -> float:
+        """Delay before hedging a call to `provider`."""
+        window = self.windows.get(provider)
+        if window is None or len(window) < self.min_samples:
+            return self.initial_delay
+        return min(self.max_delay, max(self.min_delay, window.percentile(self.percentile)))
+
+    async def run(
+        self,
+        primary_name: str,
+        primary: Callable[[], Awaitable[T]],
+        secondary: Callable[[], Awaitable[T]],
+        is_valid: Callable[[T], bool] = bool,
+        on_failover: Optional[Callable[[], None]] = None,
+    ) -> T:
+        """
+        Run `primary`, hedging with `secondary` if it is slow or fails.
+
+        A primary failure starts the secondary immediately (no budget spent);
+        a primary that is merely slow is hedged only if the budget allows,
+        otherwise it is awaited alone.
+        The first valid result wins and the other call is cancelled.
+        `on_failover` is called when the secondary starts because the
+        primary failed.
+
+        Returns:
+            First valid result
+
+        Raises:
+            The last error if every started call failed
+        """
+        self.calls += 1
+        self.budget.earn()
+
+        primary_task = asyncio.create_task(primary())
+        tasks = {primary_task}
+        secondary_task: Optional[asyncio.Task] = None
+        last_error: Optional[BaseException] = None
+
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.delay_for(primary_name))
+            if not done:
+                if self.budget.try_spend():
+                    logger.info(f"Hedging slow {primary_name} call")
+                    self.hedged += 1
+                    secondary_task = asyncio.create_task(secondary())
+                    tasks.add(secondary_task)
+                else:
+                    self.budget_denied += 1
+
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and is_valid(task.result()):
+                        if task is secondary_task:
+                            self.hedge_wins += 1
+                        return task.result()
+                    last_error = task.exception() or ValueError("Invalid LLM response")
+
+                if secondary_task is None:
+                    # Primary failed with no hedge in flight: fail over now
+                    if on_failover is not None:
+                        on_failover()
+                    secondary_task = asyncio.create_task(secondary())
+                    tasks.add(secondary_task)
+
+            raise last_error
+        finally:
+            for task in (primary_task, secondary_task):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hedging counters and current delays."""
+        return {
+            "calls": self.calls,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "budget_denied": self.budget_denied,
+            "delays": {name: round(self.delay_for(name), 3) for name in self.windows},
+        }
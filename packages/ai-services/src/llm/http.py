@@ -0,0 +1,61 @@
+"""
+Pooled HTTP clients for LLM provider SDKs.
+"""
+import asyncio
+import importlib.util
+import logging
+
+import httpx
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """
+    Create an httpx client with explicitly tuned pool limits and keep-alive.
+
+    HTTP/2 is used only when enabled in settings and the `h2` package is
+    installed.
+    """
+    http2 = settings.llm_http2
+    if http2 and importlib.util.find_spec("h2") is None:
+        logger.warning("llm_http2 is enabled but the h2 package is missing; using HTTP/1.1")
+        http2 = False
+
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=settings.llm_http_max_connections,
+            max_keepalive_connections=settings.llm_http_max_keepalive_connections,
+            keepalive_expiry=settings.llm_http_keepalive_expiry_seconds,
+        ),
+        timeout=httpx.Timeout(
+            settings.llm_http_timeout_seconds,
+            connect=settings.llm_http_connect_timeout_seconds,
+        ),
+        follow_redirects=True,
+    )
+
+
+async def prewarm(client: httpx.AsyncClient, base_url: str, connections: int) -> None:
+    """
+    Open pooled connections to a provider so the TLS handshake is paid now.
+
+    Any HTTP status is fine: the response only matters for leaving a
+    kept-alive connection in the pool.
+
+    Args:
+        client: Pooled client to warm
+        base_url: Provider API base URL
+        connections: Number of connections to open concurrently
+    """
+
+    async def _touch() -> None:
+        try:
+            await client.head(base_url, timeout=settings.llm_http_connect_timeout_seconds)
+        except httpx.HTTPError as e:
+            logger.warning(f"Connection pre-warm to {base_url} failed: {e}")
+
+    await asyncio.gather(*[_touch() for _ in range(connections)])
@@ -1,108 +1,613 @@
 """
 LLM Orchestrator for multi-provider AI interactions.
 """
+import asyncio
+import json
 import logging
-from typing import Any, Dict, List, Optional
+import time
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Type,
+    TypeVar,
+    Union,
+)
 
+import httpx
 from openai import AsyncOpenAI
 from anthropic import AsyncAnthropic
-from tenacity import retry, stop_after_attempt, wait_exponential
+from pydantic import BaseModel, ValidationError
+from tenacity import (
+    AsyncRetrying,
+    retry_if_not_exception_type,
+    stop_after_attempt,
+    wait_exponential,
+)
 
 from ..config import settings
+from ..telemetry.metrics import LLM_CALL_DURATION, LLM_FALLBACKS, LLM_RETRIES
+from ..telemetry.tracing import set_attributes, traced, tracer
+from .hedging import HedgeBudget, Hedger
+from .http import create_http_client, prewarm
+from .ratelimit import (
+    MemoryBucketStore,
+    Priority,
+    RateLimiter,
+    RateLimitExceededError,
+    RedisBucketStore,
+    current_priority,
+    estimate_tokens,
+)
+from .replay import Recording, ReplayStore, request_key
+from .router import NoHealthyProviderError, ProviderRouter
+from .singleflight import SingleFlight
+from .structured import anthropic_tool, openai_response_format, strict_json_schema
+from .usage import UsageTracker, anthropic_usage, openai_usage
 
 logger = logging.getLogger(__name__)
 
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
 
 class LLMOrchestrator:
     """
-    Orchestrates LLM interactions with fallback support.
+    Orchestrates LLM interactions with health-based routing and fallback.
     """
 
     def __init__(self):
-        self.openai_client = AsyncOpenAI(api_key=settings.openai_api_key) if settings.openai_api_key else None
-        self.anthropic_client = AsyncAnthropic(api_key=settings.anthropic_api_key) if settings.anthropic_api_key else None
+        # One tuned connection pool per provider, shared by every request
+        self.http_clients: Dict[str, httpx.AsyncClient] = {}
+        if settings.openai_api_key:
+            self.http_clients["openai"] = create_http_client()
+        if settings.anthropic_api_key:
+            self.http_clients["anthropic"] = create_http_client()
+
+        self.openai_client = (
+            AsyncOpenAI(
+                api_key=settings.openai_api_key,
+                base_url=settings.openai_base_url,
+                http_client=self.http_clients["openai"],
+            )
+            if settings.openai_api_key
+            else None
+        )
+        self.anthropic_client = (
+            AsyncAnthropic(
+                api_key=settings.anthropic_api_key,
+                base_url=settings.anthropic_base_url,
+                http_client=self.http_clients["anthropic"],
+            )
+            if settings.anthropic_api_key
+            else None
+        )
+        # Recorded or replayed provider I/O, for performance runs
+        self.replay = (
+            ReplayStore(
+                settings.llm_replay_path, settings.llm_replay_mode, settings.llm_replay_speed
+            )
+            if settings.llm_replay_mode != "off"
+            else None
+        )
+        replayed = self.replay.providers if self._replaying else set()
+        self.router = ProviderRouter(
+            [
+                name
+                for name, client in (
+                    ("openai", self.openai_client),
+                    ("anthropic", self.anthropic_client),
+                )
+                if client is not None or name in replayed
+            ],
+            alpha=settings.llm_router_ewma_alpha,
+            failure_threshold=settings.llm_circuit_failure_threshold,
+            error_rate_threshold=settings.llm_circuit_error_rate_threshold,
+            open_seconds=settings.llm_circuit_open_seconds,
+        )
+        self.singleflight = SingleFlight() if settings.llm_singleflight_enabled else None
+        self.hedger = (
+            Hedger(
+                percentile=settings.llm_hedge_percentile,
+                initial_delay=settings.llm_hedge_initial_delay_seconds,
+                min_delay=settings.llm_hedge_min_delay_seconds,
+                max_delay=settings.llm_hedge_max_delay_seconds,
+                budget=HedgeBudget(ratio=settings.llm_hedge_budget_ratio),
+            )
+            if settings.llm_hedging_enabled
+            else None
+        )
+        self.usage = UsageTracker()
+        self.rate_limiter = (
+            RateLimiter(
+                {
+                    "openai": (settings.openai_rpm, settings.openai_tpm),
+                    "anthropic": (settings.anthropic_rpm, settings.anthropic_tpm),
+                },
+                store=(
+                    RedisBucketStore(settings.redis_url)
+                    if settings.llm_rate_limit_backend == "redis"
+                    else MemoryBucketStore()
+                ),
+                max_wait=settings.llm_rate_limit_max_wait_seconds,
+                bulk_max_wait=settings.llm_rate_limit_bulk_max_wait_seconds,
+            )
+            if settings.llm_rate_limit_enabled
+            else None
+        )
+
+    async def warm_up(self) -> None:
+        """Open keep-alive connections to every configured provider."""
+        sdk_clients = {"openai": self.openai_client, "anthropic": self.anthropic_client}
+        await asyncio.gather(
+            *[
+                prewarm(
+                    http_client,
+                    str(sdk_clients[name].base_url),
+                    settings.llm_prewarm_connections,
+                )
+                for name, http_client in self.http_clients.items()
+            ]
+        )
+        logger.info(f"Pre-warmed connections to {len(self.http_clients)} LLM provider(s)")
+
+    async def check_provider(self, provider: str, timeout: float) -> None:
+        """
+        Make the cheapest authenticated call to a provider: one page of models.
+
+        Args:
+            provider: openai or anthropic
+            timeout: Request timeout in seconds (the call is not retried)
+
+        Raises:
+            ValueError: If the provider has no client
+            Exception: The SDK error when the provider is unreachable or rejects the key
+        """
+        if provider == "openai" and self.openai_client is not None:
+            await self.openai_client.with_options(timeout=timeout, max_retries=0).models.list()
+        elif provider == "anthropic" and self.anthropic_client is not None:
+            await self.anthropic_client.with_options(
+                timeout=timeout, max_retries=0
+            ).models.list(limit=1)
+        else:
+            raise ValueError(f"Provider not configured: {provider}")
+
+    async def aclose(self) -> None:
+        """Close provider connection pools."""
+        for http_client in self.http_clients.values():
+            await http_client.aclose()
+        if self.rate_limiter is not None:
+            await self.rate_limiter.aclose()
+        if self.replay is not None:
+            self.replay.close()
+
+    @property
+    def _replaying(self) -> bool:
+        return self.replay is not None and self.replay.replaying
+
+    @staticmethod
+    def _completion_key(
+        prompt: str,
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        prompt_prefix: Optional[str],
+        response_model: Optional[Type[BaseModel]],
+        tier: str,
+    ) -> str:
+        """Replay key of a completion; the provider is left out so replays can route freely."""
+        return request_key(
+            "complete",
+            prompt=prompt,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            prompt_prefix=prompt_prefix,
+            schema=response_model.__name__ if response_model is not None else None,
+            tier=tier,
+        )
+
+    async def _recorded(
+        self,
+        key: Optional[str],
+        provider: str,
+        model: str,
+        call: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """Run a provider call, recording it, or answer it from the recording when replaying."""
+        if self.replay is None or key is None:
+            return await call()
+        if self.replay.replaying:
+            return (await self.replay.replay(key, provider)).response
+
+        start = time.perf_counter()
+        result = await call()
+        response = result.model_dump(mode="json") if isinstance(result, BaseModel) else result
+        self.replay.record(key, Recording(provider, model, time.perf_counter() - start, response))
+        return result
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=1, max=10),
-    )
     async def complete(
         self,
         prompt: str,
         system_prompt: Optional[str] = None,
         temperature: float = 0.7,
         max_tokens: int = 2000,
-        provider: str = "openai",
+        provider: Optional[str] = None,
+        prompt_prefix: Optional[str] = None,
+        tier: str = "large",
     ) -> str:
         """
         Generate completion from LLM.
 
+        Identical concurrent requests share a single provider call.
+
         Args:
             prompt: User prompt
             system_prompt: System prompt for context
             temperature: Sampling temperature
             max_tokens: Maximum tokens to generate
-            provider: LLM provider to use (openai or anthropic)
+            provider: Preferred LLM provider (openai or anthropic); by default
+                the router picks the healthiest one
+            prompt_prefix: Static instructions sent ahead of the prompt and
+                marked cacheable, so providers can reuse the shared prefix
+            tier: Model tier, "large" (default) or "fast"; fast calls get a
+                single round, since the caller escalates on failure
 
         Returns:
             Generated text completion
         """
-        try:
-            if provider == "openai" and self.openai_client:
-                return await self._openai_complete(
-                    prompt, system_prompt, temperature, max_tokens
-                )
-            elif provider == "anthropic" and self.anthropic_client:
-                return await self._anthropic_complete(
-                    prompt, system_prompt, temperature, max_tokens
-                )
-            else:
-                # Fallback to available provider
-                if self.openai_client:
-                    return await self._openai_complete(
-                        prompt, system_prompt, temperature, max_tokens
-                    )
-                elif self.anthropic_client:
-                    return await self._anthropic_complete(
-                        prompt, system_prompt, temperature, max_tokens
-                    )
-                else:
-                    raise ValueError("No LLM provider configured")
-        except Exception as e:
-            logger.error(f"LLM completion failed: {e}")
-            # Try fallback provider
-            if provider == "openai" and self.anthropic_client:
-                logger.info("Falling back to Anthropic")
-                return await self._anthropic_complete(
-                    prompt, system_prompt, temperature, max_tokens
+        return await self._coalesced(
+            prompt, system_prompt, temperature, max_tokens, provider, prompt_prefix, None, tier
+        )
+
+    async def complete_structured(
+        self,
+        prompt: str,
+        response_model: Type[ModelT],
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        provider: Optional[str] = None,
+        prompt_prefix: Optional[str] = None,
+        tier: str = "large",
+    ) -> ModelT:
+        """
+        Generate a completion constrained to a pydantic model's schema.
+
+        OpenAI is called in JSON-schema response mode and Anthropic with a
+        forced tool call, and the answer is validated into `response_model`.
+        An answer that fails validation counts as a failed attempt, so the
+        next provider or round is tried.
+
+        Args:
+            prompt: User prompt
+            response_model: Pydantic model the answer must conform to
+            system_prompt: System prompt for context
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+            provider: Preferred LLM provider (openai or anthropic)
+            prompt_prefix: Static instructions sent ahead of the prompt
+            tier: Model tier, "large" (default) or "fast"
+
+        Returns:
+            Validated model instance
+        """
+        return await self._coalesced(
+            prompt,
+            system_prompt,
+            temperature,
+            max_tokens,
+            provider,
+            prompt_prefix,
+            response_model,
+            tier,
+        )
+
+    async def _coalesced(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        provider: Optional[str],
+        prompt_prefix: Optional[str],
+        response_model: Optional[Type[BaseModel]],
+        tier: str = "large",
+    ) -> Union[str, BaseModel]:
+        """Run a completion, sharing one provider call among identical requests."""
+        args = (
+            prompt,
+            system_prompt,
+            temperature,
+            max_tokens,
+            provider,
+            prompt_prefix,
+            response_model,
+            tier,
+        )
+        if self.singleflight is None:
+            return await self._complete_with_fallback(*args)
+
+        if provider:
+            model: Any = self._model(provider, tier)
+        else:
+            model = (self._model("openai", tier), self._model("anthropic", tier))
+        # The shared call is admitted at its first caller's priority, so only
+        # calls of the same priority class share it
+        key = (
+            provider,
+            model,
+            system_prompt,
+            prompt_prefix,
+            prompt,
+            temperature,
+            max_tokens,
+            response_model,
+            current_priority(),
+        )
+        return await self.singleflight.do(key, lambda: self._complete_with_fallback(*args))
+
+    async def _complete_with_fallback(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        provider: Optional[str],
+        prompt_prefix: Optional[str],
+        response_model: Optional[Type[BaseModel]] = None,
+        tier: str = "large",
+    ) -> Union[str, BaseModel]:
+        """
+        Complete via the router, retrying whole rounds with backoff.
+
+        A round tries each usable provider once, best first. Rounds are not
+        retried when every circuit is open or the rate limit budget is
+        exhausted, so callers get a bounded wait instead of a retry loop.
+        """
+        if not self.router.providers:
+            raise ValueError("No LLM provider configured")
+        if self._replaying:
+            # Fail once, not once per provider and round
+            self.replay.require(
+                self._completion_key(
+                    prompt,
+                    system_prompt,
+                    temperature,
+                    max_tokens,
+                    prompt_prefix,
+                    response_model,
+                    tier,
                 )
-            elif provider == "anthropic" and self.openai_client:
-                logger.info("Falling back to OpenAI")
-                return await self._openai_complete(
-                    prompt, system_prompt, temperature, max_tokens
+            )
+
+        async for attempt in AsyncRetrying(
+            stop=stop_after_attempt(1 if tier == "fast" else settings.llm_max_attempts),
+            wait=wait_exponential(multiplier=1, min=1, max=10),
+            retry=retry_if_not_exception_type((NoHealthyProviderError, RateLimitExceededError)),
+            reraise=True,
+        ):
+            retry_state = attempt.retry_state
+            with attempt, tracer.span(
+                "llm.attempt",
+                **{
+                    "llm.attempt": retry_state.attempt_number,
+                    "llm.backoff_seconds": round(retry_state.idle_for, 3),
+                    "llm.tier": tier,
+                },
+            ):
+                if retry_state.attempt_number > 1:
+                    LLM_RETRIES.inc()
+                result = await self._complete_round(
+                    prompt,
+                    system_prompt,
+                    temperature,
+                    max_tokens,
+                    provider,
+                    prompt_prefix,
+                    response_model,
+                    tier,
                 )
+        return result
+
+    async def _complete_round(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        provider: Optional[str],
+        prompt_prefix: Optional[str],
+        response_model: Optional[Type[BaseModel]] = None,
+        tier: str = "large",
+    ) -> Union[str, BaseModel]:
+        """Try each usable provider once, hedging between the best two if enabled."""
+        providers = self.router.order(provider, fastest=current_priority() == Priority.EMERGENCY)
+        if not providers:
+            raise NoHealthyProviderError("All LLM providers have open circuits")
+
+        args = (prompt, system_prompt, temperature, max_tokens, prompt_prefix, response_model, tier)
+        if self.hedger is not None and len(providers) >= 2:
+            primary, secondary = providers[:2]
+            return await self.hedger.run(
+                primary,
+                lambda: self._call_provider(primary, *args),
+                lambda: self._call_provider(secondary, *args),
+                on_failover=lambda: LLM_FALLBACKS.inc(primary, secondary),
+            )
+
+        last_error: Optional[Exception] = None
+        failed: Optional[str] = None
+        for name in providers:
+            if failed is not None:
+                LLM_FALLBACKS.inc(failed, name)
+            try:
+                return await self._call_provider(name, *args)
+            except NoHealthyProviderError:
+                continue
+            except Exception as e:
+                logger.error(f"LLM completion failed with {name}: {e}")
+                last_error = e
+                failed = name
+
+        raise last_error or NoHealthyProviderError("All LLM providers have open circuits")
+
+    @traced("llm.provider_call")
+    async def _call_provider(
+        self,
+        provider: str,
+        prompt: str,
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        prompt_prefix: Optional[str] = None,
+        response_model: Optional[Type[BaseModel]] = None,
+        tier: str = "large",
+    ) -> Union[str, BaseModel]:
+        """Complete with one provider, recording the outcome for routing and hedging."""
+        # Reserve the circuit slot first, so a skipped provider spends no budget
+        if not self.router.acquire(provider):
+            raise NoHealthyProviderError(f"Circuit for {provider} is open")
+        try:
+            await self._admit(provider, max_tokens, system_prompt, prompt_prefix, prompt)
+        except BaseException:
+            self.router.release(provider)
             raise
 
+        model = self._model(provider, tier)
+        set_attributes(
+            **{
+                "llm.provider": provider,
+                "llm.model": model,
+                "llm.tier": tier,
+                "llm.structured": response_model is not None,
+                "llm.prompt_prefix_chars": len(prompt_prefix or ""),
+            }
+        )
+        key = None
+        if self.replay is not None:
+            key = self._completion_key(
+                prompt, system_prompt, temperature, max_tokens, prompt_prefix, response_model, tier
+            )
+        start = time.perf_counter()
+        try:
+            result = await self._recorded(
+                key,
+                provider,
+                model,
+                lambda: self._provider_complete(
+                    provider,
+                    model,
+                    prompt,
+                    system_prompt,
+                    temperature,
+                    max_tokens,
+                    prompt_prefix,
+                    response_model,
+                ),
+            )
+            if response_model is not None and not isinstance(result, BaseModel):
+                result = response_model.model_validate(result)
+        except asyncio.CancelledError:
+            self.router.release(provider)
+            raise
+        except ValidationError:
+            # The provider answered; a schema-invalid answer falls back to the
+            # next provider but does not count against its circuit
+            latency = time.perf_counter() - start
+            LLM_CALL_DURATION.observe(latency, provider, model, "invalid")
+            self.router.record_success(provider, latency)
+            raise
+        except Exception:
+            self.router.record_failure(provider)
+            LLM_CALL_DURATION.observe(time.perf_counter() - start, provider, model, "error")
+            raise
+
+        latency = time.perf_counter() - start
+        LLM_CALL_DURATION.observe(latency, provider, model, "ok")
+        self.router.record_success(provider, latency)
+        if self.hedger is not None:
+            self.hedger.record_latency(provider, latency)
+        return result
+
+    async def _provider_complete(
+        self,
+        provider: str,
+        model: str,
+        prompt: str,
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        prompt_prefix: Optional[str],
+        response_model: Optional[Type[BaseModel]],
+    ) -> Union[str, BaseModel]:
+        """Call the provider's SDK for a plain or structured completion."""
+        if response_model is not None:
+            structured = (
+                self._anthropic_structured if provider == "anthropic" else self._openai_structured
+            )
+            return await structured(
+                prompt,
+                response_model,
+                system_prompt,
+                temperature,
+                max_tokens,
+                prompt_prefix,
+                model,
+            )
+        if provider == "anthropic":
+            return await self._anthropic_complete(
+                prompt, system_prompt, temperature, max_tokens, prompt_prefix, model
+            )
+        return await self._openai_complete(
+            prompt, system_prompt, temperature, max_tokens, prompt_prefix, model
+        )
+
+    @staticmethod
+    def _model(provider: str, tier: str) -> str:
+        """Model name for a provider and tier (large or fast)."""
+        if provider == "anthropic":
+            return settings.anthropic_fast_model if tier == "fast" else settings.anthropic_model
+        return settings.openai_fast_model if tier == "fast" else settings.openai_model
+
+    async def _admit(
+        self,
+        provider: str,
+        max_tokens: int,
+        *texts: Optional[str],
+        priority: Optional[Priority] = None,
+    ) -> None:
+        """Wait for the provider's rate limit budget for one call."""
+        if self.rate_limiter is None:
+            return
+        tokens = estimate_tokens(*texts, max_tokens=max_tokens)
+        waited = await self.rate_limiter.acquire(provider, tokens, priority)
+        set_attributes(**{"llm.rate_limit_wait_seconds": round(waited, 3)})
+        if waited >= 1.0:
+            logger.info(f"Waited {waited:.1f}s for {provider} rate limit budget")
+
     async def _openai_complete(
         self,
         prompt: str,
         system_prompt: Optional[str],
         temperature: float,
         max_tokens: int,
+        prompt_prefix: Optional[str] = None,
+        model: Optional[str] = None,
     ) -> str:
         """Generate completion using OpenAI."""
-        messages = []
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-        messages.append({"role": "user", "content": prompt})
-
+        model = model or settings.openai_model
         response = await self.openai_client.chat.completions.create(
-            model=settings.openai_model,
-            messages=messages,
+            model=model,
+            messages=self._openai_messages(prompt, system_prompt, prompt_prefix),
             temperature=temperature,
             max_tokens=max_tokens,
         )
 
+        self.usage.record(openai_usage(response, model))
         return response.choices[0].message.content
 
     async def _anthropic_complete(
@@ -111,17 +616,308 @@ class LLMOrchestrator:
         system_prompt: Optional[str],
         temperature: float,
         max_tokens: int,
+        prompt_prefix: Optional[str] = None,
+        model: Optional[str] = None,
     ) -> str:
         """Generate completion using Anthropic."""
+        model = model or settings.anthropic_model
         response = await self.anthropic_client.messages.create(
-            model=settings.anthropic_model,
+            model=model,
             max_tokens=max_tokens,
-            system=system_prompt or "",
-            messages=[{"role": "user", "content": prompt}],
+            **self._anthropic_messages(prompt, system_prompt, prompt_prefix),
         )
 
+        self.usage.record(anthropic_usage(response, model))
         return response.content[0].text
 
+    async def _openai_structured(
+        self,
+        prompt: str,
+        response_model: Type[ModelT],
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        prompt_prefix: Optional[str] = None,
+        model: Optional[str] = None,
+    ) -> ModelT:
+        """Generate a schema-constrained completion using OpenAI."""
+        model = model or settings.openai_model
+        if settings.openai_structured_mode == "json_schema":
+            response_format = openai_response_format(response_model)
+        else:
+            # Older models only guarantee syntactically valid JSON
+            response_format = {"type": "json_object"}
+            schema = json.dumps(strict_json_schema(response_model), ensure_ascii=False)
+            prompt = f"{prompt}\n\nJSON schema da resposta:\n{schema}"
+
+        response = await self.openai_client.chat.completions.create(
+            model=model,
+            messages=self._openai_messages(prompt, system_prompt, prompt_prefix),
+            temperature=temperature,
+            max_tokens=max_tokens,
+            response_format=response_format,
+        )
+
+        self.usage.record(openai_usage(response, model))
+        return response_model.model_validate_json(response.choices[0].message.content)
+
+    async def _anthropic_structured(
+        self,
+        prompt: str,
+        response_model: Type[ModelT],
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        prompt_prefix: Optional[str] = None,
+        model: Optional[str] = None,
+    ) -> ModelT:
+        """Generate a schema-constrained completion using an Anthropic tool call."""
+        model = model or settings.anthropic_model
+        tool = anthropic_tool(response_model)
+        response = await self.anthropic_client.messages.create(
+            model=model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            tools=[tool],
+            tool_choice={"type": "tool", "name": tool["name"]},
+            **self._anthropic_messages(prompt, system_prompt, prompt_prefix),
+        )
+
+        self.usage.record(anthropic_usage(response, model))
+        for block in response.content:
+            if block.type == "tool_use":
+                return response_model.model_validate(block.input)
+        raise ValueError(f"Anthropic response contained no {tool['name']} tool call")
+
+    @staticmethod
+    def _openai_messages(
+        prompt: str,
+        system_prompt: Optional[str],
+        prompt_prefix: Optional[str],
+    ) -> List[Dict[str, Any]]:
+        """
+        Build OpenAI messages with the static parts first.
+
+        OpenAI caches the longest previously seen prompt prefix automatically,
+        so the system prompt and instructions lead and patient data comes last.
+        """
+        messages: List[Dict[str, Any]] = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        content = f"{prompt_prefix}\n\n{prompt}" if prompt_prefix else prompt
+        messages.append({"role": "user", "content": content})
+        return messages
+
+    @staticmethod
+    def _anthropic_messages(
+        prompt: str,
+        system_prompt: Optional[str],
+        prompt_prefix: Optional[str],
+    ) -> Dict[str, Any]:
+        """
+        Build Anthropic system and messages with cache breakpoints.
+
+        The system prompt and the instruction prefix are marked with
+        `cache_control`, so repeated calls only pay for the patient data.
+        """
+        cacheable = {"type": "ephemeral"}
+        system: Any = ""
+        if system_prompt:
+            system = [{"type": "text", "text": system_prompt, "cache_control": cacheable}]
+
+        content: List[Dict[str, Any]] = []
+        if prompt_prefix:
+            content.append({"type": "text", "text": prompt_prefix, "cache_control": cacheable})
+        content.append({"type": "text", "text": prompt})
+        return {"system": system, "messages": [{"role": "user", "content": content}]}
+
+    async def stream(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        provider: Optional[str] = None,
+        prompt_prefix: Optional[str] = None,
+        priority: Optional[Priority] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Stream a completion from the LLM as text deltas.
+
+        Falls back to the other provider only if the first one fails before
+        producing any text; a failure mid-stream is raised to the caller.
+        Each attempt goes through the router's circuit breaker like a unary
+        call, with the whole stream's duration as its latency.
+
+        Args:
+            prompt: User prompt
+            system_prompt: System prompt for context
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+            provider: Preferred LLM provider (openai or anthropic); by default
+                the router picks the healthiest one
+            prompt_prefix: Static instructions sent ahead of the prompt and
+                marked cacheable
+            priority: Rate limit priority; by default that of the calling
+                context (async generators cannot safely carry it themselves)
+
+        Yields:
+            Text deltas in generation order
+        """
+        if not self.router.providers:
+            raise ValueError("No LLM provider configured")
+
+        streams = {"openai": self._openai_stream, "anthropic": self._anthropic_stream}
+        key = None
+        if self.replay is not None:
+            key = request_key(
+                "stream",
+                prompt=prompt,
+                system_prompt=system_prompt,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                prompt_prefix=prompt_prefix,
+            )
+            if self.replay.replaying:
+                self.replay.require(key)
+        if priority is None:
+            priority = current_priority()
+        candidates = self.router.order(provider, fastest=priority == Priority.EMERGENCY)
+        if not candidates:
+            raise NoHealthyProviderError("All LLM providers have open circuits")
+
+        last_error: Optional[Exception] = None
+        failed: Optional[str] = None
+        for name in candidates:
+            if not self.router.acquire(name):
+                continue
+            if failed is not None:
+                LLM_FALLBACKS.inc(failed, name)
+            model = self._model(name, "large")
+            started = False
+            try:
+                await self._admit(
+                    name, max_tokens, system_prompt, prompt_prefix, prompt, priority=priority
+                )
+            except Exception as e:
+                self.router.release(name)
+                logger.error(f"LLM stream not admitted for {name}, falling back: {e}")
+                last_error, failed = e, name
+                continue
+            except BaseException:
+                self.router.release(name)
+                raise
+
+            try:
+                start = time.perf_counter()
+                if self._replaying:
+                    deltas = self.replay.replay_stream(key, name)
+                else:
+                    deltas = streams[name](
+                        prompt, system_prompt, temperature, max_tokens, prompt_prefix
+                    )
+                    if self.replay is not None:
+                        deltas = self.replay.record_stream(key, name, model, deltas)
+                async for delta in deltas:
+                    started = True
+                    yield delta
+            except Exception as e:
+                self.router.record_failure(name)
+                LLM_CALL_DURATION.observe(time.perf_counter() - start, name, model, "error")
+                if started:
+                    raise
+                logger.error(f"LLM stream failed before first token, falling back: {e}")
+                last_error, failed = e, name
+                continue
+            except BaseException:
+                # Cancelled, or closed early by the consumer
+                self.router.release(name)
+                raise
+
+            latency = time.perf_counter() - start
+            LLM_CALL_DURATION.observe(latency, name, model, "ok")
+            self.router.record_success(name, latency)
+            return
+
+        raise last_error or NoHealthyProviderError("All LLM providers have open circuits")
+
+    async def _openai_stream(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        prompt_prefix: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """Stream a completion using OpenAI."""
+        stream = await self.openai_client.chat.completions.create(
+            model=settings.openai_model,
+            messages=self._openai_messages(prompt, system_prompt, prompt_prefix),
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+            # Usage arrives in a last chunk without choices
+            extra_body={"stream_options": {"include_usage": True}},
+        )
+
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+            elif not chunk.choices:
+                self.usage.record(openai_usage(chunk, settings.openai_model))
+
+    async def _anthropic_stream(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        prompt_prefix: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """Stream a completion using Anthropic."""
+        stream = await self.anthropic_client.messages.create(
+            model=settings.anthropic_model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True,
+            **self._anthropic_messages(prompt, system_prompt, prompt_prefix),
+        )
+
+        # Input usage comes with message_start, output usage with message_delta
+        usage: Dict[str, Any] = {}
+        async for event in stream:
+            if event.type == "content_block_delta" and event.delta.type == "text_delta":
+                yield event.delta.text
+            elif event.type == "message_start":
+                usage.update(event.message.usage.model_dump(exclude_none=True))
+            elif event.type == "message_delta":
+                usage["output_tokens"] = event.usage.output_tokens
+        self.usage.record(anthropic_usage({"usage": usage}, settings.anthropic_model))
+
+    @traced("llm.embed")
+    async def embed(self, text: str) -> List[float]:
+        """
+        Compute an embedding vector for text.
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            Embedding vector
+        """
+        if not self.openai_client and not self._replaying:
+            raise ValueError("OpenAI client required for embeddings")
+
+        model = settings.openai_embedding_model
+
+        async def call() -> List[float]:
+            response = await self.openai_client.embeddings.create(model=model, input=text)
+            return response.data[0].embedding
+
+        key = request_key("embed", model=model, text=text) if self.replay is not None else None
+        return await self._recorded(key, "openai", model, call)
+
+    @traced("llm.vision_call")
     async def analyze_with_vision(
         self,
         image_url: str,
@@ -139,8 +935,16 @@ class LLMOrchestrator:
         Returns:
             Analysis result
         """
-        if not self.openai_client:
+        if not self.openai_client and not self._replaying:
             raise ValueError("OpenAI client required for vision analysis")
+        key = None
+        if self.replay is not None:
+            key = request_key(
+                "vision", image_url=image_url, prompt=prompt, system_prompt=system_prompt
+            )
+            if self.replay.replaying:
+                self.replay.require(key)
+        await self._admit("openai", 1000, system_prompt, prompt)
 
         messages = []
         if system_prompt:
@@ -154,10 +958,23 @@ class LLMOrchestrator:
             ],
         })
 
-        response = await self.openai_client.chat.completions.create(
-            model="gpt-4-vision-preview",
-            messages=messages,
-            max_tokens=1000,
-        )
+        model = "gpt-4-vision-preview"
+        set_attributes(**{"llm.provider": "openai", "llm.model": model})
 
-        return response.choices[0].message.content
+        async def call() -> str:
+            response = await self.openai_client.chat.completions.create(
+                model=model,
+                messages=messages,
+                max_tokens=1000,
+            )
+            self.usage.record(openai_usage(response, model))
+            return response.choices[0].message.content
+
+        start = time.perf_counter()
+        try:
+            result = await self._recorded(key, "openai", model, call)
+        except Exception:
+            LLM_CALL_DURATION.observe(time.perf_counter() - start, "openai", model, "error")
+            raise
+        LLM_CALL_DURATION.observe(time.perf_counter() - start, "openai", model, "ok")
+        return result
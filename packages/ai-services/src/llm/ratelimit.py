@@ -0,0 +1,296 @@
+"""
+Per-provider request and token budgets with urgency-ordered admission.
+
+Each provider has two token buckets that refill continuously: requests per
+minute and (estimated) tokens per minute. A call waits until both buckets
+can pay for it. Waiting calls are admitted in priority order, so an
+emergency consultation goes ahead of NLP and bulk traffic. A call that
+cannot be admitted within its wait bound fails with RateLimitExceededError
+instead of being retried.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Any, Dict, Iterator, List, Optional, Protocol, Tuple
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+# Rough characters per token for Portuguese and English prompts
+_CHARS_PER_TOKEN = 4
+
+
+class Priority(IntEnum):
+    """Admission priority of a provider call (lower is served first)."""
+
+    EMERGENCY = 0
+    INTERACTIVE = 1
+    NLP = 2
+    BULK = 3
+
+
+class RateLimitExceededError(RuntimeError):
+    """Raised when a call cannot get provider budget within its wait bound."""
+
+
+_current_priority: ContextVar[Priority] = ContextVar("llm_priority", default=Priority.INTERACTIVE)
+
+
+@contextmanager
+def llm_priority(priority: Priority) -> Iterator[None]:
+    """Run the LLM calls made inside the block at the given priority."""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority() -> Priority:
+    """Priority of LLM calls in the current context."""
+    return _current_priority.get()
+
+
+def estimate_tokens(*texts: Optional[str], max_tokens: int = 0) -> int:
+    """
+    Estimate the tokens a call counts against a TPM budget.
+
+    Providers reserve `max_tokens` for the output when admitting a request,
+    so it is counted in full.
+    """
+    chars = sum(len(text) for text in texts if text)
+    return chars // _CHARS_PER_TOKEN + max_tokens
+
+
+class BucketStore(Protocol):
+    """Holds bucket state; `take` returns 0 when granted or the seconds to wait."""
+
+    async def take(self, provider: str, rpm: int, tpm: int, tokens: int) -> float:
+        ...
+
+    async def close(self) -> None:
+        ...
+
+
+def _refill(level: float, limit: int, elapsed: float) -> float:
+    return min(limit, level + elapsed * limit / 60.0)
+
+
+def _shortfall(level: float, limit: int, cost: float) -> float:
+    """Seconds until `level` reaches `cost` at `limit` per minute (0 if unlimited)."""
+    if limit <= 0 or level >= cost:
+        return 0.0
+    return (cost - level) * 60.0 / limit
+
+
+class MemoryBucketStore:
+    """
+    Buckets held in this process.
+    """
+
+    def __init__(self) -> None:
+        self._state: Dict[str, List[float]] = {}  # provider -> [requests, tokens, updated_at]
+
+    async def take(self, provider: str, rpm: int, tpm: int, tokens: int) -> float:
+        now = time.monotonic()
+        state = self._state.setdefault(provider, [float(rpm), float(tpm), now])
+        elapsed = now - state[2]
+        requests = _refill(state[0], rpm, elapsed) if rpm > 0 else 0.0
+        budget = _refill(state[1], tpm, elapsed) if tpm > 0 else 0.0
+        state[2] = now
+
+        wait = max(_shortfall(requests, rpm, 1), _shortfall(budget, tpm, tokens))
+        if wait == 0:
+            requests -= 1
+            budget -= tokens
+        state[0], state[1] = requests, budget
+        return wait
+
+    async def close(self) -> None:
+        pass
+
+
+# Refill and take atomically, using the Redis clock so every task agrees on time.
+# Returns the wait as a string because Lua numbers are truncated to integers.
+_TAKE_SCRIPT = """
+local rpm, tpm, cost = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'r', 't', 'ts')
+local r = tonumber(state[1]) or rpm
+local k = tonumber(state[2]) or tpm
+local elapsed = math.max(0, now - (tonumber(state[3]) or now))
+local wait = 0
+if rpm > 0 then
+  r = math.min(rpm, r + elapsed * rpm / 60)
+  if r < 1 then wait = (1 - r) * 60 / rpm end
+end
+if tpm > 0 then
+  k = math.min(tpm, k + elapsed * tpm / 60)
+  if k < cost then wait = math.max(wait, (cost - k) * 60 / tpm) end
+end
+if wait == 0 then
+  r = r - 1
+  k = k - cost
+end
+redis.call('HSET', KEYS[1], 'r', r, 't', k, 'ts', now)
+redis.call('EXPIRE', KEYS[1], 120)
+return tostring(wait)
+"""
+
+
+class RedisBucketStore:
+    """
+    Buckets shared through Redis, so the budget holds across service tasks.
+
+    If Redis is unreachable, calls are admitted rather than blocked.
+    """
+
+    def __init__(
+        self,
+        redis_url: str,
+        namespace: str = "petvet:ratelimit",
+        client: Optional[Redis] = None,
+    ):
+        self.client = client or Redis.from_url(redis_url, decode_responses=True)
+        self.namespace = namespace
+        self._take = self.client.register_script(_TAKE_SCRIPT)
+
+    async def take(self, provider: str, rpm: int, tpm: int, tokens: int) -> float:
+        try:
+            wait = await self._take(keys=[f"{self.namespace}:{provider}"], args=[rpm, tpm, tokens])
+        except (RedisError, OSError) as e:
+            logger.warning(f"Redis rate limit check failed for {provider}: {e}")
+            return 0.0
+        return float(wait)
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+class _ProviderQueue:
+    """Waiting calls for one provider, ordered by (priority, arrival)."""
+
+    def __init__(self, rpm: int, tpm: int):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.waiting: List[Tuple[int, int]] = []
+        self.changed = asyncio.Condition()
+        self.granted = 0
+        self.rejected = 0
+
+
+class RateLimiter:
+    """
+    Admits provider calls within their RPM/TPM budgets, most urgent first.
+
+    `limits` maps each provider to (requests per minute, tokens per minute),
+    where 0 disables that budget. Calls wait at most `max_wait` seconds, or
+    `bulk_max_wait` at bulk priority. Priority ordering applies to the calls
+    waiting in this process; the budget itself is shared when the store is
+    Redis-backed.
+    """
+
+    def __init__(
+        self,
+        limits: Dict[str, Tuple[int, int]],
+        store: Optional[BucketStore] = None,
+        max_wait: float = 10.0,
+        bulk_max_wait: float = 120.0,
+    ):
+        self.store = store or MemoryBucketStore()
+        self.max_wait = max_wait
+        self.bulk_max_wait = bulk_max_wait
+        self._queues = {
+            provider: _ProviderQueue(rpm, tpm)
+            for provider, (rpm, tpm) in limits.items()
+            if rpm > 0 or tpm > 0
+        }
+        self._arrivals = itertools.count()
+
+    async def acquire(
+        self, provider: str, tokens: int, priority: Optional[Priority] = None
+    ) -> float:
+        """
+        Wait for budget for one call.
+
+        Args:
+            provider: Provider the call goes to
+            tokens: Estimated tokens of the call
+            priority: Admission priority (defaults to the current context's)
+
+        Returns:
+            Seconds spent waiting
+
+        Raises:
+            RateLimitExceededError: If budget is not available within the wait bound
+        """
+        queue = self._queues.get(provider)
+        if queue is None:
+            return 0.0
+
+        priority = current_priority() if priority is None else priority
+        max_wait = self.bulk_max_wait if priority >= Priority.BULK else self.max_wait
+        if queue.tpm > 0:
+            # A call larger than the whole budget is charged the full bucket
+            tokens = min(tokens, queue.tpm)
+
+        start = time.monotonic()
+        deadline = start + max_wait
+        entry = (int(priority), next(self._arrivals))
+        async with queue.changed:
+            heapq.heappush(queue.waiting, entry)
+            queue.changed.notify_all()  # a more urgent arrival becomes the new head
+            try:
+                while True:
+                    timeout = deadline - time.monotonic()
+                    if queue.waiting[0] == entry:
+                        wait = await self.store.take(provider, queue.rpm, queue.tpm, tokens)
+                        if wait == 0:
+                            queue.granted += 1
+                            return time.monotonic() - start
+                        if wait > timeout:
+                            raise RateLimitExceededError(
+                                f"{provider} budget exhausted; next slot in {wait:.1f}s"
+                            )
+                        timeout = wait
+                    elif timeout <= 0:
+                        raise RateLimitExceededError(
+                            f"Timed out after {max_wait:.0f}s waiting for {provider} budget"
+                        )
+                    try:
+                        await asyncio.wait_for(queue.changed.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        pass
+            except RateLimitExceededError:
+                queue.rejected += 1
+                logger.warning(f"Rate limit rejection for {provider} at {priority.name} priority")
+                raise
+            finally:
+                queue.waiting.remove(entry)
+                heapq.heapify(queue.waiting)
+                queue.changed.notify_all()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return budgets and admission counters per provider."""
+        return {
+            provider: {
+                "rpm": queue.rpm,
+                "tpm": queue.tpm,
+                "waiting": len(queue.waiting),
+                "granted": queue.granted,
+                "rejected": queue.rejected,
+            }
+            for provider, queue in self._queues.items()
+        }
+
+    async def aclose(self) -> None:
+        """Close the bucket store."""
+        await self.store.close()
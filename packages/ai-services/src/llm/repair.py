@@ -0,0 +1,311 @@
+"""
+Tolerant JSON parsing for LLM answers.
+
+Models wrap JSON in prose and markdown fences, leave comments and trailing
+commas, use single quotes or Python literals, and stop mid-object when they
+hit `max_tokens`. `repair_json` rewrites such text into valid JSON in one
+pass over the characters. Values cut off by truncation are dropped rather
+than guessed, and every open container is closed. `fill_missing` then
+completes the result against a pydantic model so a salvaged answer still
+validates.
+"""
+import json
+import re
+import typing
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel
+
+_LITERALS = {
+    "true": "true",
+    "false": "false",
+    "null": "null",
+    "True": "true",
+    "False": "false",
+    "None": "null",
+}
+# One token per match; leading whitespace and comments are skipped
+_TOKEN = re.compile(
+    r"""
+    (?:\s+|//[^\n]*|/\*.*?(?:\*/|\Z))*
+    (?:
+        (?P<str>"[^"\\]*(?:\\.[^"\\]*)*")
+      | (?P<sq>'[^'\\]*(?:\\.[^'\\]*)*')
+      | (?P<punct>[{}\[\],:])
+      | (?P<num>[-+.0-9][-+.0-9eE]*)
+      | (?P<word>\w+(?:/\w+)*)    # joins template placeholders like true/false
+      | (?P<other>.)
+    )
+    """,
+    re.S | re.X,
+)
+_OPENERS_AND_SEPARATORS = ("{", "[", ",", ":")
+_CONTROL = re.compile(r"[\x00-\x1f]")
+_CONTROL_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+
+
+def extract_fenced(text: str) -> str:
+    """Return the contents of the first markdown code fence, if any."""
+    start = text.find("```")
+    if start == -1:
+        return text
+    body_start = start + 3
+    newline = text.find("\n", body_start)
+    if newline != -1 and text[body_start:newline].strip().isalnum():
+        body_start = newline + 1  # skip the language tag, e.g. ```json
+    end = text.find("```", body_start)
+    return text[body_start:] if end == -1 else text[body_start:end]
+
+
+def repair_json(text: str) -> str:
+    """
+    Rewrite LLM output into valid JSON text.
+
+    Handles prose around the value, markdown fences, // and /* */ comments,
+    trailing commas, single-quoted strings, unquoted keys, Python literals
+    and truncation (incomplete trailing values are dropped, open strings
+    and containers are closed).
+
+    Args:
+        text: Raw model output
+
+    Returns:
+        Repaired JSON text
+
+    Raises:
+        ValueError: If the text contains no JSON object or array
+    """
+    text = extract_fenced(text)
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if not starts:
+        raise ValueError("No JSON object or array found")
+
+    out: List[str] = []
+    stack: List[str] = []  # open containers: "{" or "["
+    expect_key: List[bool] = []  # per container: next string in an object is a key
+    safe = 0  # length of `out` at the last point where the value is complete
+    pos = min(starts)
+    n = len(text)
+
+    while pos < n:
+        match = _TOKEN.match(text, pos)
+        if match is None:
+            break  # only whitespace or an unterminated comment is left
+        pos = match.end()
+        kind = match.lastgroup
+        token = match.group(kind)
+        in_object = bool(stack) and stack[-1] == "{"
+
+        if kind == "punct":
+            if token in "{[":
+                if out and out[-1] not in _OPENERS_AND_SEPARATORS:
+                    out.append(",")
+                stack.append(token)
+                expect_key.append(token == "{")
+                out.append(token)
+                safe = len(out)
+            elif token in "}]":
+                if not stack:
+                    break
+                _strip_trailing_comma(out)
+                out.append("}" if stack.pop() == "{" else "]")
+                expect_key.pop()
+                if not stack:
+                    return "".join(out)
+                if stack[-1] == "{":
+                    expect_key[-1] = True
+                safe = len(out)
+            elif token == ",":
+                # Collapse repeated or leading commas
+                if out[-1] not in ("{", "[", ","):
+                    out.append(",")
+            else:
+                out.append(":")
+            continue
+
+        if kind == "other":
+            if token in "\"'":
+                break  # truncated inside a string
+            continue  # stray character
+
+        if kind == "word" and in_object and expect_key[-1]:
+            if text[pos:].lstrip()[:1] != ":":
+                continue  # stray word between members
+            token = json.dumps(token)  # unquoted key
+        elif kind == "word":
+            if token not in _LITERALS:
+                if out[-1] == ":":
+                    # Unknown bareword value (e.g. true/false): drop the member
+                    _drop_dangling_key(out)
+                    if in_object:
+                        expect_key[-1] = True
+                continue
+            token = _LITERALS[token]
+        elif kind in ("str", "sq"):
+            token = _as_json_string(token)
+
+        if kind in ("num", "word") and pos >= n:
+            break  # a number or literal at the very end may be cut short
+
+        if out[-1] not in _OPENERS_AND_SEPARATORS:
+            out.append(",")  # missing separator between members or items
+        out.append(token)
+        if in_object and expect_key[-1]:
+            expect_key[-1] = False  # a key; the value follows
+        else:
+            if in_object:
+                expect_key[-1] = True
+            safe = len(out)
+
+    # Truncated: roll back to the last complete value (dropping a dangling
+    # key, colon or partial value) and close the open containers
+    del out[safe:]
+    _strip_trailing_comma(out)
+    for container in reversed(stack):
+        out.append("}" if container == "{" else "]")
+    return "".join(out)
+
+
+def _as_json_string(quoted: str) -> str:
+    """Convert a matched single- or double-quoted literal to a JSON string."""
+    body = quoted[1:-1]
+    if quoted[0] == "'":
+        body = body.replace("\\'", "'").replace('"', '\\"')
+    if _CONTROL.search(body):
+        body = _CONTROL.sub(lambda m: _CONTROL_ESCAPES.get(m.group(), ""), body)
+    return f'"{body}"'
+
+
+def _strip_trailing_comma(out: List[str]) -> None:
+    while out and out[-1] == ",":
+        out.pop()
+
+
+def _drop_dangling_key(out: List[str]) -> None:
+    """Remove a trailing `"key":` whose value was dropped."""
+    if out and out[-1] == ":":
+        out.pop()
+    if out and out[-1].startswith('"'):
+        out.pop()
+    _strip_trailing_comma(out)
+
+
+def loads(text: str) -> Any:
+    """
+    Parse LLM output as JSON, repairing it only if strict parsing fails.
+
+    Raises:
+        ValueError: If the text cannot be repaired (JSONDecodeError is a
+            subclass of ValueError)
+    """
+    return salvage(text)[0]
+
+
+def salvage(text: str) -> Tuple[Any, bool]:
+    """
+    Parse LLM output like `loads`, reporting whether it had to be repaired.
+
+    Fenced or prose-wrapped JSON that parses as is does not count as
+    repaired; truncated or malformed JSON does.
+
+    Returns:
+        (parsed value, repaired)
+
+    Raises:
+        ValueError: If the text cannot be repaired
+    """
+    stripped = extract_fenced(text.strip()).strip()
+    try:
+        return json.loads(stripped, strict=False), False
+    except json.JSONDecodeError:
+        pass
+
+    # Cheap second try: valid JSON surrounded by prose
+    start, end = stripped.find("{"), stripped.rfind("}")
+    if 0 <= start < end:
+        try:
+            return json.loads(stripped[start : end + 1], strict=False), False
+        except json.JSONDecodeError:
+            pass
+
+    return json.loads(repair_json(stripped), strict=False), True
+
+
+def fill_missing(
+    data: Dict[str, Any],
+    model: Type[BaseModel],
+    defaults: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Complete a parsed answer against a pydantic model.
+
+    Missing required fields take their value from `defaults` or, for lists,
+    become empty lists; incomplete items of lists of models are dropped and
+    an incomplete optional sub-object is removed. Required fields that
+    cannot be filled are left missing for validation to report.
+
+    Args:
+        data: Parsed (possibly salvaged) answer
+        model: Model the answer must validate against
+        defaults: Fallback values for missing top-level fields
+
+    Returns:
+        The completed answer (a new dict)
+    """
+    result = dict(data)
+    for name, field in model.model_fields.items():
+        annotation = _unwrap_optional(field.annotation)
+        value = result.get(name)
+
+        if value is None:
+            if not field.is_required():
+                continue
+            if defaults and name in defaults:
+                result[name] = defaults[name]
+            elif typing.get_origin(annotation) in (list, List):
+                result[name] = []
+            continue
+
+        submodel = _model_of(annotation)
+        if submodel is not None and isinstance(value, dict):
+            filled = fill_missing(value, submodel)
+            if _is_complete(filled, submodel):
+                result[name] = filled
+            elif not field.is_required():
+                del result[name]
+            continue
+
+        item_model = _model_of(_list_item(annotation))
+        if item_model is not None and isinstance(value, list):
+            items = [fill_missing(v, item_model) for v in value if isinstance(v, dict)]
+            result[name] = [v for v in items if _is_complete(v, item_model)]
+
+    return result
+
+
+def _unwrap_optional(annotation: Any) -> Any:
+    args = [a for a in typing.get_args(annotation) if a is not type(None)]
+    if typing.get_origin(annotation) is typing.Union and len(args) == 1:
+        return args[0]
+    return annotation
+
+
+def _model_of(annotation: Any) -> Optional[Type[BaseModel]]:
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    return None
+
+
+def _list_item(annotation: Any) -> Any:
+    if typing.get_origin(annotation) in (list, List):
+        args = typing.get_args(annotation)
+        return args[0] if args else None
+    return None
+
+
+def _is_complete(data: Dict[str, Any], model: Type[BaseModel]) -> bool:
+    return all(
+        data.get(name) is not None
+        for name, field in model.model_fields.items()
+        if field.is_required()
+    )
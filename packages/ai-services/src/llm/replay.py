@@ -0,0 +1,237 @@
+"""
+Record and replay provider calls for deterministic performance runs.
+
+In record mode every provider answer is appended to a JSON Lines file
+(gzip-compressed when the path ends in .gz), keyed by a hash of the
+request, together with the observed latency and, for streams, the time
+each delta arrived. In replay mode the same requests are answered from
+the file after the recorded delay, optionally sped up, so caching,
+hedging and timeout settings can be compared on identical traffic
+without calling paid APIs.
+
+Routing, hedging, retries, circuits and rate limits still run during
+replay; only the provider I/O is replaced.
+"""
+import asyncio
+import gzip
+import json
+import logging
+import os
+from dataclasses import dataclass
+from typing import IO, Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from ..cache.response_cache import canonical_hash
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayMissError(LookupError):
+    """A request has no recording to replay."""
+
+
+@dataclass
+class Recording:
+    """One recorded provider answer."""
+
+    provider: str
+    model: str
+    latency: float  # seconds until the full answer
+    response: Any  # text, structured answer (dict) or embedding
+    chunks: Optional[List[Tuple[float, str]]] = None  # (seconds since start, delta)
+
+    def to_line(self, key: str) -> str:
+        # Short field names keep the file compact
+        record: Dict[str, Any] = {
+            "k": key,
+            "p": self.provider,
+            "m": self.model,
+            "l": round(self.latency, 4),
+            "r": self.response,
+        }
+        if self.chunks is not None:
+            record["c"] = [[round(offset, 4), delta] for offset, delta in self.chunks]
+        return json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+    @classmethod
+    def from_line(cls, line: str) -> Tuple[str, "Recording"]:
+        record = json.loads(line)
+        chunks = [(offset, delta) for offset, delta in record["c"]] if "c" in record else None
+        return record["k"], cls(record["p"], record["m"], record["l"], record["r"], chunks)
+
+
+def request_key(kind: str, **request: Any) -> str:
+    """
+    Key of a provider request, independent of the provider that serves it.
+
+    Args:
+        kind: Call type (complete, stream, vision, embed)
+        **request: Everything that determines the answer (prompts, sampling, schema)
+
+    Returns:
+        Hex digest
+    """
+    return canonical_hash({"kind": kind, **request})
+
+
+def _open(path: str, mode: str) -> IO[str]:
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class ReplayStore:
+    """
+    Recorded provider answers by request key.
+
+    A key recorded several times keeps every sample; replay cycles through
+    them, so repeated prompts keep their spread of latencies. Replay
+    prefers samples from the provider being called.
+
+    Args:
+        path: Recording file (JSON Lines, gzip if it ends in .gz)
+        mode: record or replay
+        speed: Replay time divisor (2 = twice as fast); 0 answers without delay
+    """
+
+    def __init__(self, path: str, mode: str, speed: float = 1.0):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown replay mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.speed = speed
+        self._recordings: Dict[str, List[Recording]] = {}
+        self._next: Dict[str, int] = {}
+        self._file: Optional[IO[str]] = None
+        self.recorded = 0
+        self.replayed = 0
+        self.misses = 0
+
+        if self.replaying:
+            self.load()
+        else:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = _open(path, "a")
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    @property
+    def providers(self) -> Set[str]:
+        """Providers that answered at least one recorded request."""
+        return {r.provider for samples in self._recordings.values() for r in samples}
+
+    def load(self) -> int:
+        """
+        Read the recording file.
+
+        Returns:
+            Number of recordings loaded (0 if the file does not exist)
+        """
+        loaded = 0
+        if not os.path.exists(self.path):
+            logger.warning(f"No LLM recording at {self.path}; every request will miss")
+            return 0
+        with _open(self.path, "r") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    key, recording = Recording.from_line(line)
+                except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+                    continue
+                self._recordings.setdefault(key, []).append(recording)
+                loaded += 1
+        logger.info(f"Loaded {loaded} LLM recordings ({len(self._recordings)} requests)")
+        return loaded
+
+    def record(self, key: str, recording: Recording) -> None:
+        """Append a recording (record mode only)."""
+        if self._file is None:
+            return
+        self._file.write(recording.to_line(key))
+        self.recorded += 1
+
+    def require(self, key: str) -> None:
+        """
+        Raises:
+            ReplayMissError: If nothing was recorded for the key
+        """
+        if key not in self._recordings:
+            self.misses += 1
+            raise ReplayMissError(f"No recording for request {key[:12]}")
+
+    def lookup(self, key: str, provider: Optional[str] = None) -> Recording:
+        """
+        Next recording for a key, preferring the given provider's samples.
+
+        Raises:
+            ReplayMissError: If nothing was recorded for the key
+        """
+        self.require(key)
+        samples = self._recordings[key]
+        matching = [r for r in samples if r.provider == provider] or samples
+        index = self._next.get(key, 0)
+        self._next[key] = index + 1
+        return matching[index % len(matching)]
+
+    async def _wait(self, seconds: float) -> None:
+        if self.speed > 0 and seconds > 0:
+            await asyncio.sleep(seconds / self.speed)
+
+    async def replay(self, key: str, provider: Optional[str] = None) -> Recording:
+        """
+        Answer from the recording after its recorded latency.
+
+        Raises:
+            ReplayMissError: If nothing was recorded for the key
+        """
+        recording = self.lookup(key, provider)
+        await self._wait(recording.latency)
+        self.replayed += 1
+        return recording
+
+    async def replay_stream(self, key: str, provider: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Yield recorded deltas with their original spacing.
+
+        Raises:
+            ReplayMissError: If nothing was recorded for the key
+        """
+        recording = self.lookup(key, provider)
+        chunks = recording.chunks or [(recording.latency, recording.response)]
+        elapsed = 0.0
+        for offset, delta in chunks:
+            await self._wait(offset - elapsed)
+            elapsed = offset
+            yield delta
+        self.replayed += 1
+
+    async def record_stream(
+        self, key: str, provider: str, model: str, deltas: AsyncIterator[str]
+    ) -> AsyncIterator[str]:
+        """Pass deltas through, recording when each arrived; only complete streams are kept."""
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        chunks: List[Tuple[float, str]] = []
+        async for delta in deltas:
+            chunks.append((loop.time() - start, delta))
+            yield delta
+        text = "".join(delta for _, delta in chunks)
+        self.record(key, Recording(provider, model, loop.time() - start, text, chunks))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "requests": len(self._recordings),
+            "recorded": self.recorded,
+            "replayed": self.replayed,
+            "misses": self.misses,
+        }
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,185 @@
+"""
+Latency-aware provider routing with per-provider circuit breakers.
+"""
+import logging
+import time
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(str, Enum):
+    """Circuit breaker states."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class NoHealthyProviderError(RuntimeError):
+    """Raised when every configured provider has an open circuit."""
+
+
+class ProviderHealth:
+    """
+    Health statistics and circuit state for one provider.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = CircuitState.CLOSED
+        self.ewma_latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.successes = 0
+        self.failures = 0
+        self.reachable = True  # from the background dependency checks
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state.value,
+            "ewma_latency_ms": (
+                round(self.ewma_latency * 1000, 1) if self.ewma_latency is not None else None
+            ),
+            "error_rate": round(self.error_rate, 4),
+            "consecutive_failures": self.consecutive_failures,
+            "successes": self.successes,
+            "failures": self.failures,
+            "reachable": self.reachable,
+        }
+
+
+class ProviderRouter:
+    """
+    Chooses the healthiest provider for each call.
+
+    Latency and error rate are exponentially weighted moving averages. A
+    provider's circuit opens after `failure_threshold` consecutive failures
+    or when its error rate exceeds `error_rate_threshold`; open providers are
+    skipped without a call. After `open_seconds` one probe call is let
+    through (half-open) and its outcome closes or re-opens the circuit.
+
+    Providers that failed the last background health check are still
+    offered, but after every reachable one.
+    """
+
+    def __init__(
+        self,
+        providers: List[str],
+        alpha: float = 0.2,
+        failure_threshold: int = 3,
+        error_rate_threshold: float = 0.5,
+        min_calls: int = 10,
+        open_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.providers: Dict[str, ProviderHealth] = {p: ProviderHealth(p) for p in providers}
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self._clock = clock
+
+    def _refresh(self, health: ProviderHealth) -> None:
+        if (
+            health.state == CircuitState.OPEN
+            and self._clock() - health.opened_at >= self.open_seconds
+        ):
+            health.state = CircuitState.HALF_OPEN
+            health.probe_in_flight = False
+            logger.info(f"Circuit for {health.name} is half-open")
+
+    def _score(self, health: ProviderHealth) -> float:
+        latency = health.ewma_latency if health.ewma_latency is not None else 0.0
+        return latency * (1.0 + 4.0 * health.error_rate)
+
+    def order(self, preferred: Optional[str] = None, fastest: bool = False) -> List[str]:
+        """
+        Providers to try, best first. Providers with open circuits are omitted.
+
+        Args:
+            preferred: Provider requested by the caller, tried first if usable
+            fastest: Rank by latency alone instead of penalizing error rate,
+                for calls where time matters most (suspected emergencies)
+        """
+        candidates = []
+        for index, health in enumerate(self.providers.values()):
+            self._refresh(health)
+            if health.state == CircuitState.OPEN:
+                continue
+            if health.state == CircuitState.HALF_OPEN and health.probe_in_flight:
+                continue
+            score = (health.ewma_latency or 0.0) if fastest else self._score(health)
+            candidates.append(
+                (not health.reachable, health.name != preferred, score, index, health.name)
+            )
+
+        return [name for *_, name in sorted(candidates)]
+
+    def acquire(self, name: str) -> bool:
+        """Reserve a call slot; only one probe may run while half-open."""
+        health = self.providers[name]
+        self._refresh(health)
+        if health.state == CircuitState.OPEN:
+            return False
+        if health.state == CircuitState.HALF_OPEN:
+            if health.probe_in_flight:
+                return False
+            health.probe_in_flight = True
+        return True
+
+    def release(self, name: str) -> None:
+        """Release a slot without an outcome (e.g. the call was cancelled)."""
+        self.providers[name].probe_in_flight = False
+
+    def set_reachable(self, name: str, reachable: bool) -> None:
+        """Record the outcome of a background health check for a provider."""
+        health = self.providers[name]
+        if reachable and not health.reachable:
+            logger.info(f"Provider {name} is reachable again")
+        elif health.reachable and not reachable:
+            logger.warning(f"Provider {name} failed its health check")
+        health.reachable = reachable
+
+    def record_success(self, name: str, latency: float) -> None:
+        health = self.providers[name]
+        health.successes += 1
+        health.consecutive_failures = 0
+        health.probe_in_flight = False
+        health.error_rate *= 1.0 - self.alpha
+        if health.ewma_latency is None:
+            health.ewma_latency = latency
+        else:
+            health.ewma_latency += self.alpha * (latency - health.ewma_latency)
+
+        if health.state != CircuitState.CLOSED:
+            logger.info(f"Circuit for {name} closed")
+            health.state = CircuitState.CLOSED
+
+    def record_failure(self, name: str) -> None:
+        health = self.providers[name]
+        health.failures += 1
+        health.consecutive_failures += 1
+        health.probe_in_flight = False
+        health.error_rate += self.alpha * (1.0 - health.error_rate)
+
+        calls = health.successes + health.failures
+        if (
+            health.state == CircuitState.HALF_OPEN
+            or health.consecutive_failures >= self.failure_threshold
+            or (calls >= self.min_calls and health.error_rate >= self.error_rate_threshold)
+        ):
+            if health.state != CircuitState.OPEN:
+                logger.warning(f"Circuit for {name} opened")
+            health.state = CircuitState.OPEN
+            health.opened_at = self._clock()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Return per-provider state for health reporting."""
+        for health in self.providers.values():
+            self._refresh(health)
+        return {name: health.snapshot() for name, health in self.providers.items()}
@@ -0,0 +1,197 @@
+"""
+Incremental JSON parsing for streamed LLM completions.
+
+The parser is fed text chunks as they arrive and reports every value
+(scalar or container) as soon as it is complete, together with its path
+from the root. Text before the first brace (prose, markdown fences) and
+`//` or `/* */` comments are skipped.
+"""
+import json
+from typing import Any, Iterable, List, Optional, Tuple
+
+Path = Tuple[Any, ...]
+
+_NUMBER_CHARS = set("0123456789+-.eE")
+_LITERALS = {"true": True, "false": False, "null": None}
+
+
+class _Frame:
+    """An open object or array on the parser stack."""
+
+    __slots__ = ("value", "key", "index")
+
+    def __init__(self, value: Any):
+        self.value = value
+        self.key: Optional[str] = None
+        self.index = 0
+
+    @property
+    def is_object(self) -> bool:
+        return isinstance(self.value, dict)
+
+
+class IncrementalJSONParser:
+    """
+    Streaming JSON parser that emits `(path, value)` pairs on completion.
+    """
+
+    def __init__(self) -> None:
+        self._stack: List[_Frame] = []
+        self._started = False
+        self.done = False
+        self.root: Any = None
+
+        self._string: Optional[List[str]] = None
+        self._escape = False
+        self._token: Optional[List[str]] = None
+        self._comment: Optional[str] = None
+        self._slash = False
+
+    def feed(self, chunk: str) -> List[Tuple[Path, Any]]:
+        """
+        Consume a chunk of text.
+
+        Args:
+            chunk: Next piece of the completion
+
+        Returns:
+            Values completed by this chunk, in completion order
+        """
+        events: List[Tuple[Path, Any]] = []
+        for char in chunk:
+            if self.done:
+                break
+            self._consume(char, events)
+        return events
+
+    def _consume(self, char: str, events: List[Tuple[Path, Any]]) -> None:
+        if self._string is not None:
+            self._consume_string(char, events)
+            return
+
+        if self._comment == "line":
+            if char == "\n":
+                self._comment = None
+            return
+        if self._comment == "block":
+            if self._slash and char == "/":
+                self._comment = None
+            self._slash = char == "*"
+            return
+
+        if self._token is not None:
+            if char.isalpha() or char in _NUMBER_CHARS:
+                self._token.append(char)
+                return
+            self._finish_token(events)
+
+        if self._slash:
+            self._slash = False
+            if char == "/":
+                self._comment = "line"
+                return
+            if char == "*":
+                self._comment = "block"
+                return
+
+        if not self._started:
+            if char in "{[":
+                self._started = True
+                self._open({} if char == "{" else [])
+            return
+
+        if char == "/":
+            self._slash = True
+        elif char == '"':
+            self._string = []
+        elif char in "{[":
+            self._open({} if char == "{" else [])
+        elif char in "}]":
+            self._close(events)
+        elif char == "-" or char.isdigit() or char.isalpha():
+            self._token = [char]
+
+    def _consume_string(self, char: str, events: List[Tuple[Path, Any]]) -> None:
+        if self._escape:
+            self._string.append(char)
+            self._escape = False
+        elif char == "\\":
+            self._string.append(char)
+            self._escape = True
+        elif char == '"':
+            raw = "".join(self._string)
+            self._string = None
+            try:
+                text = json.loads(f'"{raw}"')
+            except json.JSONDecodeError:
+                text = raw
+            top = self._stack[-1] if self._stack else None
+            if top is not None and top.is_object and top.key is None:
+                top.key = text
+            else:
+                self._emit(text, events)
+        else:
+            self._string.append(char)
+
+    def _finish_token(self, events: List[Tuple[Path, Any]]) -> None:
+        raw = "".join(self._token)
+        self._token = None
+        if raw in _LITERALS:
+            self._emit(_LITERALS[raw], events)
+            return
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            return  # Unknown bareword (e.g. echoed template text): ignore
+        if isinstance(value, (int, float)):
+            self._emit(value, events)
+
+    def _current_path(self) -> Path:
+        path: List[Any] = []
+        for frame in self._stack:
+            path.append(frame.key if frame.is_object else frame.index)
+        return tuple(path)
+
+    def _open(self, container: Any) -> None:
+        self._stack.append(_Frame(container))
+
+    def _close(self, events: List[Tuple[Path, Any]]) -> None:
+        if not self._stack:
+            return
+        frame = self._stack.pop()
+        if not self._stack:
+            self.root = frame.value
+            self.done = True
+            events.append(((), frame.value))
+            return
+        self._emit(frame.value, events)
+
+    def _emit(self, value: Any, events: List[Tuple[Path, Any]]) -> None:
+        if not self._stack:
+            return
+        top = self._stack[-1]
+        if top.is_object:
+            if top.key is None:
+                return
+            path = self._current_path()
+            top.value[top.key] = value
+            top.key = None
+        else:
+            path = self._current_path()
+            top.value.append(value)
+            top.index += 1
+        events.append((path, value))
+
+
+def match_path(path: Path, patterns: Iterable[Path]) -> bool:
+    """
+    Whether a value path matches any pattern.
+
+    Patterns are tuples of keys where "*" matches any array index.
+    """
+    for pattern in patterns:
+        if len(pattern) != len(path):
+            continue
+        if all(p == "*" or p == k for p, k in zip(pattern, path, strict=True)):
+            return True
+    return False
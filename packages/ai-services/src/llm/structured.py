@@ -0,0 +1,69 @@
+"""
+Structured-output schemas derived from pydantic models.
+
+OpenAI strict JSON-schema mode and Anthropic forced tool use both make the
+model emit arguments that conform to a schema, so the answer can be
+validated straight into the model instead of scraped out of free text.
+"""
+import copy
+from typing import Any, Dict, Type
+
+from pydantic import BaseModel
+
+# Keys that strict mode rejects or that only add noise to the prompt
+_DROPPED_KEYS = ("title", "default")
+
+
+def strict_json_schema(model: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    JSON schema for a model in the subset accepted by OpenAI strict mode.
+
+    Every object lists all of its properties as required and forbids
+    additional ones; optional fields stay nullable through their `anyOf`.
+
+    Args:
+        model: Pydantic model class
+
+    Returns:
+        JSON schema dict
+    """
+    schema = copy.deepcopy(model.model_json_schema())
+
+    def _tighten(node: Any) -> None:
+        if isinstance(node, dict):
+            for key in _DROPPED_KEYS:
+                # A property literally named "title"/"default" is kept
+                if key in node and not isinstance(node[key], dict):
+                    del node[key]
+            if node.get("type") == "object" and "properties" in node:
+                node["required"] = list(node["properties"])
+                node["additionalProperties"] = False
+            for value in node.values():
+                _tighten(value)
+        elif isinstance(node, list):
+            for value in node:
+                _tighten(value)
+
+    _tighten(schema)
+    return schema
+
+
+def openai_response_format(model: Type[BaseModel]) -> Dict[str, Any]:
+    """`response_format` argument for an OpenAI strict JSON-schema completion."""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": model.__name__,
+            "schema": strict_json_schema(model),
+            "strict": True,
+        },
+    }
+
+
+def anthropic_tool(model: Type[BaseModel]) -> Dict[str, Any]:
+    """Tool definition whose input schema is the model's JSON schema."""
+    return {
+        "name": model.__name__,
+        "description": (model.__doc__ or model.__name__).strip(),
+        "input_schema": strict_json_schema(model),
+    }
@@ -0,0 +1,119 @@
+"""
+Token usage accounting for provider calls.
+"""
+import logging
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from ..telemetry.tracing import set_attributes
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TokenUsage:
+    """Token counts for one provider call."""
+
+    provider: str
+    model: str
+    input_tokens: int = 0
+    cached_input_tokens: int = 0  # served from the provider's prompt cache
+    cache_write_tokens: int = 0  # written to the prompt cache (Anthropic)
+    output_tokens: int = 0
+
+    @property
+    def uncached_input_tokens(self) -> int:
+        return max(0, self.input_tokens - self.cached_input_tokens)
+
+
+def _field(obj: Any, name: str) -> Any:
+    """Read a field from an SDK model or dict, including undeclared extras."""
+    if obj is None:
+        return None
+    if isinstance(obj, dict):
+        return obj.get(name)
+    value = getattr(obj, name, None)
+    if value is None:
+        value = (getattr(obj, "model_extra", None) or {}).get(name)
+    return value
+
+
+def openai_usage(response: Any, model: str) -> TokenUsage:
+    """Extract usage from an OpenAI chat completion."""
+    usage = _field(response, "usage")
+    details = _field(usage, "prompt_tokens_details")
+    return TokenUsage(
+        provider="openai",
+        model=model,
+        input_tokens=_field(usage, "prompt_tokens") or 0,
+        cached_input_tokens=_field(details, "cached_tokens") or 0,
+        output_tokens=_field(usage, "completion_tokens") or 0,
+    )
+
+
+def anthropic_usage(response: Any, model: str) -> TokenUsage:
+    """
+    Extract usage from an Anthropic message.
+
+    Anthropic reports cache reads and writes separately from `input_tokens`,
+    so they are added back to get the total prompt size.
+    """
+    usage = _field(response, "usage")
+    cache_read = _field(usage, "cache_read_input_tokens") or 0
+    cache_write = _field(usage, "cache_creation_input_tokens") or 0
+    return TokenUsage(
+        provider="anthropic",
+        model=model,
+        input_tokens=(_field(usage, "input_tokens") or 0) + cache_read + cache_write,
+        cached_input_tokens=cache_read,
+        cache_write_tokens=cache_write,
+        output_tokens=_field(usage, "output_tokens") or 0,
+    )
+
+
+class UsageTracker:
+    """
+    Aggregates token usage per (provider, model).
+    """
+
+    def __init__(self) -> None:
+        self.totals: Dict[Tuple[str, str], Dict[str, int]] = {}
+        self.last: Optional[TokenUsage] = None
+
+    def record(self, usage: TokenUsage) -> None:
+        self.last = usage
+        totals = self.totals.setdefault(
+            (usage.provider, usage.model),
+            {
+                "calls": 0,
+                "input_tokens": 0,
+                "cached_input_tokens": 0,
+                "cache_write_tokens": 0,
+                "output_tokens": 0,
+            },
+        )
+        totals["calls"] += 1
+        totals["input_tokens"] += usage.input_tokens
+        totals["cached_input_tokens"] += usage.cached_input_tokens
+        totals["cache_write_tokens"] += usage.cache_write_tokens
+        totals["output_tokens"] += usage.output_tokens
+        set_attributes(
+            **{
+                "llm.input_tokens": usage.input_tokens,
+                "llm.cached_input_tokens": usage.cached_input_tokens,
+                "llm.output_tokens": usage.output_tokens,
+            }
+        )
+
+        logger.debug(
+            f"{usage.provider}/{usage.model} tokens: input={usage.input_tokens} "
+            f"cached={usage.cached_input_tokens} uncached={usage.uncached_input_tokens} "
+            f"output={usage.output_tokens}"
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return totals keyed by provider/model, plus the last call."""
+        return {
+            "totals": {f"{p}/{m}": dict(t) for (p, m), t in self.totals.items()},
+            "last": asdict(self.last) if self.last else None,
+        }
@@ -2,13 +2,21 @@
 PetVet AI Services - Main FastAPI Application
 """
 import logging
+import time
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
 from .config import settings
-from .routers import diagnosis, health, nlp
+from .dependencies import build_analyzer, build_health_monitor, build_job_manager
+from .jobs.manager import InteractiveLoad
+from .llm.orchestrator import LLMOrchestrator
+from .llm.ratelimit import Priority, llm_priority
+from .nlp.intent import IntentEngine
+from .routers import diagnosis, health, jobs, metrics, nlp
+from .telemetry.metrics import HTTP_REQUEST_DURATION
+from .telemetry.tracing import create_exporter, parse_traceparent, tracer
 
 # Configure logging
 logging.basicConfig(
@@ -22,8 +30,53 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     """Application lifespan events."""
     logger.info(f"Starting PetVet AI Services in {settings.environment} mode")
+
+    if settings.tracing_exporter != "none":
+        tracer.batch_size = settings.tracing_batch_size
+        tracer.flush_seconds = settings.tracing_flush_seconds
+        tracer.configure(
+            create_exporter(
+                settings.tracing_exporter,
+                settings.otlp_endpoint,
+                settings.tracing_service_name,
+                settings.otlp_headers,
+            )
+        )
+        tracer.start()
+
+    llm = LLMOrchestrator()
+    analyzer = build_analyzer(llm)
+    app.state.llm = llm
+    app.state.analyzer = analyzer
+    app.state.intent_engine = IntentEngine()
+    app.state.interactive_load = InteractiveLoad()
+    app.state.job_manager = None
+    if settings.bulk_jobs_enabled:
+        app.state.job_manager = build_job_manager(analyzer, app.state.interactive_load)
+        app.state.job_manager.start()
+
+    app.state.health_monitor = None
+    if settings.health_monitor_enabled:
+        app.state.health_monitor = build_health_monitor(llm)
+        app.state.health_monitor.start()
+
+    if settings.llm_prewarm_connections > 0:
+        await llm.warm_up()
+    if analyzer.semantic_cache is not None and settings.semantic_cache_persist:
+        await analyzer.semantic_cache.load()
+    if analyzer.image_cache is not None and settings.image_cache_persist:
+        await analyzer.image_cache.load()
+
     yield
+
     logger.info("Shutting down PetVet AI Services")
+    if app.state.health_monitor is not None:
+        await app.state.health_monitor.aclose()
+    if app.state.job_manager is not None:
+        await app.state.job_manager.aclose()
+    await analyzer.aclose()
+    await llm.aclose()
+    await tracer.aclose()
 
 
 app = FastAPI(
@@ -42,8 +95,67 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def classify_request_load(request: Request, call_next):
+    """Set LLM priority by route and count live diagnosis requests for bulk workers."""
+    path = request.url.path
+    if path.startswith("/api/v1/nlp"):
+        with llm_priority(Priority.NLP):
+            return await call_next(request)
+    if not path.startswith("/api/v1/diagnosis") or path.startswith("/api/v1/diagnosis/jobs"):
+        return await call_next(request)
+    async with request.app.state.interactive_load.track():
+        return await call_next(request)
+
+
+if settings.metrics_enabled:
+
+    @app.middleware("http")
+    async def record_request_metrics(request: Request, call_next):
+        """Record request latency by route template (not raw path, to bound cardinality)."""
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            route = request.scope.get("route")
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - start,
+                request.method,
+                route.path if route is not None else "unmatched",
+                str(status),
+            )
+
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Open the server span for a request, joining the caller's trace when it sent one."""
+    parent = parse_traceparent(request.headers.get("traceparent"))
+    with tracer.span(f"{request.method} {request.url.path}", parent=parent, kind="server") as span:
+        response = await call_next(request)
+        if span is not None:
+            route = request.scope.get("route")
+            if route is not None:
+                span.name = f"{request.method} {route.path}"
+            span.set_attributes(
+                **{
+                    "http.method": request.method,
+                    "http.route": route.path if route is not None else "unmatched",
+                    "http.status_code": response.status_code,
+                }
+            )
+            response.headers["traceparent"] = span.traceparent
+        return response
+
+
 # Include routers
 app.include_router(health.router, tags=["health"])
+if settings.metrics_enabled:
+    app.include_router(metrics.router, tags=["metrics"])
+app.include_router(jobs.router, prefix="/api/v1/diagnosis/jobs", tags=["jobs"])
 app.include_router(diagnosis.router, prefix="/api/v1/diagnosis", tags=["diagnosis"])
 app.include_router(nlp.router, prefix="/api/v1/nlp", tags=["nlp"])
 
@@ -0,0 +1 @@
+"""NLP module for message understanding."""
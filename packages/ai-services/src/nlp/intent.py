@@ -0,0 +1,206 @@
+"""
+Keyword-based intent classification for inbound WhatsApp messages.
+
+Keywords are compiled once into a token trie (multi-word phrases) and a
+character trie (prefix patterns such as "vomit*"), so classifying a message
+is a single pass over its tokens. Text is accent- and case-folded and split
+on word boundaries, so "Olá" matches "ola" but "adorei" does not match "dor".
+"""
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+# Weighted keywords per intent. A trailing "*" matches any word starting
+# with the prefix. Weights express how strongly a keyword signals an intent.
+INTENT_KEYWORDS: Dict[str, Dict[str, float]] = {
+    "consultation": {
+        "consulta": 1.0,
+        "doente": 1.0,
+        "sintoma*": 1.0,
+        "dor": 0.8,
+        "vomit*": 1.0,
+        "febre": 1.0,
+        "diarreia": 1.0,
+        "tosse": 0.9,
+        "machuc*": 0.9,
+        "sangr*": 1.0,
+        "nao come": 0.9,
+        "nao esta comendo": 0.9,
+    },
+    "pet_info": {
+        "pet": 0.6,
+        "cachorro": 0.5,
+        "gato": 0.5,
+        "animal": 0.5,
+        "raca": 0.6,
+        "peso": 0.5,
+        "idade": 0.5,
+    },
+    "history": {
+        "historico": 1.0,
+        "registro*": 0.8,
+        "prontuario": 1.0,
+        "consultas anteriores": 1.0,
+    },
+    "subscription": {
+        "assinatura": 1.0,
+        "plano": 0.9,
+        "pagar": 0.9,
+        "pagamento": 0.9,
+        "cancelar": 0.6,
+    },
+    "help": {
+        "ajuda": 1.0,
+        "help": 1.0,
+        "socorro": 1.0,
+        "como funciona": 0.8,
+    },
+    "greeting": {
+        "ola": 0.6,
+        "oi": 0.6,
+        "bom dia": 0.6,
+        "boa tarde": 0.6,
+        "boa noite": 0.6,
+    },
+    "menu": {
+        "menu": 1.0,
+        "inicio": 0.8,
+        "voltar": 0.8,
+    },
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_HITS = "\0"  # trie key holding the (intent, weight, pattern) payloads
+
+
+def normalize(text: str) -> str:
+    """Lowercase and strip accents ("Olá, VÔMITO" -> "ola, vomito")."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return decomposed.encode("ascii", "ignore").decode("ascii")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split normalized text into word tokens."""
+    return _TOKEN_RE.findall(normalize(text))
+
+
+@dataclass
+class IntentResult:
+    """Classification result with the full ranked distribution."""
+
+    intent: str
+    confidence: float
+    ranking: List[Tuple[str, float]] = field(default_factory=list)
+    matches: Dict[str, List[str]] = field(default_factory=dict)
+
+
+class IntentEngine:
+    """
+    Precompiled multi-pattern intent matcher.
+
+    Every intent is scored by the summed weight of its distinct keyword
+    hits. Scores are normalized into a distribution with `prior` mass held
+    back for "unknown", so a single weak hit yields a modest confidence.
+    """
+
+    def __init__(
+        self,
+        keywords: Optional[Dict[str, Dict[str, float]]] = None,
+        prior: float = 0.25,
+        unknown_confidence: float = 0.5,
+    ):
+        self.prior = prior
+        self.unknown_confidence = unknown_confidence
+        self._order = {intent: i for i, intent in enumerate(keywords or INTENT_KEYWORDS)}
+        self._phrases: Dict[str, dict] = {}
+        self._prefixes: Dict[str, dict] = {}
+
+        for intent, patterns in (keywords or INTENT_KEYWORDS).items():
+            for pattern, weight in patterns.items():
+                self._add(intent, pattern, weight)
+
+    def _add(self, intent: str, pattern: str, weight: float) -> None:
+        payload = (intent, weight, pattern)
+        if pattern.endswith("*"):
+            node = self._prefixes
+            for char in normalize(pattern[:-1]):
+                node = node.setdefault(char, {})
+            node.setdefault(_HITS, []).append(payload)
+            return
+
+        node = self._phrases
+        for token in tokenize(pattern):
+            node = node.setdefault(token, {})
+        node.setdefault(_HITS, []).append(payload)
+
+    def _match(self, tokens: List[str]) -> List[Tuple[str, float, str]]:
+        hits: List[Tuple[str, float, str]] = []
+        for i, token in enumerate(tokens):
+            # Phrase trie: walk forward over whole tokens
+            node = self._phrases.get(token)
+            j = i + 1
+            while node is not None:
+                hits.extend(node.get(_HITS, ()))
+                if j >= len(tokens):
+                    break
+                node = node.get(tokens[j])
+                j += 1
+
+            # Prefix trie: walk the characters of this token
+            node = self._prefixes
+            for char in token:
+                node = node.get(char)
+                if node is None:
+                    break
+                hits.extend(node.get(_HITS, ()))
+        return hits
+
+    def classify(self, text: str) -> IntentResult:
+        """
+        Classify a message.
+
+        Args:
+            text: Raw message text
+
+        Returns:
+            Top intent, its confidence and the ranked distribution
+        """
+        scores: Dict[str, float] = {}
+        matches: Dict[str, List[str]] = {}
+        seen: Set[str] = set()
+
+        for intent, weight, pattern in self._match(tokenize(text)):
+            if pattern in seen:
+                continue
+            seen.add(pattern)
+            scores[intent] = scores.get(intent, 0.0) + weight
+            matches.setdefault(intent, []).append(pattern)
+
+        if not scores:
+            return IntentResult(intent="unknown", confidence=self.unknown_confidence)
+
+        total = sum(scores.values()) + self.prior
+        ranking = sorted(
+            ((intent, round(score / total, 4)) for intent, score in scores.items()),
+            key=lambda item: (-item[1], self._order[item[0]]),
+        )
+        return IntentResult(
+            intent=ranking[0][0],
+            confidence=ranking[0][1],
+            ranking=ranking,
+            matches=matches,
+        )
+
+    def classify_batch(self, texts: List[str]) -> List[IntentResult]:
+        """
+        Classify many messages in one pass.
+
+        Args:
+            texts: Raw message texts
+
+        Returns:
+            Results in input order
+        """
+        classify = self.classify
+        return [classify(text) for text in texts]
@@ -1,22 +1,27 @@
 """
 Diagnosis API endpoints for veterinary AI analysis.
 """
+import json
 import logging
-from typing import List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Type
 
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, model_validator
 
-from ..llm.orchestrator import LLMOrchestrator
+from ..dependencies import get_analyzer
 from ..diagnosis.analyzer import VeterinaryAnalyzer
+from ..diagnosis.consultation import ConsultationNotFoundError
+from ..diagnosis.schemas import (
+    Diagnosis,
+    ImageAnalysisResponse,
+    SymptomAnalysisResult,
+    TreatmentResponse,
+)
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# Initialize services
-llm = LLMOrchestrator()
-analyzer = VeterinaryAnalyzer(llm)
-
 
 class PetInfo(BaseModel):
     """Pet information for diagnosis."""
@@ -30,37 +35,25 @@ class PetInfo(BaseModel):
 
 
 class SymptomAnalysisRequest(BaseModel):
-    """Request for symptom analysis."""
+    """
+    Request for symptom analysis.
+
+    Follow-up rounds may omit `symptoms` and `pet_info` and send only the
+    new `clarifying_answers`; the rest is taken from the consultation state.
+    """
 
-    symptoms: str
+    symptoms: Optional[str] = None
     pet_id: str
     consultation_id: str
     pet_info: Optional[PetInfo] = None
     clarifying_answers: Optional[List[str]] = None
 
-
-class Differential(BaseModel):
-    """Differential diagnosis."""
-
-    condition: str
-    probability: int
-
-
-class Diagnosis(BaseModel):
-    """Diagnosis result."""
-
-    primary: str
-    differentials: List[Differential]
-    urgency_level: str
-
-
-class SymptomAnalysisResponse(BaseModel):
-    """Response for symptom analysis."""
-
-    needs_clarification: bool
-    clarifying_questions: Optional[List[str]] = None
-    diagnosis: Optional[Diagnosis] = None
-    confidence: Optional[float] = None
+    @model_validator(mode="after")
+    def _require_symptoms_or_answers(self) -> "SymptomAnalysisRequest":
+        """A request without symptoms must be a follow-up with answers."""
+        if self.symptoms is None and not self.clarifying_answers:
+            raise ValueError("symptoms is required unless clarifying_answers are sent")
+        return self
 
 
 class TreatmentRequest(BaseModel):
@@ -71,27 +64,6 @@ class TreatmentRequest(BaseModel):
     pet_info: Optional[PetInfo] = None
 
 
-class Medication(BaseModel):
-    """Medication in treatment protocol."""
-
-    name: str
-    dosage: str
-    route: str
-    frequency: str
-    duration: str
-    instructions: Optional[str] = None
-
-
-class TreatmentResponse(BaseModel):
-    """Treatment protocol response."""
-
-    medications: List[Medication]
-    supportive_care: List[str]
-    monitoring: List[str]
-    follow_up: str
-    warnings: Optional[List[str]] = None
-
-
 class ImageAnalysisRequest(BaseModel):
     """Request for image analysis."""
 
@@ -101,17 +73,11 @@ class ImageAnalysisRequest(BaseModel):
     context: Optional[str] = None
 
 
-class ImageAnalysisResponse(BaseModel):
-    """Response for image analysis."""
-
-    findings: List[str]
-    concerns: List[str]
-    recommendations: List[str]
-    urgency_level: str
-
-
-@router.post("/analyze", response_model=SymptomAnalysisResponse)
-async def analyze_symptoms(request: SymptomAnalysisRequest):
+@router.post("/analyze", response_model=SymptomAnalysisResult)
+async def analyze_symptoms(
+    request: SymptomAnalysisRequest,
+    analyzer: VeterinaryAnalyzer = Depends(get_analyzer),
+):
     """
     Analyze pet symptoms and provide diagnosis.
     """
@@ -124,16 +90,22 @@ async def analyze_symptoms(request: SymptomAnalysisRequest):
             symptoms=request.symptoms,
             pet_info=request.pet_info.dict() if request.pet_info else None,
             clarifying_answers=request.clarifying_answers,
+            consultation_id=request.consultation_id,
         )
 
-        return SymptomAnalysisResponse(**result)
+        return SymptomAnalysisResult(**result)
+    except ConsultationNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         logger.error(f"Error analyzing symptoms: {e}")
         raise HTTPException(status_code=500, detail="Failed to analyze symptoms")
 
 
 @router.post("/treatment", response_model=TreatmentResponse)
-async def get_treatment_protocol(request: TreatmentRequest):
+async def get_treatment_protocol(
+    request: TreatmentRequest,
+    analyzer: VeterinaryAnalyzer = Depends(get_analyzer),
+):
     """
     Get treatment protocol for a diagnosis.
     """
@@ -145,6 +117,7 @@ async def get_treatment_protocol(request: TreatmentRequest):
         result = await analyzer.get_treatment_protocol(
             diagnosis=request.diagnosis.dict(),
             pet_info=request.pet_info.dict() if request.pet_info else None,
+            consultation_id=request.consultation_id,
         )
 
         return TreatmentResponse(**result)
@@ -153,8 +126,99 @@ async def get_treatment_protocol(request: TreatmentRequest):
         raise HTTPException(status_code=500, detail="Failed to generate treatment")
 
 
+def _sse(event: str, data: Any) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _sse_stream(
+    events: AsyncIterator[Dict[str, Any]],
+    response_model: Type[BaseModel],
+    error_detail: str,
+) -> AsyncIterator[str]:
+    """Render analyzer events as SSE, validating the final result."""
+    try:
+        async for event in events:
+            data = event["data"]
+            if event["event"] == "final":
+                data = response_model(**data).dict()
+            yield _sse(event["event"], data)
+    except Exception as e:
+        logger.error(f"{error_detail}: {e}")
+        yield _sse("error", {"detail": error_detail})
+
+
+def _event_stream_response(body: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(
+        body,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/analyze/stream")
+async def stream_symptom_analysis(
+    request: SymptomAnalysisRequest,
+    analyzer: VeterinaryAnalyzer = Depends(get_analyzer),
+):
+    """
+    Stream symptom analysis as Server-Sent Events.
+
+    Emits a `triage` event right away when local red flags are found,
+    `partial` events (e.g. diagnosis.urgency_level) as soon as they are
+    generated, then a `final` event with the validated SymptomAnalysisResult.
+
+    Unlike /analyze, the answer always comes from the large model as plain
+    streamed text (no structured output or model cascade), so field order
+    can be observed; the final result goes through the same JSON repair and
+    schema filling as an unstructured /analyze answer.
+    """
+    logger.info(f"Streaming symptom analysis for consultation {request.consultation_id}")
+
+    try:
+        events = await analyzer.start_symptom_stream(
+            symptoms=request.symptoms,
+            pet_info=request.pet_info.dict() if request.pet_info else None,
+            clarifying_answers=request.clarifying_answers,
+            consultation_id=request.consultation_id,
+        )
+    except ConsultationNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return _event_stream_response(
+        _sse_stream(events, SymptomAnalysisResult, "Failed to analyze symptoms")
+    )
+
+
+@router.post("/treatment/stream")
+async def stream_treatment_protocol(
+    request: TreatmentRequest,
+    analyzer: VeterinaryAnalyzer = Depends(get_analyzer),
+):
+    """
+    Stream treatment protocol as Server-Sent Events.
+
+    Emits each medication as a `partial` event, then a `final` event with the
+    validated TreatmentResponse. As with /analyze/stream, the large model
+    answers as plain text, repaired and filled like an unstructured
+    /treatment answer.
+    """
+    logger.info(f"Streaming treatment for consultation {request.consultation_id}")
+
+    events = analyzer.stream_treatment_protocol(
+        diagnosis=request.diagnosis.dict(),
+        pet_info=request.pet_info.dict() if request.pet_info else None,
+        consultation_id=request.consultation_id,
+    )
+    return _event_stream_response(
+        _sse_stream(events, TreatmentResponse, "Failed to generate treatment")
+    )
+
+
 @router.post("/image", response_model=ImageAnalysisResponse)
-async def analyze_image(request: ImageAnalysisRequest):
+async def analyze_image(
+    request: ImageAnalysisRequest,
+    analyzer: VeterinaryAnalyzer = Depends(get_analyzer),
+):
     """
     Analyze pet image for visual findings.
     """
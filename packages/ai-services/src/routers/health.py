@@ -2,11 +2,20 @@
 Health check endpoints.
 """
 from datetime import datetime
+from typing import Optional
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+
+from ..dependencies import get_analyzer, get_health_monitor, get_llm
+from ..diagnosis.analyzer import VeterinaryAnalyzer
+from ..llm.orchestrator import LLMOrchestrator
+from ..telemetry.health import UNHEALTHY, DependencyMonitor
 
 router = APIRouter()
 
+CIRCUIT_STATUS = {"closed": "healthy", "half_open": "degraded", "open": "unhealthy"}
+
 
 @router.get("/health")
 async def health_check():
@@ -25,23 +34,61 @@ async def liveness_check():
 
 
 @router.get("/health/ready")
-async def readiness_check():
-    """Readiness probe for Kubernetes/ECS."""
-    # TODO: Check Redis connection, LLM provider availability
+async def readiness_check(monitor: Optional[DependencyMonitor] = Depends(get_health_monitor)):
+    """
+    Readiness probe for Kubernetes/ECS.
+
+    Answers from the background monitor's latest results, so a probe never
+    touches Redis or the providers. Returns 503 until the first checks
+    finish, and while Redis or every provider is down or the event loop lags.
+    """
+    if monitor is not None:
+        ready, reasons = monitor.readiness()
+        if not ready:
+            return JSONResponse(
+                status_code=503, content={"status": "not_ready", "reasons": reasons}
+            )
     return {"status": "ready"}
 
 
 @router.get("/health/detailed")
-async def detailed_health_check():
+async def detailed_health_check(
+    llm: LLMOrchestrator = Depends(get_llm),
+    analyzer: VeterinaryAnalyzer = Depends(get_analyzer),
+    monitor: Optional[DependencyMonitor] = Depends(get_health_monitor),
+):
     """Detailed health check with dependencies."""
-    # TODO: Check Redis connection, LLM provider availability
+    dependencies = monitor.snapshot() if monitor is not None else {}
+    checked = dependencies.get("providers", {})
+    providers = llm.router.snapshot()
+    checks = {}
+    for name in ("openai", "anthropic"):
+        if name not in providers:
+            checks[name] = "not_configured"
+        elif checked.get(name, {}).get("status") == UNHEALTHY:
+            checks[name] = UNHEALTHY
+        else:
+            checks[name] = CIRCUIT_STATUS[providers[name]["state"]]
+    checks["redis"] = dependencies["redis"]["status"] if dependencies else "unknown"
+
+    provider_states = [checks[name] for name in providers]
+    if "healthy" in provider_states:
+        status = "healthy" if all(s == "healthy" for s in provider_states) else "degraded"
+    else:
+        status = "degraded" if "degraded" in provider_states else "unhealthy"
+    if checks["redis"] == UNHEALTHY and status == "healthy":
+        status = "degraded"
+
     return {
-        "status": "healthy",
+        "status": status,
         "service": "petvet-ai-services",
         "timestamp": datetime.utcnow().isoformat() + "Z",
-        "checks": {
-            "openai": "healthy",
-            "anthropic": "healthy",
-            "redis": "healthy",
-        },
+        "checks": checks,
+        "providers": providers,
+        "dependencies": dependencies,
+        "rate_limits": llm.rate_limiter.snapshot() if llm.rate_limiter is not None else {},
+        "caches": analyzer.cache_stats(),
+        "cascade": analyzer.cascade.stats() if analyzer.cascade is not None else {},
+        "prefetch": analyzer.prefetcher.stats() if analyzer.prefetcher is not None else {},
+        "replay": llm.replay.stats() if llm.replay is not None else {},
     }
@@ -0,0 +1,142 @@
+"""
+Bulk diagnosis job endpoints.
+
+Jobs are submitted as JSON lines (one SymptomAnalysisRequest per line) and
+processed in the background at lower priority than interactive requests.
+"""
+import json
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
+
+from ..config import settings
+from ..dependencies import get_job_manager
+from ..jobs.manager import BulkJobManager
+from .diagnosis import SymptomAnalysisRequest
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Result lines fetched from the store per round trip while streaming
+_RESULTS_PAGE = 500
+
+
+class JobSubmitResponse(BaseModel):
+    """Response for an accepted bulk job."""
+
+    job_id: str
+    status: str
+    total: int
+
+
+class JobStatusResponse(BaseModel):
+    """Status and progress of a bulk job."""
+
+    job_id: str
+    status: str
+    total: int
+    completed: int
+    failed: int
+    progress: float
+    created_at: float
+    finished_at: Optional[float] = None
+    meta: Dict[str, Any] = {}
+
+
+def _require_manager(manager: Optional[BulkJobManager]) -> BulkJobManager:
+    if manager is None:
+        raise HTTPException(status_code=503, detail="Bulk jobs are disabled")
+    return manager
+
+
+def _parse_lines(body: bytes) -> List[Dict[str, Any]]:
+    """Validate a JSON-lines body into request payloads, reporting the bad line."""
+    items: List[Dict[str, Any]] = []
+    for number, raw in enumerate(body.decode("utf-8").splitlines(), start=1):
+        if not raw.strip():
+            continue
+        if len(items) >= settings.bulk_jobs_max_items:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Job exceeds {settings.bulk_jobs_max_items} items",
+            )
+        try:
+            request = SymptomAnalysisRequest.model_validate_json(raw)
+        except ValidationError as e:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Line {number}: {e.errors(include_url=False)}",
+            )
+        if request.symptoms is None:
+            # Items have no consultation state to continue from
+            raise HTTPException(status_code=422, detail=f"Line {number}: symptoms is required")
+        items.append(request.dict(exclude_none=True))
+    return items
+
+
+@router.post("", response_model=JobSubmitResponse, status_code=202)
+async def submit_job(
+    request: Request,
+    clinic_id: Optional[str] = Query(None),
+    manager: Optional[BulkJobManager] = Depends(get_job_manager),
+):
+    """
+    Submit a batch of symptom analyses as JSON lines.
+    """
+    manager = _require_manager(manager)
+    try:
+        items = _parse_lines(await request.body())
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Body must be UTF-8 JSON lines")
+    if not items:
+        raise HTTPException(status_code=422, detail="Job has no items")
+
+    job_id = await manager.submit(items, meta={"clinic_id": clinic_id} if clinic_id else None)
+    return JobSubmitResponse(job_id=job_id, status="queued", total=len(items))
+
+
+@router.get("/{job_id}", response_model=JobStatusResponse)
+async def get_job(
+    job_id: str,
+    manager: Optional[BulkJobManager] = Depends(get_job_manager),
+):
+    """
+    Get bulk job status and progress.
+    """
+    job = await _require_manager(manager).status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/{job_id}/results")
+async def get_job_results(
+    job_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(10_000, ge=1, le=100_000),
+    manager: Optional[BulkJobManager] = Depends(get_job_manager),
+):
+    """
+    Stream finished results as JSON lines, in completion order.
+
+    Each line has the item `index` from the submitted body plus either
+    `result` or `error`; poll with `offset` to fetch newer lines.
+    """
+    manager = _require_manager(manager)
+    if await manager.status(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def lines() -> AsyncIterator[str]:
+        position, end = offset, offset + limit
+        while position < end:
+            page = await manager.results(job_id, position, min(_RESULTS_PAGE, end - position))
+            for line in page:
+                yield json.dumps(line, ensure_ascii=False) + "\n"
+            if len(page) < _RESULTS_PAGE:
+                return
+            position += len(page)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
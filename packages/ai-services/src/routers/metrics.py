@@ -0,0 +1,123 @@
+"""
+Prometheus metrics endpoint.
+"""
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from ..dependencies import get_analyzer, get_health_monitor, get_llm
+from ..diagnosis.analyzer import VeterinaryAnalyzer
+from ..llm.orchestrator import LLMOrchestrator
+from ..telemetry.health import UNHEALTHY, DependencyMonitor
+from ..telemetry.metrics import REGISTRY, Sample, render_family
+
+router = APIRouter()
+
+CIRCUIT_STATE_VALUES = {"closed": 0, "half_open": 1, "open": 2}
+TOKEN_TYPES = ("input_tokens", "cached_input_tokens", "cache_write_tokens", "output_tokens")
+
+
+def _service_families(
+    llm: LLMOrchestrator,
+    analyzer: VeterinaryAnalyzer,
+    monitor: Optional[DependencyMonitor] = None,
+) -> List[str]:
+    """Render the counters the services already keep, read at scrape time."""
+    tokens: List[Sample] = []
+    for (provider, model), totals in llm.usage.totals.items():
+        for kind in TOKEN_TYPES:
+            tokens.append(
+                (
+                    {"provider": provider, "model": model, "type": kind[: -len("_tokens")]},
+                    totals[kind],
+                )
+            )
+
+    providers = llm.router.snapshot()
+    circuits: List[Sample] = [
+        ({"provider": name}, CIRCUIT_STATE_VALUES[state["state"]])
+        for name, state in providers.items()
+    ]
+
+    cache_lookups: List[Sample] = []
+    for name, stats in analyzer.cache_stats().items():
+        cache_lookups.append(({"cache": name, "result": "hit"}, stats["hits"]))
+        cache_lookups.append(({"cache": name, "result": "miss"}, stats["misses"]))
+
+    limits: Dict[str, Any] = llm.rate_limiter.snapshot() if llm.rate_limiter is not None else {}
+    admissions: List[Sample] = []
+    waiting: List[Sample] = []
+    for provider, queue in limits.items():
+        admissions.append(({"provider": provider, "result": "granted"}, queue["granted"]))
+        admissions.append(({"provider": provider, "result": "rejected"}, queue["rejected"]))
+        waiting.append(({"provider": provider}, queue["waiting"]))
+
+    cascade: List[Sample] = []
+    if analyzer.cascade is not None:
+        for kind, stats in analyzer.cascade.stats().items():
+            for outcome in ("fast_answers", "escalations", "direct_to_large"):
+                cascade.append(({"kind": kind, "outcome": outcome}, stats[outcome]))
+
+    prefetch: List[Sample] = []
+    if analyzer.prefetcher is not None:
+        prefetch = [
+            ({"outcome": outcome}, count)
+            for outcome, count in analyzer.prefetcher.stats().items()
+            if outcome != "pending"
+        ]
+
+    dependencies: List[Sample] = []
+    loop_lag: List[Sample] = []
+    if monitor is not None:
+        checked = monitor.snapshot()
+        for name, result in {"redis": checked.get("redis"), **checked.get("providers", {})}.items():
+            if result is not None and result["status"] != "not_configured":
+                dependencies.append(({"dependency": name}, int(result["status"] != UNHEALTHY)))
+        loop_lag = [({}, monitor.loop_lag)]
+
+    return [
+        render_family("petvet_llm_tokens_total", "counter", "Tokens reported by providers", tokens),
+        render_family(
+            "petvet_llm_circuit_state",
+            "gauge",
+            "Provider circuit (0 closed, 1 half-open, 2 open)",
+            circuits,
+        ),
+        render_family(
+            "petvet_cache_lookups_total", "counter", "Analyzer cache lookups", cache_lookups
+        ),
+        render_family(
+            "petvet_llm_rate_limit_admissions_total",
+            "counter",
+            "Provider calls admitted or rejected by the rate limiter",
+            admissions,
+        ),
+        render_family(
+            "petvet_llm_rate_limit_waiting", "gauge", "Calls waiting for provider budget", waiting
+        ),
+        render_family("petvet_cascade_answers_total", "counter", "Model cascade outcomes", cascade),
+        render_family(
+            "petvet_treatment_prefetch_total", "counter", "Treatment prefetch outcomes", prefetch
+        ),
+        render_family(
+            "petvet_dependency_up",
+            "gauge",
+            "Last background check of a dependency (1 up, 0 down)",
+            dependencies,
+        ),
+        render_family(
+            "petvet_event_loop_lag_seconds", "gauge", "Latest event-loop lag sample", loop_lag
+        ),
+    ]
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics(
+    llm: LLMOrchestrator = Depends(get_llm),
+    analyzer: VeterinaryAnalyzer = Depends(get_analyzer),
+    monitor: Optional[DependencyMonitor] = Depends(get_health_monitor),
+):
+    """Metrics in Prometheus text exposition format."""
+    body = REGISTRY.render() + "".join(_service_families(llm, analyzer, monitor))
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -4,16 +4,16 @@ NLP endpoints for intent classification and entity extraction.
 import logging
 from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, Field
 
-from ..llm.orchestrator import LLMOrchestrator
+from ..config import settings
+from ..dependencies import get_intent_engine
+from ..nlp.intent import IntentEngine, IntentResult
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-llm = LLMOrchestrator()
-
 
 class IntentRequest(BaseModel):
     """Request for intent classification."""
@@ -22,49 +22,81 @@ class IntentRequest(BaseModel):
     context: Optional[Dict[str, Any]] = None
 
 
+class IntentScore(BaseModel):
+    """Score of one candidate intent."""
+
+    intent: str
+    score: float
+
+
 class IntentResponse(BaseModel):
     """Response for intent classification."""
 
     intent: str
     confidence: float
     entities: Optional[Dict[str, str]] = None
+    ranking: List[IntentScore] = []
+
+
+class BatchIntentRequest(BaseModel):
+    """Request for batch intent classification."""
+
+    items: List[IntentRequest] = Field(..., min_length=1, max_length=settings.nlp_batch_max_items)
+
+
+class BatchIntentResponse(BaseModel):
+    """Batch intent classification results, in request order."""
+
+    results: List[IntentResponse]
+
+
+def _to_response(result: IntentResult) -> IntentResponse:
+    return IntentResponse(
+        intent=result.intent,
+        confidence=result.confidence,
+        entities=None,
+        ranking=[IntentScore(intent=i, score=s) for i, s in result.ranking],
+    )
 
 
 @router.post("/intent", response_model=IntentResponse)
-async def classify_intent(request: IntentRequest):
+async def classify_intent(
+    request: IntentRequest,
+    engine: IntentEngine = Depends(get_intent_engine),
+):
     """
     Classify user intent from natural language text.
     """
     try:
         logger.info(f"Classifying intent for text: {request.text[:50]}...")
 
-        # Simple intent classification
-        text_lower = request.text.lower()
-
-        intents = {
-            "consultation": ["consulta", "doente", "sintoma", "dor", "vomito", "febre"],
-            "pet_info": ["pet", "cachorro", "gato", "animal"],
-            "history": ["historico", "registro", "prontuario"],
-            "subscription": ["assinatura", "plano", "pagar"],
-            "help": ["ajuda", "help", "socorro"],
-            "greeting": ["ola", "oi", "bom dia", "boa tarde", "boa noite"],
-            "menu": ["menu", "inicio", "voltar"],
-        }
-
-        detected_intent = "unknown"
-        confidence = 0.5
-
-        for intent, keywords in intents.items():
-            if any(keyword in text_lower for keyword in keywords):
-                detected_intent = intent
-                confidence = 0.85
-                break
-
-        return IntentResponse(
-            intent=detected_intent,
-            confidence=confidence,
-            entities=None,
-        )
+        return _to_response(engine.classify(request.text))
     except Exception as e:
         logger.error(f"Error classifying intent: {e}")
         raise HTTPException(status_code=500, detail="Failed to classify intent")
+
+
+@router.post("/intent/batch", response_model=BatchIntentResponse)
+async def classify_intent_batch(
+    request: BatchIntentRequest,
+    engine: IntentEngine = Depends(get_intent_engine),
+):
+    """
+    Classify many texts in one request; results keep the input order.
+    """
+    total_chars = sum(len(item.text) for item in request.items)
+    if total_chars > settings.nlp_batch_max_chars:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch text exceeds {settings.nlp_batch_max_chars} characters",
+        )
+
+    try:
+        logger.info(f"Classifying intent batch of {len(request.items)} texts")
+
+        results = engine.classify_batch([item.text for item in request.items])
+
+        return BatchIntentResponse(results=[_to_response(r) for r in results])
+    except Exception as e:
+        logger.error(f"Error classifying intent batch: {e}")
+        raise HTTPException(status_code=500, detail="Failed to classify intents")
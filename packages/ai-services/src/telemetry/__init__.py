@@ -0,0 +1 @@
+"""Metrics, tracing and dependency health for PetVet AI Services."""
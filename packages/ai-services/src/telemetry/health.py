@@ -0,0 +1,184 @@
+"""
+Background dependency health checks.
+
+A monitor task checks Redis, each LLM provider and event-loop lag on an
+interval and keeps the results in memory, so readiness probes answer in
+constant time without touching any dependency. Provider results are also
+passed to the router, which tries unreachable providers last.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from redis.asyncio import Redis
+
+from ..llm.router import ProviderRouter
+
+logger = logging.getLogger(__name__)
+
+HEALTHY = "healthy"
+DEGRADED = "degraded"  # reachable but throttling (HTTP 429)
+UNHEALTHY = "unhealthy"
+
+Check = Callable[[], Awaitable[Any]]
+
+
+class DependencyMonitor:
+    """
+    Periodically checks dependencies and keeps the latest results.
+
+    Between checks the task sleeps in short steps and measures how late
+    each wake-up is, which is the event-loop lag requests are seeing.
+
+    Args:
+        redis: Client to PING, or None when Redis is not used; closed with the monitor
+        provider_checks: Provider name -> coroutine function making a cheap provider call
+        router: Router told which providers passed their last check
+        interval: Seconds between dependency checks
+        timeout: Seconds before a single check counts as failed
+        max_loop_lag: Loop lag in seconds above which the task is not ready
+        redis_required: Whether a Redis outage makes the task not ready; otherwise
+            it only shows in the snapshot
+        lag_sample_seconds: How often loop lag is sampled
+    """
+
+    def __init__(
+        self,
+        redis: Optional[Redis] = None,
+        provider_checks: Optional[Dict[str, Check]] = None,
+        router: Optional[ProviderRouter] = None,
+        interval: float = 15.0,
+        timeout: float = 3.0,
+        max_loop_lag: float = 0.5,
+        redis_required: bool = False,
+        lag_sample_seconds: float = 0.5,
+    ):
+        self.redis = redis
+        self.provider_checks = provider_checks or {}
+        self.router = router
+        self.interval = interval
+        self.timeout = timeout
+        self.max_loop_lag = max_loop_lag
+        self.redis_required = redis_required
+        self.lag_sample_seconds = lag_sample_seconds
+        self.loop_lag = 0.0
+        self._max_lag = 0.0
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._not_ready: List[str] = []
+        self._checked_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start the background check loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._watch(), name="dependency-monitor")
+
+    async def aclose(self) -> None:
+        """Stop the check loop and close the Redis client."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.redis is not None:
+            await self.redis.aclose()
+
+    async def _watch(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await self.check()
+            except Exception as e:
+                logger.error(f"Dependency health check failed: {e}")
+
+            deadline = loop.time() + self.interval
+            while loop.time() < deadline:
+                started = loop.time()
+                await asyncio.sleep(self.lag_sample_seconds)
+                self.loop_lag = max(0.0, loop.time() - started - self.lag_sample_seconds)
+                self._max_lag = max(self._max_lag, self.loop_lag)
+
+    async def _run(self, check: Check) -> Dict[str, Any]:
+        start = time.perf_counter()
+        error = None
+        try:
+            await asyncio.wait_for(check(), self.timeout)
+            status = HEALTHY
+        except asyncio.TimeoutError:
+            status, error = UNHEALTHY, f"timed out after {self.timeout}s"
+        except Exception as e:
+            # SDK errors carry the HTTP status; 429 means up but throttling
+            status = DEGRADED if getattr(e, "status_code", None) == 429 else UNHEALTHY
+            error = f"{type(e).__name__}: {e}"[:200]
+
+        result: Dict[str, Any] = {
+            "status": status,
+            "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+        }
+        if error is not None:
+            result["error"] = error
+        return result
+
+    async def check(self) -> Dict[str, Any]:
+        """
+        Run every check concurrently and publish the results.
+
+        Returns:
+            The new snapshot
+        """
+        names = list(self.provider_checks)
+        checks = [self._run(self.provider_checks[name]) for name in names]
+        if self.redis is not None:
+            checks.append(self._run(self.redis.ping))
+        results = await asyncio.gather(*checks)
+
+        providers = dict(zip(names, results[: len(names)], strict=True))
+        redis = results[-1] if self.redis is not None else {"status": "not_configured"}
+        if self.router is not None:
+            for name, result in providers.items():
+                if name in self.router.providers:
+                    self.router.set_reachable(name, result["status"] != UNHEALTHY)
+
+        not_ready = []
+        if self.redis_required and redis["status"] == UNHEALTHY:
+            not_ready.append("redis")
+        if providers and all(r["status"] == UNHEALTHY for r in providers.values()):
+            not_ready.append("llm_providers")
+
+        self._snapshot = {
+            "checked_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+            "redis": redis,
+            "providers": providers,
+            "event_loop": {
+                "lag_ms": round(self.loop_lag * 1000, 1),
+                "max_lag_ms": round(self._max_lag * 1000, 1),
+            },
+        }
+        self._not_ready = not_ready
+        self._checked_at = time.monotonic()
+        self._max_lag = 0.0
+        return self._snapshot
+
+    def readiness(self) -> Tuple[bool, List[str]]:
+        """
+        Whether this task should receive traffic, from the latest results.
+
+        Returns:
+            (ready, reasons it is not ready)
+        """
+        if self._snapshot is None:
+            return False, ["starting"]
+        reasons = list(self._not_ready)
+        if self.loop_lag > self.max_loop_lag:
+            reasons.append("event_loop_lag")
+        if time.monotonic() - self._checked_at > 3 * self.interval + self.timeout:
+            reasons.append("checks_stale")
+        return not reasons, reasons
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Latest check results, for detailed health reporting."""
+        if self._snapshot is None:
+            return {}
+        ready, reasons = self.readiness()
+        return {**self._snapshot, "ready": ready, "not_ready": reasons}
@@ -0,0 +1,218 @@
+"""
+Prometheus metrics for the service.
+
+A minimal registry that renders the Prometheus text exposition format.
+Updating a metric on the request path is a dict lookup plus, for
+histograms, a bisect over the bucket bounds, so instrumentation stays in
+the low microseconds. State the service already keeps (token usage, caches,
+circuits, rate limits) is not duplicated here; it is read from the owning
+object's snapshot when /metrics is scraped.
+"""
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+# Whole-request latency, from sub-millisecond cache hits to slow LLM rounds
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Provider calls and analyzer stages
+LLM_BUCKETS = (0.001, 0.01, 0.05, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 64.0)
+
+Labels = Tuple[str, ...]
+Sample = Tuple[Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _check_labels(name: str, labelnames: Sequence[str], values: Sequence[str]) -> None:
+    if len(values) != len(labelnames):
+        raise ValueError(f"{name} expects labels {list(labelnames)}, got {len(values)} values")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(str(value))}"' for name, value in zip(names, values, strict=True)
+    )
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+def render_family(name: str, kind: str, documentation: str, samples: Iterable[Sample]) -> str:
+    """
+    Render a metric family from samples collected at scrape time.
+
+    Args:
+        name: Metric name
+        kind: Prometheus type (counter or gauge)
+        documentation: HELP text
+        samples: (labels, value) pairs
+
+    Returns:
+        The family in text exposition format
+    """
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        lines.append(
+            f"{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}"
+        )
+    return "\n".join(lines) + "\n"
+
+
+class Counter:
+    """Monotonic counter with positional label values."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        if labels not in self._values:
+            _check_labels(self.name, self.labelnames, labels)
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> str:
+        return render_family(
+            self.name,
+            "counter",
+            self.documentation,
+            (
+                (dict(zip(self.labelnames, labels, strict=True)), v)
+                for labels, v in self._values.items()
+            ),
+        )
+
+
+class Histogram:
+    """Histogram with fixed bucket bounds and positional label values."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LLM_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last is +Inf), sum]
+        self._series: Dict[Labels, List] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            _check_labels(self.name, self.labelnames, labels)
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        """Observe the duration of the block, including when it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series is not None else 0
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total) in self._series.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts, strict=True):
+                cumulative += count
+                label_str = _format_labels(
+                    (*self.labelnames, "le"), (*labels, _format_value(bound))
+                )
+                lines.append(f"{self.name}_bucket{label_str} {cumulative}")
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_str} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsRegistry:
+    """
+    Holds the service's counters and histograms.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: List = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LLM_BUCKETS,
+    ) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Render every registered metric in text exposition format."""
+        return "".join(metric.render() for metric in self._metrics)
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "petvet_http_request_duration_seconds",
+    "Time until response headers, by route template",
+    ("method", "route", "status"),
+    HTTP_BUCKETS,
+)
+LLM_CALL_DURATION = REGISTRY.histogram(
+    "petvet_llm_call_duration_seconds",
+    "Provider call latency by model and outcome",
+    ("provider", "model", "outcome"),
+)
+LLM_RETRIES = REGISTRY.counter(
+    "petvet_llm_retries_total",
+    "Completion rounds retried after every provider failed",
+)
+LLM_FALLBACKS = REGISTRY.counter(
+    "petvet_llm_fallbacks_total",
+    "Calls moved to another provider after one failed",
+    ("from_provider", "to_provider"),
+)
+PARSE_FAILURES = REGISTRY.counter(
+    "petvet_llm_parse_failures_total",
+    "Model answers that could not be parsed as JSON",
+    ("schema",),
+)
+DEFAULT_RESPONSES = REGISTRY.counter(
+    "petvet_default_responses_total",
+    "Canned default answers returned instead of a model answer",
+    ("kind",),
+)
+STAGE_DURATION = REGISTRY.histogram(
+    "petvet_analysis_stage_duration_seconds",
+    "Analyzer latency per operation and stage",
+    ("operation", "stage"),
+)
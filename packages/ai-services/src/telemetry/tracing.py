@@ -0,0 +1,381 @@
+"""
+Request tracing across routers, analyzer and orchestrator.
+
+Spans nest through a context variable, so tasks started inside a span
+(singleflight calls, hedges, prefetches) become its children. Trace
+context arrives in the W3C `traceparent` header, so spans join the trace
+started by the caller (e.g. the WhatsApp handler). Finished spans are
+batched and handed to a pluggable exporter: in memory for tests, OTLP over
+HTTP for production. With no exporter configured, spans are not recorded.
+"""
+import asyncio
+import functools
+import logging
+import secrets
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Protocol, Tuple, TypeVar
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# (trace id, parent span id, sampled) taken from an incoming traceparent
+SpanContext = Tuple[str, str, bool]
+
+OTLP_SPAN_KINDS = {"internal": 1, "server": 2, "client": 3}
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+@dataclass
+class Span:
+    """A timed operation within a trace."""
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    kind: str = "internal"
+    sampled: bool = True
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: Optional[int] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def set_attributes(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    """The span of the current context, if one is being recorded."""
+    return _current_span.get()
+
+
+def set_attributes(**attributes: Any) -> None:
+    """Set attributes on the current span; a no-op when nothing is recorded."""
+    span = _current_span.get()
+    if span is not None:
+        span.attributes.update(attributes)
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[SpanContext]:
+    """
+    Parse a W3C traceparent header.
+
+    Args:
+        header: Header value, e.g. "00-<32 hex>-<16 hex>-01"
+
+    Returns:
+        (trace id, parent span id, sampled), or None if absent or invalid
+    """
+    if not header:
+        return None
+    parts = header.strip().lower().split("-")
+    if len(parts) < 4 or len(parts[1]) != 32 or len(parts[2]) != 16 or len(parts[3]) != 2:
+        return None
+    version, trace_id, span_id, flags = parts[:4]
+    try:
+        int(trace_id, 16), int(span_id, 16)
+        sampled = bool(int(flags, 16) & 1)
+    except ValueError:
+        return None
+    if version == "ff" or trace_id == "0" * 32 or span_id == "0" * 16:
+        return None
+    return trace_id, span_id, sampled
+
+
+class SpanExporter(Protocol):
+    """Receives batches of finished spans."""
+
+    async def export(self, spans: List[Span]) -> None:
+        ...
+
+    async def shutdown(self) -> None:
+        ...
+
+
+class InMemorySpanExporter:
+    """
+    Keeps exported spans in a list, for tests.
+    """
+
+    def __init__(self) -> None:
+        self.spans: List[Span] = []
+
+    async def export(self, spans: List[Span]) -> None:
+        self.spans.extend(spans)
+
+    async def shutdown(self) -> None:
+        pass
+
+    def named(self, name: str) -> List[Span]:
+        return [span for span in self.spans if span.name == name]
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OTLPHttpExporter:
+    """
+    Sends spans to an OpenTelemetry collector with OTLP/HTTP (JSON encoding).
+
+    Export failures are logged and the batch is dropped; tracing never
+    fails a request.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        service_name: str,
+        headers: Optional[Dict[str, str]] = None,
+        timeout_seconds: float = 5.0,
+        client: Optional[httpx.AsyncClient] = None,
+    ):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.service_name = service_name
+        self.client = client or httpx.AsyncClient(headers=headers, timeout=timeout_seconds)
+
+    def encode(self, spans: List[Span]) -> Dict[str, Any]:
+        """Encode spans as an OTLP ExportTraceServiceRequest."""
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {"key": "service.name", "value": {"stringValue": self.service_name}}
+                        ]
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": __name__},
+                            "spans": [self._encode_span(span) for span in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+
+    @staticmethod
+    def _encode_span(span: Span) -> Dict[str, Any]:
+        encoded: Dict[str, Any] = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": OTLP_SPAN_KINDS.get(span.kind, 1),
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns or span.start_ns),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)}
+                for key, value in span.attributes.items()
+                if value is not None
+            ],
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+        }
+        if span.parent_id:
+            encoded["parentSpanId"] = span.parent_id
+        return encoded
+
+    async def export(self, spans: List[Span]) -> None:
+        try:
+            response = await self.client.post(self.url, json=self.encode(spans))
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            logger.warning(f"Dropped {len(spans)} spans, OTLP export failed: {e}")
+
+    async def shutdown(self) -> None:
+        await self.client.aclose()
+
+
+def create_exporter(
+    kind: str,
+    endpoint: str,
+    service_name: str,
+    headers: Optional[Dict[str, str]] = None,
+) -> Optional[SpanExporter]:
+    """
+    Create a span exporter by name.
+
+    Args:
+        kind: Exporter name (none, memory or otlp)
+        endpoint: OTLP/HTTP collector base URL, used by the otlp exporter
+        service_name: service.name resource attribute
+        headers: Extra headers for the collector (e.g. authentication)
+
+    Returns:
+        Configured exporter, or None when tracing is off
+    """
+    if kind == "none":
+        return None
+    if kind == "memory":
+        return InMemorySpanExporter()
+    if kind == "otlp":
+        return OTLPHttpExporter(endpoint, service_name, headers)
+    raise ValueError(f"Unknown span exporter: {kind}")
+
+
+class Tracer:
+    """
+    Creates spans and exports them in batches.
+
+    Finished spans are queued (at most `max_queue`, oldest dropped first)
+    and exported every `flush_seconds`, or sooner once `batch_size` are
+    waiting. Unsampled traces are not exported.
+    """
+
+    def __init__(
+        self,
+        exporter: Optional[SpanExporter] = None,
+        batch_size: int = 512,
+        flush_seconds: float = 5.0,
+        max_queue: int = 4096,
+    ):
+        self.exporter = exporter
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._queue: Deque[Span] = deque(maxlen=max_queue)
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def configure(self, exporter: Optional[SpanExporter]) -> None:
+        """Set the exporter; None stops recording spans."""
+        self.exporter = exporter
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        parent: Optional[SpanContext] = None,
+        kind: str = "internal",
+        **attributes: Any,
+    ) -> Iterator[Optional[Span]]:
+        """
+        Record a span around the block, as a child of the current span.
+
+        Args:
+            name: Span name
+            parent: Remote parent from a traceparent header; by default the
+                current span, or a new trace if there is none
+            kind: internal, server or client
+            **attributes: Initial attributes
+
+        Yields:
+            The span, or None when tracing is off
+        """
+        if self.exporter is None:
+            yield None
+            return
+
+        if parent is not None:
+            trace_id, parent_id, sampled = parent
+        else:
+            current = _current_span.get()
+            if current is not None:
+                trace_id, parent_id, sampled = current.trace_id, current.span_id, current.sampled
+            else:
+                trace_id, parent_id, sampled = secrets.token_hex(16), None, True
+
+        span = Span(
+            name,
+            trace_id,
+            secrets.token_hex(8),
+            parent_id,
+            kind=kind,
+            sampled=sampled,
+            attributes=attributes,
+        )
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end_ns = time.time_ns()
+            if span.sampled:
+                self._queue.append(span)
+                if len(self._queue) >= self.batch_size and self._wake is not None:
+                    self._wake.set()
+
+    def start(self) -> None:
+        """Start the background export loop."""
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._export_loop())
+
+    async def _export_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Export every queued span."""
+        while self._queue and self.exporter is not None:
+            batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+            try:
+                await self.exporter.export(batch)
+            except Exception as e:
+                logger.warning(f"Dropped {len(batch)} spans, export failed: {e}")
+
+    async def aclose(self) -> None:
+        """Stop the export loop, flush and shut the exporter down."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            self._wake = None
+        await self.flush()
+        if self.exporter is not None:
+            await self.exporter.shutdown()
+
+
+tracer = Tracer()
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """Record a span named `name` around every call of a function or coroutine function."""
+
+    def decorate(func: F) -> F:
+        if asyncio.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with tracer.span(name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with tracer.span(name):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
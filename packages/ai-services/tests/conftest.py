@@ -11,6 +11,10 @@ from fastapi.testclient import TestClient
 os.environ["ENVIRONMENT"] = "test"
 os.environ["PORT"] = "8000"
 os.environ["REDIS_URL"] = "redis://localhost:6379"
+os.environ["CACHE_BACKEND"] = "memory"
+os.environ["BULK_JOBS_BACKEND"] = "memory"
+os.environ["LLM_PREWARM_CONNECTIONS"] = "0"
+os.environ["HEALTH_MONITOR_ENABLED"] = "false"
 os.environ["OPENAI_API_KEY"] = "test-openai-key"
 os.environ["ANTHROPIC_API_KEY"] = "test-anthropic-key"
 os.environ["CORS_ORIGINS"] = "http://localhost:3000,http://localhost:5173"
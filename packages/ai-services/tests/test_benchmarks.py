@@ -0,0 +1,94 @@
+"""
+Tests for the benchmark fake provider and result tooling.
+"""
+import httpx
+import pytest
+from anthropic import AsyncAnthropic
+from openai import AsyncOpenAI
+
+from benchmarks.compare import compare
+from benchmarks.fake_provider import FakeProviderConfig, LatencyModel, create_app
+from benchmarks.report import percentile, summarize
+from src.diagnosis.schemas import TreatmentResponse
+from src.llm.orchestrator import LLMOrchestrator
+
+
+def _orchestrator(config: FakeProviderConfig) -> LLMOrchestrator:
+    """An orchestrator whose SDK clients talk to an in-process fake provider."""
+    http_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app(config)))
+    orchestrator = LLMOrchestrator()
+    orchestrator.openai_client = AsyncOpenAI(
+        api_key="fake", base_url="http://fake/v1", http_client=http_client, max_retries=0
+    )
+    orchestrator.anthropic_client = AsyncAnthropic(
+        api_key="fake", base_url="http://fake", http_client=http_client, max_retries=0
+    )
+    return orchestrator
+
+
+class TestFakeProvider:
+    """Test cases for the fake provider through the real SDKs."""
+
+    async def test_openai_completion_from_corpus(self):
+        """Test that a treatment prompt gets a treatment answer and usage is recorded."""
+        orchestrator = _orchestrator(FakeProviderConfig(latency=LatencyModel.parse("fixed:0")))
+
+        answer = await orchestrator.complete("Gere o protocolo com medications", provider="openai")
+
+        assert TreatmentResponse.model_validate_json(answer).medications
+        assert orchestrator.usage.last.provider == "openai"
+        assert orchestrator.usage.last.output_tokens > 0
+
+    async def test_anthropic_tool_use_and_stream(self):
+        """Test structured output via tool use and a streamed answer."""
+        orchestrator = _orchestrator(FakeProviderConfig(latency=LatencyModel.parse("fixed:0")))
+
+        structured = await orchestrator._anthropic_structured(
+            "Paciente: Rex", TreatmentResponse, None, 0.3, 500
+        )
+        chunks = [c async for c in orchestrator._anthropic_stream("Ola", None, 0.7, 100)]
+
+        assert structured.follow_up
+        assert "".join(chunks) == "Sou um assistente veterinario. Como posso ajudar?"
+
+    async def test_injected_errors_fail_over(self):
+        """Test that an always-failing provider makes the orchestrator fall back."""
+        failing = _orchestrator(
+            FakeProviderConfig(latency=LatencyModel.parse("fixed:0"), error_rate=1.0)
+        )
+        healthy = _orchestrator(FakeProviderConfig(latency=LatencyModel.parse("fixed:0")))
+        failing.anthropic_client = healthy.anthropic_client
+
+        assert await failing.complete("Ola", provider="openai")
+        assert failing.usage.last.provider == "anthropic"
+
+    def test_latency_spec_validation(self):
+        """Test parsing of latency specs."""
+        assert LatencyModel.parse("uniform:0.1,0.5") == LatencyModel("uniform", 0.1, 0.5)
+        with pytest.raises(ValueError):
+            LatencyModel.parse("gamma:1")
+
+
+class TestResults:
+    """Test cases for latency summaries and regression comparison."""
+
+    def test_nearest_rank_percentiles(self):
+        """Test percentiles and the summary of a latency sample."""
+        values = [i / 1000 for i in range(1, 101)]
+
+        assert percentile(values, 0.5) == 0.05
+        assert percentile(values, 0.99) == 0.099
+        summary = summarize(values, errors=5, elapsed=10.0)
+        assert summary["count"] == 105
+        assert summary["rps"] == 10.5
+        assert summary["p95_ms"] == 95.0
+
+    def test_compare_flags_slower_and_lower_throughput(self):
+        """Test that higher latency and lower rps beyond the threshold are regressions."""
+        baseline = {"endpoints": {"analyze": {"p95_ms": 100.0, "rps": 50.0, "count": 500}}}
+        current = {"endpoints": {"analyze": {"p95_ms": 130.0, "rps": 48.0, "count": 480}}}
+
+        (regression,) = compare(baseline, current, threshold=0.1)
+
+        assert regression["metric"] == "endpoints.analyze.p95_ms"
+        assert regression["change"] == 0.3
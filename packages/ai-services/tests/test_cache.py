@@ -0,0 +1,214 @@
+"""
+Tests for the analysis response cache.
+"""
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.cache.backends import MemoryBackend
+from src.cache.response_cache import ResponseCache
+from src.cache.semantic import SemanticCache
+from src.config import settings
+from src.dependencies import build_analyzer
+from src.diagnosis.analyzer import VeterinaryAnalyzer
+
+DIAGNOSIS_JSON = json.dumps(
+    {
+        "needs_clarification": False,
+        "diagnosis": {
+            "primary": "Gastroenterite",
+            "differentials": [{"condition": "Corpo estranho", "probability": 20}],
+            "urgency_level": "medium",
+        },
+        "confidence": 0.8,
+    }
+)
+
+
+@pytest.fixture
+def cache():
+    """Response cache backed by memory."""
+    return ResponseCache(MemoryBackend(max_entries=16), ttl_seconds=60)
+
+
+@pytest.fixture
+def llm():
+    """Mock orchestrator returning a valid diagnosis."""
+    mock_llm = MagicMock()
+    mock_llm.complete = AsyncMock(return_value=DIAGNOSIS_JSON)
+    return mock_llm
+
+
+class TestResponseCacheKeys:
+    """Test cases for canonical key hashing."""
+
+    def test_key_ignores_dict_order_and_nulls(self, cache):
+        """Test that equivalent payloads hash to the same key."""
+        a = cache.make_key("symptoms", {"pet_info": {"species": "dog", "age": 3}, "x": None})
+        b = cache.make_key("symptoms", {"pet_info": {"age": 3, "species": "dog"}})
+
+        assert a == b
+
+    def test_key_depends_on_kind(self, cache):
+        """Test that different request kinds never collide."""
+        payload = {"pet_info": {"species": "cat"}}
+
+        assert cache.make_key("symptoms", payload) != cache.make_key("treatment", payload)
+
+
+class TestMemoryBackend:
+    """Test cases for the in-memory backend."""
+
+    async def test_lru_eviction(self):
+        """Test that the oldest entry is evicted when full."""
+        backend = MemoryBackend(max_entries=2)
+        await backend.set("a", "1")
+        await backend.set("b", "2")
+        await backend.get("a")
+        await backend.set("c", "3")
+
+        assert await backend.get("a") == "1"
+        assert await backend.get("b") is None
+        assert await backend.get("c") == "3"
+
+
+class TestAnalyzerCaching:
+    """Test cases for caching inside VeterinaryAnalyzer."""
+
+    async def test_repeated_symptoms_hit_cache(self, llm, cache):
+        """Test that a repeated request is answered without an LLM call."""
+        analyzer = VeterinaryAnalyzer(llm, cache=cache)
+        pet_info = {"species": "dog", "age": 5}
+
+        first = await analyzer.analyze_symptoms("Vomitando desde ontem", pet_info)
+        second = await analyzer.analyze_symptoms("  vomitando   desde ontem ", pet_info)
+
+        assert first == second
+        assert llm.complete.await_count == 1
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    async def test_fallback_answers_are_not_cached(self, llm, cache):
+        """Test that canned defaults from a failed call are never stored."""
+        llm.complete = AsyncMock(side_effect=RuntimeError("provider down"))
+        analyzer = VeterinaryAnalyzer(llm, cache=cache)
+
+        await analyzer.analyze_symptoms("Tosse", {"species": "cat"})
+        await analyzer.analyze_symptoms("Tosse", {"species": "cat"})
+
+        assert llm.complete.await_count == 2
+        assert cache.stats()["stores"] == 0
+
+    async def test_treatment_cached_per_diagnosis(self, llm, cache):
+        """Test that treatment protocols are cached by diagnosis and pet."""
+        llm.complete = AsyncMock(
+            return_value=json.dumps(
+                {
+                    "medications": [],
+                    "supportive_care": ["Hidratacao"],
+                    "monitoring": ["Apetite"],
+                    "follow_up": "Retorno em 48h",
+                }
+            )
+        )
+        analyzer = VeterinaryAnalyzer(llm, cache=cache)
+        diagnosis = {"primary": "Otite", "urgency_level": "low", "differentials": []}
+
+        await analyzer.get_treatment_protocol(diagnosis, {"species": "dog"})
+        await analyzer.get_treatment_protocol(diagnosis, {"species": "dog"})
+        await analyzer.get_treatment_protocol(diagnosis, {"species": "cat"})
+
+        assert llm.complete.await_count == 2
+
+
+class TestSemanticCache:
+    """Test cases for the near-duplicate symptom cache."""
+
+    def test_lookup_respects_threshold_and_scope(self):
+        """Test that only close vectors in the same scope hit."""
+        cache = SemanticCache(threshold=0.9, max_entries=8)
+        cache._insert("dog:adulto", cache._normalize([1.0, 0.0, 0.0]), {"id": 1}, "a")
+
+        result, similarity = cache.lookup("dog:adulto", [0.95, 0.1, 0.0])
+        assert result == {"id": 1}
+        assert similarity == pytest.approx(0.9945, abs=1e-3)
+        assert cache.lookup("dog:adulto", [0.0, 1.0, 0.0]) is None
+        assert cache.lookup("cat:adulto", [1.0, 0.0, 0.0]) is None
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 2
+
+    def test_lru_eviction(self):
+        """Test that the least recently used vector is evicted."""
+        cache = SemanticCache(threshold=0.99, max_entries=2)
+        cache._insert("s", cache._normalize([1.0, 0.0]), {"id": "x"}, "x")
+        cache._insert("s", cache._normalize([0.0, 1.0]), {"id": "y"}, "y")
+        cache.lookup("s", [1.0, 0.0])
+        cache._insert("s", cache._normalize([-1.0, 0.0]), {"id": "z"}, "z")
+
+        assert cache.lookup("s", [1.0, 0.0])[0] == {"id": "x"}
+        assert cache.lookup("s", [0.0, 1.0]) is None
+        assert cache.stats()["evictions"] == 1
+
+    def test_expired_entries_miss_and_are_reused(self):
+        """Test that entries past the TTL stop matching and free their slot."""
+        cache = SemanticCache(threshold=0.9, max_entries=2, ttl_seconds=60)
+        cache._insert("s", cache._normalize([1.0, 0.0]), {"id": "old"}, "old", ttl_seconds=0.0)
+        cache._insert("s", cache._normalize([0.0, 1.0]), {"id": "live"}, "live")
+
+        assert cache.lookup("s", [1.0, 0.0]) is None
+        assert cache._insert("s", cache._normalize([1.0, 0.1]), {"id": "new"}, "new") == "old"
+        assert cache.lookup("s", [0.0, 1.0])[0] == {"id": "live"}
+        assert cache.stats()["evictions"] == 0
+
+    async def test_expired_persisted_entries_are_not_loaded(self):
+        """Test that warming skips mirrored entries older than the TTL."""
+        backend = MemoryBackend()
+        await SemanticCache(backend=backend).add("cat:senior", [0.2, 0.4, 0.9], {"id": 7})
+
+        assert await SemanticCache(backend=backend, ttl_seconds=0).load() == 0
+
+    async def test_persisted_entries_warm_new_index(self):
+        """Test that entries mirrored to a backend can be reloaded."""
+        backend = MemoryBackend()
+        writer = SemanticCache(backend=backend)
+        await writer.add("cat:senior", [0.2, 0.4, 0.9], {"id": 7})
+
+        reader = SemanticCache(backend=backend)
+        assert await reader.load() == 1
+        assert reader.lookup("cat:senior", [0.2, 0.4, 0.9])[0] == {"id": 7}
+
+    def test_precision_stats(self):
+        """Test that shadow verifications are aggregated per similarity bucket."""
+        cache = SemanticCache()
+        cache.record_verification(0.95, True)
+        cache.record_verification(0.951, False)
+
+        bucket = cache.stats()["precision_by_similarity"][">=0.94"]
+        assert bucket == {"agreed": 1, "total": 2, "precision": 0.5}
+
+    async def test_near_duplicate_skips_llm(self, llm):
+        """Test that a paraphrase within the threshold reuses the analysis."""
+        vectors = {"vomitando desde ontem": [1.0, 0.1], "vomitou ontem e hoje": [1.0, 0.12]}
+        llm.embed = AsyncMock(side_effect=lambda text: vectors[text])
+        analyzer = VeterinaryAnalyzer(llm, semantic_cache=SemanticCache(threshold=0.95))
+        pet_info = {"species": "dog", "age": 4}
+
+        first = await analyzer.analyze_symptoms("Vomitando desde ontem", pet_info)
+        second = await analyzer.analyze_symptoms("vomitou ontem e hoje", pet_info)
+        await analyzer.analyze_symptoms("vomitou ontem e hoje", {"species": "dog", "age": 12})
+
+        assert first == second
+        assert llm.complete.await_count == 2
+
+    def test_opt_in_and_requires_embedding_client(self, monkeypatch):
+        """Test that the semantic cache is off by default and needs an OpenAI client."""
+        llm = MagicMock(openai_client=None)
+        assert settings.semantic_cache_enabled is False
+        assert build_analyzer(llm).semantic_cache is None
+
+        monkeypatch.setattr(settings, "semantic_cache_enabled", True)
+        assert build_analyzer(llm).semantic_cache is None
+
+        llm.openai_client = MagicMock()
+        assert isinstance(build_analyzer(llm).semantic_cache, SemanticCache)
@@ -0,0 +1,130 @@
+"""
+Tests for consultation state across clarifying rounds.
+"""
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.cache.backends import MemoryBackend
+from src.diagnosis.analyzer import SYMPTOM_INITIAL_INSTRUCTIONS, VeterinaryAnalyzer
+from src.diagnosis.consultation import (
+    ConsultationNotFoundError,
+    ConsultationState,
+    ConsultationStore,
+)
+
+QUESTIONS_ANSWER = (
+    '{"needs_clarification": true, "clarifying_questions":'
+    ' ["Ha quanto tempo?", "Esta bebendo agua?"]}'
+)
+DIAGNOSIS_ANSWER = (
+    '{"needs_clarification": false, "diagnosis": {"primary": "Gastroenterite",'
+    ' "differentials": [], "urgency_level": "medium"}, "confidence": 0.8}'
+)
+SYMPTOMS = "Vomitando desde ontem e sem apetite"
+
+
+def _analyzer(*answers: str) -> VeterinaryAnalyzer:
+    llm = AsyncMock()
+    llm.complete = AsyncMock(side_effect=list(answers))
+    return VeterinaryAnalyzer(llm, consultations=ConsultationStore(MemoryBackend()))
+
+
+class TestConsultationRounds:
+    """Test cases for follow-up rounds that send only new answers."""
+
+    async def test_follow_up_replays_first_round_as_prefix(self):
+        """Test that a follow-up reuses the stored prompt and shows the model its questions."""
+        analyzer = _analyzer(QUESTIONS_ANSWER, DIAGNOSIS_ANSWER)
+
+        await analyzer.analyze_symptoms(SYMPTOMS, {"species": "dog"}, consultation_id="c-1")
+        result = await analyzer.analyze_symptoms(
+            None, clarifying_answers=["Desde ontem", "Sim"], consultation_id="c-1"
+        )
+
+        first, second = [call.kwargs for call in analyzer.llm.complete.await_args_list]
+        assert first["prompt_prefix"] == SYMPTOM_INITIAL_INSTRUCTIONS
+        assert second["prompt_prefix"] == f"{first['prompt_prefix']}\n\n{first['prompt']}"
+        assert "- Esta bebendo agua?" in second["prompt"]
+        assert "- Desde ontem" in second["prompt"]
+        assert SYMPTOMS not in second["prompt"]
+        assert result["diagnosis"]["primary"] == "Gastroenterite"
+
+    async def test_uncached_prompt_stays_flat_across_rounds(self):
+        """Test that answers arriving as deltas only grow the uncached part by the delta."""
+        analyzer = _analyzer(QUESTIONS_ANSWER, DIAGNOSIS_ANSWER, DIAGNOSIS_ANSWER)
+
+        await analyzer.analyze_symptoms(SYMPTOMS, {"species": "dog"}, consultation_id="c-1")
+        await analyzer.analyze_symptoms(None, clarifying_answers=["Ontem"], consultation_id="c-1")
+        await analyzer.analyze_symptoms(None, clarifying_answers=["Sim"], consultation_id="c-1")
+
+        calls = [call.kwargs for call in analyzer.llm.complete.await_args_list]
+        assert calls[1]["prompt_prefix"] == calls[2]["prompt_prefix"]
+        state = await analyzer.consultations.get("c-1")
+        assert state.answers == ["Ontem", "Sim"]
+        assert len(calls[2]["prompt"]) - len(calls[1]["prompt"]) < 120
+
+    async def test_follow_up_without_state_is_rejected(self):
+        """Test that a follow-up for an unknown consultation raises."""
+        analyzer = _analyzer()
+
+        with pytest.raises(ConsultationNotFoundError):
+            await analyzer.analyze_symptoms(None, clarifying_answers=["Sim"], consultation_id="x")
+
+    async def test_full_resend_rebuilds_lost_state(self):
+        """Test that a follow-up resending symptoms and pet works after the state is gone."""
+        analyzer = _analyzer(QUESTIONS_ANSWER, DIAGNOSIS_ANSWER)
+        pet_info = {"species": "dog", "weight": 12.0}
+        await analyzer.analyze_symptoms(SYMPTOMS, pet_info, consultation_id="c-1")
+        analyzer.consultations = ConsultationStore(MemoryBackend())  # e.g. another worker
+
+        result = await analyzer.analyze_symptoms(
+            SYMPTOMS, pet_info, clarifying_answers=["Ontem", "Sim"], consultation_id="c-1"
+        )
+
+        assert result["diagnosis"]["primary"] == "Gastroenterite"
+        assert "Ontem" in analyzer.llm.complete.await_args.kwargs["prompt"]
+        assert (await analyzer.consultations.get("c-1")).answers == ["Ontem", "Sim"]
+
+    async def test_local_copy_serves_when_backend_misses(self):
+        """Test that state survives a backend that lost (or never got) the write."""
+        backend = AsyncMock()
+        backend.get = AsyncMock(return_value=None)
+        store = ConsultationStore(backend)
+
+        await store.save("c-1", ConsultationState(SYMPTOMS, "Paciente: ...", answers=["Sim"]))
+
+        state = await store.get("c-1")
+        assert state.answers == ["Sim"]
+        backend.set.assert_awaited_once()
+
+
+class TestConsultationEndpoint:
+    """Test cases for follow-up requests through the API."""
+
+    def test_request_needs_symptoms_or_answers(self, test_client):
+        """Test that a request with neither symptoms nor answers is invalid."""
+        response = test_client.post(
+            "/api/v1/diagnosis/analyze", json={"pet_id": "p-1", "consultation_id": "c-1"}
+        )
+
+        assert response.status_code == 422
+
+    def test_unknown_consultation_follow_up(self, test_client):
+        """Test that a follow-up with no stored state returns 404."""
+        response = test_client.post(
+            "/api/v1/diagnosis/analyze",
+            json={"pet_id": "p-1", "consultation_id": "nope", "clarifying_answers": ["Sim"]},
+        )
+
+        assert response.status_code == 404
+
+    def test_unknown_consultation_stream_follow_up(self, test_client):
+        """Test that the streaming endpoint also returns 404, before any event is sent."""
+        response = test_client.post(
+            "/api/v1/diagnosis/analyze/stream",
+            json={"pet_id": "p-1", "consultation_id": "nope", "clarifying_answers": ["Sim"]},
+        )
+
+        assert response.status_code == 404
+        assert "nope" in response.json()["detail"]
@@ -1,9 +1,16 @@
 """
 Tests for health check endpoints.
 """
+import asyncio
+from unittest.mock import AsyncMock
+
 import pytest
 from fastapi.testclient import TestClient
 
+from src.config import settings
+from src.llm.orchestrator import LLMOrchestrator
+from src.telemetry.health import DependencyMonitor
+
 
 class TestHealthEndpoints:
     """Test cases for health check endpoints."""
@@ -65,3 +72,110 @@ class TestHealthResponseFormat:
         # Check timestamp contains expected ISO format characters
         timestamp = data["timestamp"]
         assert "T" in timestamp or "-" in timestamp
+
+    def test_detailed_health_reports_provider_circuits(self, test_client: TestClient):
+        """Test that router state is exposed by the detailed health check."""
+        response = test_client.get("/health/detailed")
+        data = response.json()
+
+        assert response.status_code == 200
+        assert set(data["providers"]) == {"openai", "anthropic"}
+        assert data["providers"]["openai"]["state"] in ("closed", "half_open", "open")
+        assert data["checks"]["openai"] in ("healthy", "degraded", "unhealthy")
+
+
+def _rate_limited():
+    """An SDK-style error for HTTP 429."""
+    error = RuntimeError("rate limited")
+    error.status_code = 429
+    return error
+
+
+class TestDependencyMonitor:
+    """Test cases for the background dependency monitor."""
+
+    async def test_failed_provider_is_routed_last(self):
+        """Test that check results reach the router and the snapshot."""
+        llm = LLMOrchestrator()
+        monitor = DependencyMonitor(
+            provider_checks={
+                "openai": AsyncMock(side_effect=ConnectionError("refused")),
+                "anthropic": AsyncMock(side_effect=_rate_limited()),
+            },
+            router=llm.router,
+        )
+
+        snapshot = await monitor.check()
+
+        assert snapshot["providers"]["openai"]["status"] == "unhealthy"
+        assert "refused" in snapshot["providers"]["openai"]["error"]
+        assert snapshot["providers"]["anthropic"]["status"] == "degraded"
+        assert llm.router.order(preferred="openai") == ["anthropic", "openai"]
+        assert monitor.readiness() == (True, [])
+
+    async def test_not_ready_when_redis_or_every_provider_is_down(self):
+        """Test the readiness reasons, including before the first check."""
+        redis = AsyncMock()
+        redis.ping.side_effect = ConnectionError("Redis down")
+        monitor = DependencyMonitor(
+            redis=redis,
+            provider_checks={"openai": AsyncMock(side_effect=TimeoutError())},
+            redis_required=True,
+        )
+
+        assert monitor.readiness() == (False, ["starting"])
+        await monitor.check()
+        assert monitor.readiness() == (False, ["redis", "llm_providers"])
+
+        monitor.redis_required = False
+        monitor.provider_checks = {"openai": AsyncMock()}
+        await monitor.check()
+        assert monitor.readiness() == (True, [])
+
+        monitor.loop_lag = 2.0
+        assert monitor.readiness() == (False, ["event_loop_lag"])
+
+    async def test_redis_outage_does_not_fail_readiness_by_default(self):
+        """Test that the caches' Redis is reported but does not pull the task."""
+        redis = AsyncMock()
+        redis.ping.side_effect = ConnectionError("Redis down")
+        monitor = DependencyMonitor(redis=redis, provider_checks={"openai": AsyncMock()})
+
+        snapshot = await monitor.check()
+
+        assert snapshot["redis"]["status"] == "unhealthy"
+        assert monitor.readiness() == (True, [])
+        assert settings.health_redis_required is False
+
+    async def test_slow_check_times_out(self):
+        """Test that a hanging dependency fails after the timeout instead of blocking."""
+        monitor = DependencyMonitor(
+            provider_checks={"openai": lambda: asyncio.sleep(5)}, timeout=0.05
+        )
+
+        snapshot = await monitor.check()
+
+        assert snapshot["providers"]["openai"]["status"] == "unhealthy"
+        assert snapshot["providers"]["openai"]["latency_ms"] < 1000
+
+    def test_probes_answer_from_the_snapshot(self, test_client: TestClient):
+        """Test that readiness returns 503 with reasons and detailed health shows the checks."""
+        redis = AsyncMock()
+        redis.ping.side_effect = ConnectionError("Redis down")
+        monitor = DependencyMonitor(
+            redis=redis, provider_checks={"openai": AsyncMock()}, redis_required=True
+        )
+        test_client.portal.call(monitor.check)
+        test_client.app.state.health_monitor = monitor
+        try:
+            ready = test_client.get("/health/ready")
+            detailed = test_client.get("/health/detailed").json()
+        finally:
+            test_client.app.state.health_monitor = None
+
+        assert ready.status_code == 503
+        assert ready.json() == {"status": "not_ready", "reasons": ["redis"]}
+        assert detailed["checks"]["redis"] == "unhealthy"
+        assert detailed["status"] == "degraded"
+        assert detailed["dependencies"]["providers"]["openai"]["status"] == "healthy"
+        redis.ping.assert_awaited_once()
@@ -0,0 +1,245 @@
+"""
+Tests for image preprocessing before vision analysis.
+"""
+import base64
+import io
+import json
+from unittest.mock import AsyncMock
+
+import httpx
+import pytest
+from PIL import Image
+
+from src.cache.backends import MemoryBackend
+from src.cache.image_cache import ImageHashes, ImageResultCache
+from src.diagnosis.analyzer import VeterinaryAnalyzer
+from src.diagnosis.images import (
+    ImagePreprocessor,
+    ImageTooLargeError,
+    UnsafeImageURLError,
+    ahash,
+    dhash,
+)
+
+
+def _photo(width: int = 4000, height: int = 3000, orientation: int = 6) -> bytes:
+    """A large JPEG whose EXIF says it must be rotated 90 degrees to display."""
+    image = Image.new("RGB", (width, height), (200, 120, 80))
+    exif = Image.Exif()
+    exif[0x0112] = orientation
+    out = io.BytesIO()
+    image.save(out, format="JPEG", exif=exif, quality=95)
+    return out.getvalue()
+
+
+def _encode(image: Image.Image, fmt: str = "JPEG", **kwargs) -> bytes:
+    out = io.BytesIO()
+    image.save(out, format=fmt, **kwargs)
+    return out.getvalue()
+
+
+def _hashes(image: Image.Image) -> ImageHashes:
+    return ImageHashes(dhash=dhash(image), ahash=ahash(image))
+
+
+MANDELBROT = Image.effect_mandelbrot((800, 600), (-2.0, -1.5, 1.0, 1.5), 100).convert("RGB")
+GRADIENT = Image.linear_gradient("L").resize((800, 600)).convert("RGB")
+IMAGE_RESULT = {
+    "findings": ["Lesao avermelhada na orelha"],
+    "concerns": [],
+    "recommendations": ["Limpeza local"],
+    "urgency_level": "low",
+}
+
+
+async def _public_dns(host: str, port: int) -> list:
+    return ["93.184.215.14"]
+
+
+def _preprocessor(body: bytes, **kwargs) -> ImagePreprocessor:
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, content=body))
+    kwargs.setdefault("resolve", _public_dns)
+    return ImagePreprocessor(client=httpx.AsyncClient(transport=transport), **kwargs)
+
+
+def _decode(data_url: str) -> Image.Image:
+    header, payload = data_url.split(",", 1)
+    assert header == "data:image/jpeg;base64"
+    return Image.open(io.BytesIO(base64.b64decode(payload)))
+
+
+class TestImagePreprocessor:
+    """Test cases for fetching and shrinking images."""
+
+    async def test_downscales_and_applies_orientation(self):
+        """Test that a 4000x3000 rotated photo becomes a 768x1024 portrait JPEG."""
+        original = _photo()
+        preprocessor = _preprocessor(original, max_edge=1024)
+
+        data_url = (await preprocessor.prepare("https://example.com/foto.jpg")).data_url
+        image = _decode(data_url)
+
+        assert image.size == (768, 1024)
+        assert len(data_url) < len(original)
+        await preprocessor.aclose()
+
+    async def test_transparent_png_is_flattened(self):
+        """Test that images with alpha are re-encoded as JPEG on white."""
+        out = io.BytesIO()
+        Image.new("RGBA", (50, 40), (0, 0, 0, 0)).save(out, format="PNG")
+        preprocessor = _preprocessor(out.getvalue())
+
+        image = _decode((await preprocessor.prepare("https://example.com/x.png")).data_url)
+
+        assert image.size == (50, 40)
+        assert image.getpixel((0, 0)) == (255, 255, 255)
+        await preprocessor.aclose()
+
+    async def test_download_size_cap(self):
+        """Test that oversized downloads are aborted."""
+        preprocessor = _preprocessor(b"\0" * 2048, max_bytes=1024)
+
+        with pytest.raises(ImageTooLargeError):
+            await preprocessor.fetch("https://example.com/huge.jpg")
+        await preprocessor.aclose()
+
+
+class TestImageURLSafety:
+    """Test cases for refusing image URLs that point inside the network."""
+
+    @pytest.mark.parametrize(
+        "url",
+        [
+            "http://127.0.0.1:6379/",
+            "http://169.254.169.254/latest/meta-data/",
+            "http://[::1]/x.jpg",
+            "http://redis.internal/x.jpg",  # resolves to 10.0.0.5 below
+            "file:///etc/passwd",
+        ],
+    )
+    async def test_internal_addresses_are_refused(self, url):
+        """Test that private, loopback and link-local targets are never requested."""
+
+        async def dns(host, port):
+            return ["10.0.0.5"]
+
+        requests = []
+        transport = httpx.MockTransport(lambda r: requests.append(r) or httpx.Response(200))
+        preprocessor = ImagePreprocessor(client=httpx.AsyncClient(transport=transport), resolve=dns)
+
+        with pytest.raises(UnsafeImageURLError):
+            await preprocessor.fetch(url)
+        assert requests == []
+        await preprocessor.aclose()
+
+    async def test_redirect_to_internal_address_is_refused(self):
+        """Test that every redirect hop is checked, not only the first URL."""
+        requested = []
+
+        def handler(request):
+            requested.append(str(request.url))
+            return httpx.Response(302, headers={"location": "http://169.254.169.254/"})
+
+        preprocessor = ImagePreprocessor(
+            client=httpx.AsyncClient(transport=httpx.MockTransport(handler)), resolve=_public_dns
+        )
+
+        with pytest.raises(UnsafeImageURLError):
+            await preprocessor.fetch("https://example.com/foto.jpg")
+        assert requested == ["https://example.com/foto.jpg"]
+        await preprocessor.aclose()
+
+    async def test_allowed_hosts(self):
+        """Test that an allowlist admits listed hosts and their subdomains only."""
+        preprocessor = _preprocessor(b"img", allowed_hosts=["whatsapp.net"])
+
+        assert await preprocessor.fetch("https://mmg.whatsapp.net/v/t62/abc") == b"img"
+        with pytest.raises(UnsafeImageURLError):
+            await preprocessor.fetch("https://example.com/foto.jpg")
+        await preprocessor.aclose()
+
+
+class TestAnalyzerImages:
+    """Test cases for the analyzer's use of the preprocessor."""
+
+    async def test_vision_receives_data_url(self):
+        """Test that the vision call gets the preprocessed image."""
+        llm = AsyncMock()
+        llm.analyze_with_vision = AsyncMock(
+            return_value='{"findings": [], "concerns": [], "recommendations": [],'
+            ' "urgency_level": "low"}'
+        )
+        analyzer = VeterinaryAnalyzer(llm, image_preprocessor=_preprocessor(_photo()))
+
+        await analyzer.analyze_image("https://example.com/foto.jpg")
+
+        sent = llm.analyze_with_vision.await_args.kwargs["image_url"]
+        assert sent.startswith("data:image/jpeg;base64,")
+        await analyzer.aclose()
+
+    async def test_preprocessing_failure_keeps_original_url(self):
+        """Test that an undecodable image falls back to the original URL."""
+        llm = AsyncMock()
+        llm.analyze_with_vision = AsyncMock(return_value="{}")
+        analyzer = VeterinaryAnalyzer(llm, image_preprocessor=_preprocessor(b"not an image"))
+
+        await analyzer.analyze_image("https://example.com/foto.jpg")
+
+        assert llm.analyze_with_vision.await_args.kwargs["image_url"] == (
+            "https://example.com/foto.jpg"
+        )
+        await analyzer.aclose()
+
+
+class TestImageResultCache:
+    """Test cases for the perceptual-hash result cache."""
+
+    def test_recompressed_copy_is_near_duplicate(self):
+        """Test that a re-compressed, resized resend hashes within the threshold."""
+        resent = Image.open(io.BytesIO(_encode(MANDELBROT.resize((640, 480)), quality=40)))
+
+        original, copy_ = _hashes(MANDELBROT), _hashes(resent)
+
+        assert (original.dhash ^ copy_.dhash).bit_count() <= 6
+        assert (_hashes(GRADIENT).dhash ^ original.dhash).bit_count() > 6
+
+    async def test_lookup_respects_distance_and_context(self):
+        """Test hits for near-duplicates with the same context only."""
+        cache = ImageResultCache(max_distance=6)
+        hashes = _hashes(MANDELBROT)
+        await cache.add(hashes, "Orelha  vermelha", IMAGE_RESULT)
+
+        near = ImageHashes(hashes.dhash ^ 0b101, hashes.ahash ^ 0b1)
+        assert cache.lookup(near, "orelha vermelha") == (IMAGE_RESULT, 2)
+        assert cache.lookup(near, "pata inchada") is None
+        assert cache.lookup(_hashes(GRADIENT), "orelha vermelha") is None
+        assert cache.stats()["hit_rate"] == round(1 / 3, 4)
+
+    async def test_persisted_entries_warm_new_index(self):
+        """Test that a new process can load entries mirrored to the backend."""
+        backend = MemoryBackend()
+        hashes = _hashes(MANDELBROT)
+        await ImageResultCache(backend=backend).add(hashes, None, IMAGE_RESULT)
+
+        fresh = ImageResultCache(backend=backend)
+        assert await fresh.load() == 1
+        assert fresh.lookup(hashes) == (IMAGE_RESULT, 0)
+
+    async def test_resent_photo_skips_vision_call(self):
+        """Test that the analyzer answers a resend from the cache."""
+        llm = AsyncMock()
+        llm.analyze_with_vision = AsyncMock(return_value=json.dumps(IMAGE_RESULT))
+        analyzer = VeterinaryAnalyzer(
+            llm,
+            image_preprocessor=_preprocessor(_encode(MANDELBROT, quality=90)),
+            image_cache=ImageResultCache(),
+        )
+
+        first = await analyzer.analyze_image("https://example.com/a.jpg", "orelha")
+        analyzer.image_preprocessor = _preprocessor(_encode(MANDELBROT, quality=30))
+        second = await analyzer.analyze_image("https://example.com/b.jpg", "orelha")
+
+        assert first == second == IMAGE_RESULT
+        assert llm.analyze_with_vision.await_count == 1
+        assert analyzer.cache_stats()["image"]["hits"] == 1
+        await analyzer.aclose()
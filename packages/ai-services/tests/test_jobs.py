@@ -0,0 +1,149 @@
+"""
+Tests for the bulk diagnosis job API.
+"""
+import asyncio
+import json
+import time
+from unittest.mock import AsyncMock
+
+from src.diagnosis.analyzer import VeterinaryAnalyzer
+from src.jobs.manager import BulkJobManager, InteractiveLoad
+from src.jobs.store import MemoryJobStore
+
+RESULT = {"needs_clarification": False, "diagnosis": None}
+
+
+def _item(index: int) -> dict:
+    return {
+        "symptoms": f"Cachorro vomitando ha {index} dias",
+        "pet_id": f"pet-{index}",
+        "consultation_id": f"consult-{index}",
+    }
+
+
+def _analyzer(side_effect=None) -> AsyncMock:
+    analyzer = AsyncMock()
+    analyzer.analyze_symptoms = AsyncMock(return_value=RESULT, side_effect=side_effect)
+    return analyzer
+
+
+async def _wait_done(manager: BulkJobManager, job_id: str) -> dict:
+    for _ in range(200):
+        job = await manager.status(job_id)
+        if job["status"] == "completed":
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+class TestBulkJobManager:
+    """Test cases for the background worker pool."""
+
+    async def test_processes_all_items_and_records_failures(self):
+        """Test that every item produces a result line and errors are counted."""
+
+        async def analyze(symptoms, **kwargs):
+            if "2 dias" in symptoms:
+                raise ValueError("provider down")
+            return RESULT
+
+        manager = BulkJobManager(_analyzer(analyze), MemoryJobStore(), concurrency=2)
+        manager.start()
+
+        job_id = await manager.submit([_item(i) for i in range(4)])
+        job = await _wait_done(manager, job_id)
+        lines = await manager.results(job_id)
+
+        assert (job["completed"], job["failed"], job["progress"]) == (3, 1, 1.0)
+        assert sorted(line["index"] for line in lines) == [0, 1, 2, 3]
+        assert [line["error"] for line in lines if "error" in line] == ["provider down"]
+        await manager.aclose()
+
+    async def test_provider_outage_fails_items(self):
+        """Test that an analyzer falling back to its default answer records a failure."""
+        llm = AsyncMock()
+        llm.complete = AsyncMock(side_effect=RuntimeError("All LLM providers failed"))
+        manager = BulkJobManager(VeterinaryAnalyzer(llm), MemoryJobStore(), concurrency=1)
+        manager.start()
+
+        job_id = await manager.submit([_item(0)])
+        job = await _wait_done(manager, job_id)
+        (line,) = await manager.results(job_id)
+
+        assert (job["completed"], job["failed"]) == (0, 1)
+        assert line["error"] == "All LLM providers failed"
+        assert "result" not in line
+        await manager.aclose()
+
+    async def test_concurrency_is_bounded(self):
+        """Test that no more than `concurrency` items run at once."""
+        running = peak = 0
+
+        async def analyze(**kwargs):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return RESULT
+
+        manager = BulkJobManager(_analyzer(analyze), MemoryJobStore(), concurrency=3)
+        manager.start()
+        await _wait_done(manager, await manager.submit([_item(i) for i in range(12)]))
+
+        assert peak == 3
+        await manager.aclose()
+
+    async def test_workers_yield_to_interactive_traffic(self):
+        """Test that bulk items wait while interactive load is at the threshold."""
+        load = InteractiveLoad()
+        analyzer = _analyzer()
+        manager = BulkJobManager(analyzer, MemoryJobStore(), load=load, yield_threshold=1)
+        manager.start()
+
+        async with load.track():
+            job_id = await manager.submit([_item(0)])
+            await asyncio.sleep(0.05)
+            assert analyzer.analyze_symptoms.await_count == 0
+
+        await _wait_done(manager, job_id)
+        assert analyzer.analyze_symptoms.await_count == 1
+        await manager.aclose()
+
+
+class TestJobEndpoints:
+    """Test cases for the job submission and result endpoints."""
+
+    def test_submit_status_and_results(self, test_client):
+        """Test the JSON-lines round trip through the API."""
+        test_client.app.state.job_manager.analyzer = _analyzer()
+        body = "\n".join(json.dumps(_item(i)) for i in range(3)) + "\n"
+
+        response = test_client.post("/api/v1/diagnosis/jobs?clinic_id=c1", content=body)
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+
+        for _ in range(200):
+            status = test_client.get(f"/api/v1/diagnosis/jobs/{job_id}").json()
+            if status["status"] == "completed":
+                break
+            time.sleep(0.01)
+
+        assert status["completed"] == 3
+        assert status["meta"] == {"clinic_id": "c1"}
+        results = test_client.get(f"/api/v1/diagnosis/jobs/{job_id}/results?offset=1")
+        assert results.headers["content-type"] == "application/x-ndjson"
+        assert len(results.text.splitlines()) == 2
+
+    def test_invalid_line_is_reported(self, test_client):
+        """Test that a malformed line rejects the whole job with its line number."""
+        body = json.dumps(_item(0)) + "\n" + json.dumps({"symptoms": "tosse"}) + "\n"
+
+        response = test_client.post("/api/v1/diagnosis/jobs", content=body)
+
+        assert response.status_code == 422
+        assert response.json()["detail"].startswith("Line 2:")
+
+    def test_unknown_job(self, test_client):
+        """Test that unknown job ids return 404."""
+        assert test_client.get("/api/v1/diagnosis/jobs/nope").status_code == 404
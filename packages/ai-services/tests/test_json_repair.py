@@ -0,0 +1,215 @@
+"""
+Tests for tolerant JSON repair of LLM answers.
+"""
+import json
+import time
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.cache.backends import MemoryBackend
+from src.cache.response_cache import ResponseCache
+from src.diagnosis.analyzer import VeterinaryAnalyzer
+from src.diagnosis.schemas import SymptomAnalysisResponse, TreatmentResponse
+from src.llm.repair import fill_missing, loads, repair_json, salvage
+
+# (name, raw model output, expected parse result)
+CORPUS = [
+    (
+        "prose_and_fence",
+        'Claro! Segue a analise:\n```json\n{"needs_clarification": false}\n```\nAbraco.',
+        {"needs_clarification": False},
+    ),
+    (
+        "unclosed_fence",
+        '```json\n{"confidence": 0.8}',
+        {"confidence": 0.8},
+    ),
+    (
+        "prose_without_fence",
+        'Aqui esta o JSON: {"a": [1, 2]} Espero ter ajudado!',
+        {"a": [1, 2]},
+    ),
+    (
+        "object_then_prose",
+        '{"a": 1}\n\nEspero ter ajudado!',
+        {"a": 1},
+    ),
+    (
+        "trailing_commas",
+        '{"monitoring": ["apetite", "vomitos",], "follow_up": "48h",}',
+        {"monitoring": ["apetite", "vomitos"], "follow_up": "48h"},
+    ),
+    (
+        "line_and_block_comments",
+        '{"confidence": 0.75 // se diagnosis presente\n, /* nota */ "x": 1}',
+        {"confidence": 0.75, "x": 1},
+    ),
+    (
+        "template_placeholder_echoed",
+        '{\n "needs_clarification": true/false,\n "clarifying_questions": ["Ha quanto tempo?"]'
+        " // se needs_clarification = true\n}",
+        {"clarifying_questions": ["Ha quanto tempo?"]},
+    ),
+    (
+        "single_quotes_and_python_literals",
+        "{'primary': 'Otite', 'neutered': True, 'notes': None, 'tip': 'it\\'s ok'}",
+        {"primary": "Otite", "neutered": True, "notes": None, "tip": "it's ok"},
+    ),
+    (
+        "unquoted_keys",
+        '{primary: "Otite", urgency_level: "low"}',
+        {"primary": "Otite", "urgency_level": "low"},
+    ),
+    (
+        "missing_commas",
+        '{"a": 1\n "b": [1 2]}',
+        {"a": 1, "b": [1, 2]},
+    ),
+    (
+        "raw_newline_in_string",
+        '{"follow_up": "Retorno em 48h.\nObservar apetite."}',
+        {"follow_up": "Retorno em 48h.\nObservar apetite."},
+    ),
+    (
+        "truncated_in_string_value",
+        '{"medications": [{"name": "Amoxicilina", "dosage": "10m',
+        {"medications": [{"name": "Amoxicilina"}]},
+    ),
+    (
+        "truncated_after_key",
+        '{"supportive_care": ["Repouso"], "monitoring"',
+        {"supportive_care": ["Repouso"]},
+    ),
+    (
+        "truncated_after_colon",
+        '{"supportive_care": ["Repouso"], "monitoring": ',
+        {"supportive_care": ["Repouso"]},
+    ),
+    (
+        "truncated_number",
+        '{"diagnosis": {"primary": "Gastrite"}, "confidence": 0.8',
+        {"diagnosis": {"primary": "Gastrite"}},
+    ),
+    (
+        "truncated_nested_array",
+        '{"diagnosis": {"differentials": [{"condition": "A", "probability": 30}, {"cond',
+        {"diagnosis": {"differentials": [{"condition": "A", "probability": 30}, {}]}},
+    ),
+]
+
+
+class TestRepairCorpus:
+    """Test cases for the repair parser against captured failure shapes."""
+
+    @pytest.mark.parametrize("name,raw,expected", CORPUS, ids=[c[0] for c in CORPUS])
+    def test_corpus(self, name, raw, expected):
+        """Test that each malformed answer parses to the expected value."""
+        assert loads(raw) == expected
+
+    @pytest.mark.parametrize(
+        "name", ["prose_and_fence", "prose_without_fence", "object_then_prose"]
+    )
+    def test_wrapped_json_is_not_repaired(self, name):
+        """Test that valid JSON around prose or fences parses without counting as repaired."""
+        raw, expected = next((r, e) for n, r, e in CORPUS if n == name)
+
+        assert salvage(raw) == (expected, False)
+
+    def test_valid_json_is_untouched(self):
+        """Test that well-formed JSON round-trips through the repair pass."""
+        doc = {"a": [1, {"b": "c, d}"}], "e": None, "f": -1.5e3}
+        text = json.dumps(doc)
+
+        assert json.loads(repair_json(text)) == doc
+
+    def test_no_json_raises(self):
+        """Test that text without any object is rejected."""
+        with pytest.raises(ValueError):
+            loads("Desculpe, nao consigo ajudar com isso.")
+
+    def test_repair_is_fast(self):
+        """Microbenchmark: repairing a typical answer stays well under a millisecond."""
+        medication = (
+            '{"name": "Dipirona", "dosage": "25mg/kg", "route": "oral",'
+            ' "frequency": "a cada 8h", "duration": "3 dias",},'
+        )
+        truncated = '```json\n{"medications": [' + medication * 8 + '{"name": "Ome'
+        texts = [c[1] for c in CORPUS] + [truncated]
+
+        start = time.perf_counter()
+        for _ in range(200):
+            for text in texts:
+                try:
+                    loads(text)
+                except ValueError:
+                    pass
+        elapsed = time.perf_counter() - start
+
+        assert elapsed / (200 * len(texts)) < 0.001
+
+
+class TestSchemaDefaults:
+    """Test cases for completing salvaged answers against the models."""
+
+    def test_truncated_treatment_validates(self):
+        """Test that a truncated protocol keeps only complete medications."""
+        data = loads(
+            '{"medications": [{"name": "Dipirona", "dosage": "25mg/kg", "route": "oral",'
+            ' "frequency": "a cada 8h", "duration": "3 dias"}, {"name": "Omepr'
+        )
+
+        filled = fill_missing(data, TreatmentResponse, {"follow_up": "Retorno em 48h"})
+        protocol = TreatmentResponse(**filled)
+
+        assert [m.name for m in protocol.medications] == ["Dipirona"]
+        assert protocol.supportive_care == [] and protocol.follow_up == "Retorno em 48h"
+
+    def test_incomplete_optional_submodel_is_dropped(self):
+        """Test that a half-written diagnosis is removed rather than invented."""
+        filled = fill_missing(
+            {"needs_clarification": True, "diagnosis": {"primary": "Gastrite"}},
+            SymptomAnalysisResponse,
+        )
+
+        assert "diagnosis" not in filled
+        SymptomAnalysisResponse(**filled)
+
+    async def test_analyzer_salvages_echoed_template(self):
+        """Test that the analyzer uses a repaired answer instead of the default."""
+        llm = AsyncMock()
+        llm.complete = AsyncMock(
+            return_value='{"needs_clarification": true/false, "clarifying_questions":'
+            ' ["O animal esta bebendo agua?"] // se needs_clarification = true\n}'
+        )
+        analyzer = VeterinaryAnalyzer(llm)
+
+        result = await analyzer.analyze_symptoms("vomito", {"species": "dog"})
+
+        assert result == {
+            "needs_clarification": True,
+            "clarifying_questions": ["O animal esta bebendo agua?"],
+        }
+
+    async def test_repaired_answers_are_not_cached(self):
+        """Test that a salvaged protocol is served once but a clean one is cached."""
+        truncated = (
+            '{"medications": [{"name": "Dipirona", "dosage": "25mg/kg", "route": "oral",'
+            ' "frequency": "a cada 8h", "duration": "3 dias"}, {"name": "Omepr'
+        )
+        clean = (
+            '{"medications": [], "supportive_care": ["Repouso"], "monitoring": [],'
+            ' "follow_up": "Retorno em 7 dias"}'
+        )
+        llm = AsyncMock()
+        llm.complete = AsyncMock(side_effect=[truncated, clean])
+        analyzer = VeterinaryAnalyzer(llm, cache=ResponseCache(MemoryBackend(), ttl_seconds=60))
+        diagnosis = {"primary": "Gastrite", "differentials": [], "urgency_level": "low"}
+
+        salvaged = await analyzer.get_treatment_protocol(diagnosis)
+        fresh = await analyzer.get_treatment_protocol(diagnosis)
+        cached = await analyzer.get_treatment_protocol(diagnosis)
+
+        assert [m["name"] for m in salvaged["medications"]] == ["Dipirona"]
+        assert fresh == cached and fresh["follow_up"] == "Retorno em 7 dias"
+        assert llm.complete.await_count == 2
@@ -0,0 +1,118 @@
+"""
+Tests for the Prometheus metrics surface.
+"""
+import time
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.diagnosis.analyzer import VeterinaryAnalyzer
+from src.llm.orchestrator import LLMOrchestrator
+from src.telemetry.metrics import (
+    DEFAULT_RESPONSES,
+    LLM_CALL_DURATION,
+    LLM_FALLBACKS,
+    PARSE_FAILURES,
+    MetricsRegistry,
+)
+
+
+class TestMetricsRegistry:
+    """Test cases for the registry and text format."""
+
+    def test_histogram_renders_cumulative_buckets(self):
+        """Test bucket, sum and count lines of a labelled histogram."""
+        registry = MetricsRegistry()
+        histogram = registry.histogram("latency_seconds", "Latency", ("route",), (0.1, 1.0))
+        histogram.observe(0.05, "/a")
+        histogram.observe(0.5, "/a")
+        histogram.observe(5.0, "/a")
+
+        text = registry.render()
+
+        assert "# TYPE latency_seconds histogram" in text
+        assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in text
+        assert 'latency_seconds_bucket{route="/a",le="1.0"} 2' in text
+        assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in text
+        assert 'latency_seconds_count{route="/a"} 3' in text
+
+    def test_label_values_are_escaped(self):
+        """Test that quotes and backslashes in label values are escaped."""
+        registry = MetricsRegistry()
+        registry.counter("errors_total", "Errors", ("kind",)).inc('say "oi"\\')
+
+        assert 'errors_total{kind="say \\"oi\\"\\\\"} 1.0' in registry.render()
+
+    def test_wrong_label_count_is_rejected_when_recorded(self):
+        """Test that a label mismatch fails at the call site, not at scrape time."""
+        registry = MetricsRegistry()
+        counter = registry.counter("fallbacks_total", "Fallbacks", ("from", "to"))
+        histogram = registry.histogram("latency_seconds", "Latency", ("route",))
+
+        with pytest.raises(ValueError):
+            counter.inc("openai")
+        with pytest.raises(ValueError):
+            histogram.observe(0.1)
+
+        assert registry.render().count("\n") == 4  # HELP and TYPE lines only
+
+    def test_observation_overhead_is_microseconds(self):
+        """Test that recording a histogram sample costs a few microseconds at most."""
+        histogram = MetricsRegistry().histogram("h", "H", ("method", "route", "status"))
+        start = time.perf_counter()
+        for _ in range(100_000):
+            histogram.observe(0.2, "POST", "/api/v1/diagnosis/analyze", "200")
+        per_call = (time.perf_counter() - start) / 100_000
+
+        assert per_call < 5e-6
+
+
+class TestInstrumentation:
+    """Test cases for metrics recorded by the orchestrator and analyzer."""
+
+    async def test_fallback_and_call_latency_are_recorded(self):
+        """Test that a failed provider counts a fallback and both calls are timed."""
+        orchestrator = LLMOrchestrator()
+        orchestrator._openai_complete = AsyncMock(side_effect=RuntimeError("503"))
+        orchestrator._anthropic_complete = AsyncMock(return_value="ok")
+        model = orchestrator._model("openai", "large")
+        fallbacks = LLM_FALLBACKS.value("openai", "anthropic")
+        errors = LLM_CALL_DURATION.count("openai", model, "error")
+
+        assert await orchestrator.complete("Paciente: Rex", provider="openai") == "ok"
+
+        assert LLM_FALLBACKS.value("openai", "anthropic") == fallbacks + 1
+        assert LLM_CALL_DURATION.count("openai", model, "error") == errors + 1
+
+    async def test_parse_failure_and_default_are_counted(self):
+        """Test that an unparseable answer counts a parse failure and a canned default."""
+        llm = AsyncMock()
+        llm.complete = AsyncMock(return_value="desculpe, nao consigo ajudar")
+        analyzer = VeterinaryAnalyzer(llm)
+        failures = PARSE_FAILURES.value("SymptomAnalysisResponse")
+        defaults = DEFAULT_RESPONSES.value("symptoms")
+
+        result = await analyzer.analyze_symptoms("Tosse", {"species": "dog"})
+
+        assert result["needs_clarification"] is True
+        assert PARSE_FAILURES.value("SymptomAnalysisResponse") == failures + 1
+        assert DEFAULT_RESPONSES.value("symptoms") == defaults + 1
+
+
+class TestMetricsEndpoint:
+    """Test cases for the /metrics endpoint."""
+
+    def test_exposes_route_latency_and_service_counters(self, test_client):
+        """Test that requests are recorded by route template next to service counters."""
+        test_client.get("/health")
+
+        response = test_client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert (
+            'petvet_http_request_duration_seconds_bucket{method="GET",route="/health",'
+            'status="200",le="+Inf"}'
+        ) in response.text
+        assert "# TYPE petvet_llm_tokens_total counter" in response.text
+        assert 'petvet_llm_circuit_state{provider="openai"} 0' in response.text
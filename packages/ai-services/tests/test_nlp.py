@@ -1,9 +1,13 @@
 """
 Tests for NLP processing endpoints.
 """
+import time
+
 import pytest
 from unittest.mock import patch, MagicMock
 
+from src.nlp.intent import IntentEngine
+
 
 class TestNLPEndpoints:
     """Test cases for NLP API endpoints."""
@@ -89,3 +93,104 @@ class TestNLPResponseFormat:
         for entity in mock_entities:
             assert "type" in entity
             assert "value" in entity
+
+
+class TestIntentEngine:
+    """Test cases for the precompiled intent engine."""
+
+    @pytest.fixture
+    def engine(self):
+        """Intent engine with the default keyword table."""
+        return IntentEngine()
+
+    def test_mixed_message_ranks_strongest_intent_first(self, engine):
+        """Test that a greeting prefix does not hide a consultation."""
+        result = engine.classify("oi, meu cachorro esta doente")
+
+        assert result.intent == "consultation"
+        assert [intent for intent, _ in result.ranking] == ["consultation", "greeting", "pet_info"]
+        assert sum(score for _, score in result.ranking) < 1.0
+
+    def test_accent_and_case_folding(self, engine):
+        """Test that accented and upper-case keywords match."""
+        assert engine.classify("OLÁ!").intent == "greeting"
+        assert engine.classify("Meu gato está com VÔMITO").intent == "consultation"
+
+    def test_word_boundaries(self, engine):
+        """Test that keywords do not match inside other words."""
+        assert engine.classify("adorei o atendimento").intent == "unknown"
+        assert engine.classify("Oiapoque").intent == "unknown"
+
+    def test_prefix_patterns_and_phrases(self, engine):
+        """Test inflected forms and multi-word phrases."""
+        assert engine.classify("ele vomitou a noite toda").intent == "consultation"
+        assert engine.classify("boa noite").intent == "greeting"
+        assert engine.classify("noite").intent == "unknown"
+
+    def test_unknown_keeps_default_confidence(self, engine):
+        """Test the response for text without any keyword."""
+        result = engine.classify("12345")
+
+        assert result.intent == "unknown"
+        assert result.confidence == 0.5
+        assert result.ranking == []
+
+    def test_classification_is_sub_millisecond(self, engine):
+        """Test that classification stays well under a millisecond per message."""
+        text = "Bom dia! Meu cachorro nao esta comendo e vomitou duas vezes hoje, socorro"
+
+        start = time.perf_counter()
+        for _ in range(1000):
+            engine.classify(text)
+        elapsed = time.perf_counter() - start
+
+        assert elapsed / 1000 < 0.001
+
+    def test_intent_endpoint_returns_ranking(self, test_client):
+        """Test the endpoint response shape."""
+        response = test_client.post("/api/v1/nlp/intent", json={"text": "quero ver o plano"})
+        data = response.json()
+
+        assert response.status_code == 200
+        assert data["intent"] == "subscription"
+        assert data["ranking"][0] == {"intent": "subscription", "score": data["confidence"]}
+
+
+class TestBatchIntent:
+    """Test cases for batch intent classification."""
+
+    def test_results_keep_input_order(self, test_client):
+        """Test that each result lines up with its input."""
+        texts = ["menu", "oi", "meu gato vomitou", "xyz"]
+        response = test_client.post(
+            "/api/v1/nlp/intent/batch",
+            json={"items": [{"text": t, "context": {"n": i}} for i, t in enumerate(texts)]},
+        )
+
+        assert response.status_code == 200
+        intents = [r["intent"] for r in response.json()["results"]]
+        assert intents == ["menu", "greeting", "consultation", "unknown"]
+
+    def test_empty_and_oversized_batches_rejected(self, test_client):
+        """Test request-size limits."""
+        from src.config import settings
+
+        empty = test_client.post("/api/v1/nlp/intent/batch", json={"items": []})
+        too_many = test_client.post(
+            "/api/v1/nlp/intent/batch",
+            json={"items": [{"text": "oi"}] * (settings.nlp_batch_max_items + 1)},
+        )
+
+        assert empty.status_code == 422
+        assert too_many.status_code == 422
+
+    def test_total_text_limit(self, test_client, monkeypatch):
+        """Test that oversized text payloads are refused."""
+        from src.config import settings
+
+        monkeypatch.setattr(settings, "nlp_batch_max_chars", 10)
+        response = test_client.post(
+            "/api/v1/nlp/intent/batch", json={"items": [{"text": "a" * 6}, {"text": "b" * 6}]}
+        )
+
+        assert response.status_code == 413
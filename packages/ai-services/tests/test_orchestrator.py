@@ -0,0 +1,645 @@
+"""
+Tests for the LLM orchestrator.
+"""
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import httpx
+import pytest
+
+from src.config import settings
+from src.diagnosis.analyzer import VeterinaryAnalyzer
+from src.diagnosis.schemas import SymptomAnalysisResponse
+from src.diagnosis.triage import TriageEngine
+from src.llm.cascade import ModelCascade
+from src.llm.hedging import HedgeBudget, Hedger
+from src.llm.orchestrator import LLMOrchestrator
+from src.llm.ratelimit import Priority, RateLimiter, RateLimitExceededError, llm_priority
+from src.llm.router import NoHealthyProviderError, ProviderRouter
+from src.llm.singleflight import SingleFlight
+from src.llm.structured import strict_json_schema
+from src.llm.usage import anthropic_usage, openai_usage
+
+
+@pytest.fixture
+def orchestrator():
+    """Orchestrator with both providers configured (keys come from conftest)."""
+    return LLMOrchestrator()
+
+
+class TestSingleFlight:
+    """Test cases for coalescing identical in-flight completions."""
+
+    async def test_concurrent_identical_calls_share_one_provider_call(self, orchestrator):
+        """Test that concurrent duplicates trigger a single provider call."""
+
+        async def slow_complete(*args):
+            await asyncio.sleep(0.01)
+            return "resposta"
+
+        orchestrator._openai_complete = AsyncMock(side_effect=slow_complete)
+
+        results = await asyncio.gather(
+            *[orchestrator.complete("mesmo prompt", "sistema", 0.3, 100) for _ in range(5)]
+        )
+
+        assert results == ["resposta"] * 5
+        assert orchestrator._openai_complete.await_count == 1
+        assert orchestrator.singleflight.stats()["coalesced"] == 4
+
+    async def test_different_parameters_are_not_coalesced(self, orchestrator):
+        """Test that calls differing in any parameter run separately."""
+        orchestrator._openai_complete = AsyncMock(return_value="ok")
+
+        await asyncio.gather(
+            orchestrator.complete("prompt", temperature=0.3),
+            orchestrator.complete("prompt", temperature=0.7),
+        )
+
+        assert orchestrator._openai_complete.await_count == 2
+
+    async def test_priorities_are_not_coalesced(self, orchestrator):
+        """Test that an interactive call does not join an in-flight bulk call."""
+
+        async def slow_complete(*args):
+            await asyncio.sleep(0.01)
+            return "resposta"
+
+        orchestrator._openai_complete = AsyncMock(side_effect=slow_complete)
+
+        async def bulk():
+            with llm_priority(Priority.BULK):
+                return await orchestrator.complete("mesmo prompt")
+
+        await asyncio.gather(bulk(), orchestrator.complete("mesmo prompt"))
+
+        assert orchestrator._openai_complete.await_count == 2
+
+    async def test_failure_propagates_to_every_waiter(self):
+        """Test that an exception reaches all coalesced callers."""
+        flight = SingleFlight()
+        calls = 0
+
+        async def failing():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            raise RuntimeError("rate limited")
+
+        results = await asyncio.gather(
+            *[flight.do("k", failing) for _ in range(3)], return_exceptions=True
+        )
+
+        assert calls == 1
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert flight.stats()["in_flight"] == 0
+
+    async def test_cancelled_waiter_does_not_cancel_shared_call(self):
+        """Test that one caller timing out leaves the others unaffected."""
+        flight = SingleFlight()
+
+        async def slow():
+            await asyncio.sleep(0.02)
+            return 42
+
+        impatient = asyncio.create_task(flight.do("k", slow))
+        patient = asyncio.create_task(flight.do("k", slow))
+        await asyncio.sleep(0)
+        impatient.cancel()
+
+        assert await patient == 42
+
+
+class TestHedging:
+    """Test cases for hedged provider requests."""
+
+    @pytest.fixture
+    def hedged(self, orchestrator):
+        """Orchestrator with a short fixed hedge delay."""
+        orchestrator.hedger = Hedger(initial_delay=0.01, budget=HedgeBudget(ratio=1.0))
+        return orchestrator
+
+    async def test_slow_primary_is_hedged_and_cancelled(self, hedged):
+        """Test that the secondary wins when the primary is slow."""
+        primary_cancelled = asyncio.Event()
+
+        async def slow_openai(*args):
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                primary_cancelled.set()
+                raise
+            return "openai"
+
+        hedged._openai_complete = AsyncMock(side_effect=slow_openai)
+        hedged._anthropic_complete = AsyncMock(return_value="anthropic")
+
+        result = await hedged.complete("prompt")
+        await asyncio.sleep(0)
+
+        assert result == "anthropic"
+        assert primary_cancelled.is_set()
+        assert hedged.hedger.stats()["hedge_wins"] == 1
+
+    async def test_fast_primary_is_not_hedged(self, hedged):
+        """Test that a primary answering within the delay is never hedged."""
+        hedged._openai_complete = AsyncMock(return_value="openai")
+        hedged._anthropic_complete = AsyncMock(return_value="anthropic")
+
+        assert await hedged.complete("prompt") == "openai"
+        hedged._anthropic_complete.assert_not_awaited()
+
+    async def test_budget_caps_hedges(self):
+        """Test that hedges stop once the traffic budget is spent."""
+        hedger = Hedger(initial_delay=0.001, budget=HedgeBudget(ratio=0.0, burst=1.0))
+
+        async def slow():
+            await asyncio.sleep(0.01)
+            return "primary"
+
+        async def fast():
+            return "secondary"
+
+        assert await hedger.run("openai", slow, fast) == "secondary"
+        assert await hedger.run("openai", slow, fast) == "primary"
+        assert hedger.stats()["budget_denied"] == 1
+
+    def test_delay_tracks_latency_percentile(self):
+        """Test that the hedge delay follows the observed percentile."""
+        hedger = Hedger(percentile=0.9, min_samples=10, min_delay=0.0)
+        for i in range(1, 11):
+            hedger.record_latency("openai", float(i))
+
+        assert hedger.delay_for("openai") == 9.0
+        assert hedger.delay_for("anthropic") == hedger.initial_delay
+
+
+class TestProviderRouter:
+    """Test cases for latency-aware routing and circuit breakers."""
+
+    def test_routes_to_lowest_latency_provider(self):
+        """Test that the faster provider is ordered first."""
+        router = ProviderRouter(["openai", "anthropic"])
+        router.record_success("openai", 4.0)
+        router.record_success("anthropic", 1.0)
+
+        assert router.order() == ["anthropic", "openai"]
+        assert router.order("openai") == ["openai", "anthropic"]
+
+    def test_circuit_opens_and_half_opens(self):
+        """Test the closed -> open -> half-open -> closed cycle."""
+        now = [0.0]
+        router = ProviderRouter(
+            ["openai", "anthropic"], failure_threshold=2, open_seconds=30, clock=lambda: now[0]
+        )
+        router.record_failure("openai")
+        router.record_failure("openai")
+
+        assert router.order() == ["anthropic"]
+        assert router.snapshot()["openai"]["state"] == "open"
+
+        now[0] = 31.0
+        assert router.acquire("openai")
+        assert not router.acquire("openai")  # only one half-open probe
+        router.record_success("openai", 0.5)
+
+        assert router.snapshot()["openai"]["state"] == "closed"
+
+    async def test_open_circuit_is_skipped_without_retry_sleeps(self, orchestrator):
+        """Test that an open provider costs no call and no backoff."""
+        orchestrator.router.failure_threshold = 1
+        orchestrator._openai_complete = AsyncMock(side_effect=RuntimeError("down"))
+        orchestrator._anthropic_complete = AsyncMock(return_value="anthropic")
+
+        assert await orchestrator.complete("p1") == "anthropic"
+        assert await orchestrator.complete("p2") == "anthropic"
+
+        assert orchestrator._openai_complete.await_count == 1
+        assert orchestrator._anthropic_complete.await_count == 2
+
+    async def test_all_circuits_open_fails_fast(self, orchestrator):
+        """Test that no retry rounds are spent when every circuit is open."""
+        for name in ("openai", "anthropic"):
+            for _ in range(orchestrator.router.failure_threshold):
+                orchestrator.router.record_failure(name)
+        orchestrator._openai_complete = AsyncMock(return_value="never")
+
+        with pytest.raises(NoHealthyProviderError):
+            await orchestrator.complete("prompt")
+        orchestrator._openai_complete.assert_not_awaited()
+
+    async def test_stream_outcomes_feed_the_circuits(self, orchestrator):
+        """Test that streams record failures before the first token and successes at the end."""
+        orchestrator.router.failure_threshold = 1
+
+        async def broken(*args):
+            raise RuntimeError("503")
+            yield
+
+        async def answer(*args):
+            yield "ok"
+
+        orchestrator._openai_stream = broken
+        orchestrator._anthropic_stream = answer
+
+        assert [d async for d in orchestrator.stream("p", provider="openai")] == ["ok"]
+
+        health = orchestrator.router.snapshot()
+        assert health["openai"]["state"] == "open"
+        assert health["anthropic"]["successes"] == 1
+        assert health["anthropic"]["ewma_latency_ms"] is not None
+
+    async def test_half_open_provider_gets_one_stream_probe(self, orchestrator):
+        """Test that concurrent streams respect the single half-open probe."""
+        router = orchestrator.router
+        router.providers.pop("anthropic")
+        for _ in range(router.failure_threshold):
+            router.record_failure("openai")
+        router.providers["openai"].opened_at -= router.open_seconds
+        release = asyncio.Event()
+
+        async def slow(*args):
+            await release.wait()
+            yield "ok"
+
+        orchestrator._openai_stream = slow
+
+        async def consume():
+            return [d async for d in orchestrator.stream("p")]
+
+        probe = asyncio.create_task(consume())
+        await asyncio.sleep(0)
+        with pytest.raises(NoHealthyProviderError):
+            await asyncio.wait_for(consume(), timeout=1.0)
+        release.set()
+
+        assert await probe == ["ok"]
+        assert router.snapshot()["openai"]["state"] == "closed"
+
+
+class TestRateLimiter:
+    """Test cases for per-provider RPM/TPM budgets."""
+
+    async def test_exhausted_budget_is_rejected_within_bound(self):
+        """Test that a call is rejected once its wait would exceed max_wait."""
+        limiter = RateLimiter({"openai": (2, 0)}, max_wait=0.05)
+
+        await limiter.acquire("openai", 100)
+        await limiter.acquire("openai", 100)
+        with pytest.raises(RateLimitExceededError):
+            await limiter.acquire("openai", 100)
+
+        assert limiter.snapshot()["openai"]["rejected"] == 1
+        assert await limiter.acquire("anthropic", 10**6) == 0.0  # no budget configured
+
+    async def test_waiting_calls_are_admitted_by_urgency(self):
+        """Test that an emergency overtakes NLP and bulk calls queued before it."""
+        limiter = RateLimiter({"openai": (0, 6000)}, max_wait=5.0)  # 100 tokens/s
+        await limiter.acquire("openai", 6000)
+        admitted = []
+
+        async def call(priority):
+            await limiter.acquire("openai", 10, priority)
+            admitted.append(priority)
+
+        tasks = []
+        for priority in (Priority.BULK, Priority.NLP, Priority.EMERGENCY):
+            tasks.append(asyncio.create_task(call(priority)))
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+
+        assert admitted == [Priority.EMERGENCY, Priority.NLP, Priority.BULK]
+
+    async def test_priority_comes_from_context(self):
+        """Test that calls inherit the priority set by llm_priority."""
+        limiter = RateLimiter({"openai": (0, 600)}, max_wait=0.0, bulk_max_wait=1.0)
+        await limiter.acquire("openai", 600)  # next token in 0.1s
+
+        with pytest.raises(RateLimitExceededError):
+            await limiter.acquire("openai", 1)
+        with llm_priority(Priority.BULK):
+            assert await limiter.acquire("openai", 1) > 0
+
+    async def test_orchestrator_falls_back_then_fails_without_retry(self, orchestrator):
+        """Test that exhausted budgets fall back once and then fail fast."""
+        orchestrator.rate_limiter = RateLimiter(
+            {"openai": (1, 0), "anthropic": (1, 0)}, max_wait=0.01
+        )
+        orchestrator._openai_complete = AsyncMock(return_value="openai")
+        orchestrator._anthropic_complete = AsyncMock(return_value="anthropic")
+
+        assert await orchestrator.complete("p1") in ("openai", "anthropic")
+        assert await orchestrator.complete("p2") in ("openai", "anthropic")
+        with pytest.raises(RateLimitExceededError):
+            await orchestrator.complete("p3")
+
+        calls = orchestrator._openai_complete.await_count
+        assert calls + orchestrator._anthropic_complete.await_count == 2
+
+    async def test_open_circuit_spends_no_budget(self, orchestrator):
+        """Test that a provider skipped by its circuit keeps its rate limit budget."""
+        orchestrator.rate_limiter = RateLimiter({"openai": (1, 0)}, max_wait=0.01)
+        orchestrator._openai_complete = AsyncMock(return_value="openai")
+        router = orchestrator.router
+        for _ in range(router.failure_threshold):
+            router.record_failure("openai")
+        router.providers["openai"].opened_at -= router.open_seconds
+        assert router.acquire("openai")  # another call holds the half-open probe
+
+        with pytest.raises(NoHealthyProviderError):
+            await orchestrator._call_provider("openai", "p1", None, 0.7, 100)
+
+        assert orchestrator.rate_limiter.snapshot()["openai"]["granted"] == 0
+        router.record_success("openai", 0.5)
+        assert await orchestrator.complete("p2", provider="openai") == "openai"
+
+
+class TestClientLifecycle:
+    """Test cases for shared, lifespan-managed provider clients."""
+
+    def test_single_orchestrator_shared_and_closed(self):
+        """Test that one orchestrator serves the app and its pools close on shutdown."""
+        from fastapi.testclient import TestClient
+
+        from src.main import app
+
+        with TestClient(app) as client:
+            llm = client.app.state.llm
+            assert client.app.state.analyzer.llm is llm
+            assert all(not c.is_closed for c in llm.http_clients.values())
+
+        assert llm.http_clients
+        assert all(c.is_closed for c in llm.http_clients.values())
+
+    def test_pool_limits_come_from_settings(self, orchestrator):
+        """Test that provider pools use the configured limits."""
+        pool = orchestrator.http_clients["openai"]._transport._pool
+
+        assert pool._max_connections == settings.llm_http_max_connections
+        assert pool._max_keepalive_connections == settings.llm_http_max_keepalive_connections
+
+    async def test_warm_up_opens_connections_per_provider(self, orchestrator, monkeypatch):
+        """Test that warm-up touches every provider base URL."""
+        monkeypatch.setattr(settings, "llm_prewarm_connections", 2)
+        seen = []
+
+        def handler(request):
+            seen.append(request.url.host)
+            return httpx.Response(404)
+
+        for name in list(orchestrator.http_clients):
+            orchestrator.http_clients[name] = httpx.AsyncClient(
+                transport=httpx.MockTransport(handler)
+            )
+
+        await orchestrator.warm_up()
+
+        assert len(seen) == 4
+        assert "api.openai.com" in seen
+        await orchestrator.aclose()
+
+
+class TestPromptCaching:
+    """Test cases for cache-friendly prompt layout and usage accounting."""
+
+    async def test_anthropic_marks_static_prefix_cacheable(self, orchestrator):
+        """Test that system prompt and instructions carry cache breakpoints."""
+        response = SimpleNamespace(
+            content=[SimpleNamespace(text="ok")],
+            usage=SimpleNamespace(
+                input_tokens=40,
+                output_tokens=5,
+                cache_read_input_tokens=1200,
+                cache_creation_input_tokens=0,
+            ),
+        )
+        create = AsyncMock(return_value=response)
+        orchestrator.anthropic_client.messages.create = create
+
+        await orchestrator._anthropic_complete(
+            "Paciente: Rex", "sistema", 0.3, 100, prompt_prefix="instrucoes"
+        )
+
+        kwargs = create.await_args.kwargs
+        assert kwargs["system"][0]["cache_control"] == {"type": "ephemeral"}
+        prefix, patient = kwargs["messages"][0]["content"]
+        assert prefix == {
+            "type": "text",
+            "text": "instrucoes",
+            "cache_control": {"type": "ephemeral"},
+        }
+        assert patient == {"type": "text", "text": "Paciente: Rex"}
+        assert orchestrator.usage.last.cached_input_tokens == 1200
+        assert orchestrator.usage.last.uncached_input_tokens == 40
+
+    def test_openai_prefix_is_identical_across_patients(self, orchestrator):
+        """Test that only the tail of the OpenAI prompt varies per patient."""
+        first = orchestrator._openai_messages("Paciente: Rex", "sistema", "instrucoes")
+        second = orchestrator._openai_messages("Paciente: Mia", "sistema", "instrucoes")
+
+        assert first[0] == second[0] == {"role": "system", "content": "sistema"}
+        assert first[1]["content"].startswith("instrucoes\n\n")
+        assert first[1]["content"].endswith("Paciente: Rex")
+
+    def test_usage_extraction(self):
+        """Test cached token counts from both providers' usage payloads."""
+        oa = openai_usage(
+            {
+                "usage": {
+                    "prompt_tokens": 1500,
+                    "completion_tokens": 80,
+                    "prompt_tokens_details": {"cached_tokens": 1280},
+                }
+            },
+            "gpt-4",
+        )
+        an = anthropic_usage(
+            {
+                "usage": {
+                    "input_tokens": 50,
+                    "output_tokens": 80,
+                    "cache_read_input_tokens": 0,
+                    "cache_creation_input_tokens": 1300,
+                }
+            },
+            "claude",
+        )
+
+        assert (oa.input_tokens, oa.cached_input_tokens, oa.uncached_input_tokens) == (
+            1500,
+            1280,
+            220,
+        )
+        assert (an.input_tokens, an.cached_input_tokens, an.cache_write_tokens) == (1350, 0, 1300)
+
+
+STRUCTURED_ANSWER = {
+    "needs_clarification": False,
+    "clarifying_questions": None,
+    "diagnosis": {
+        "primary": "Gastroenterite",
+        "differentials": [{"condition": "Corpo estranho", "probability": 20}],
+        "urgency_level": "medium",
+    },
+    "confidence": 0.8,
+}
+
+
+def _openai_response(content):
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None
+    )
+
+
+class TestStructuredOutput:
+    """Test cases for schema-constrained completions."""
+
+    def test_strict_schema_requires_every_field(self):
+        """Test that every object is closed and lists all properties as required."""
+        schema = strict_json_schema(SymptomAnalysisResponse)
+
+        assert schema["additionalProperties"] is False
+        assert set(schema["required"]) == set(schema["properties"])
+        diagnosis = schema["$defs"]["Diagnosis"]
+        assert set(diagnosis["required"]) == {"primary", "differentials", "urgency_level"}
+        assert "title" not in schema and "default" not in schema["properties"]["confidence"]
+
+    async def test_openai_answer_validated_into_model(self, orchestrator, monkeypatch):
+        """Test the OpenAI JSON-schema path returns a model instance."""
+        monkeypatch.setattr(settings, "openai_structured_mode", "json_schema")
+        create = AsyncMock(return_value=_openai_response(json.dumps(STRUCTURED_ANSWER)))
+        orchestrator.openai_client.chat.completions.create = create
+
+        answer = await orchestrator.complete_structured(
+            "Paciente: Rex", SymptomAnalysisResponse, provider="openai"
+        )
+
+        assert isinstance(answer, SymptomAnalysisResponse)
+        assert answer.diagnosis.urgency_level == "medium"
+        response_format = create.await_args.kwargs["response_format"]
+        assert response_format["type"] == "json_schema"
+        assert response_format["json_schema"]["strict"] is True
+
+    async def test_anthropic_tool_call_validated_into_model(self, orchestrator):
+        """Test the Anthropic path forces the schema tool and reads its input."""
+        create = AsyncMock(
+            return_value=SimpleNamespace(
+                content=[SimpleNamespace(type="tool_use", input=STRUCTURED_ANSWER)], usage=None
+            )
+        )
+        orchestrator.anthropic_client.messages.create = create
+
+        answer = await orchestrator.complete_structured(
+            "Paciente: Rex", SymptomAnalysisResponse, provider="anthropic"
+        )
+
+        assert answer.diagnosis.primary == "Gastroenterite"
+        assert create.await_args.kwargs["tool_choice"] == {
+            "type": "tool",
+            "name": "SymptomAnalysisResponse",
+        }
+
+    async def test_invalid_answer_falls_back_to_next_provider(self, orchestrator):
+        """Test that a schema violation is retried on the other provider."""
+        orchestrator.openai_client.chat.completions.create = AsyncMock(
+            return_value=_openai_response('{"needs_clarification": "talvez"}')
+        )
+        orchestrator.anthropic_client.messages.create = AsyncMock(
+            return_value=SimpleNamespace(
+                content=[SimpleNamespace(type="tool_use", input=STRUCTURED_ANSWER)], usage=None
+            )
+        )
+
+        answer = await orchestrator.complete_structured(
+            "Paciente: Rex", SymptomAnalysisResponse, provider="openai"
+        )
+
+        assert answer.confidence == 0.8
+
+    async def test_invalid_answers_do_not_open_the_circuit(self, orchestrator):
+        """Test that schema violations fall back without counting as provider failures."""
+        orchestrator.openai_client.chat.completions.create = AsyncMock(
+            return_value=_openai_response('{"needs_clarification": "talvez"}')
+        )
+        orchestrator.anthropic_client.messages.create = AsyncMock(
+            return_value=SimpleNamespace(
+                content=[SimpleNamespace(type="tool_use", input=STRUCTURED_ANSWER)], usage=None
+            )
+        )
+
+        calls = orchestrator.router.failure_threshold + 1
+        for i in range(calls):
+            await orchestrator.complete_structured(
+                f"Paciente {i}", SymptomAnalysisResponse, provider="openai"
+            )
+
+        health = orchestrator.router.snapshot()["openai"]
+        assert health["state"] == "closed"
+        assert health["failures"] == 0
+        assert orchestrator.openai_client.chat.completions.create.await_count == calls
+
+    async def test_analyzer_uses_structured_path(self):
+        """Test that the analyzer returns the validated answer as a dict."""
+        llm = AsyncMock()
+        llm.complete_structured = AsyncMock(
+            return_value=SymptomAnalysisResponse(**STRUCTURED_ANSWER)
+        )
+        analyzer = VeterinaryAnalyzer(llm, structured_output=True)
+
+        result = await analyzer.analyze_symptoms("vomito", {"species": "dog"})
+
+        assert result["diagnosis"]["primary"] == "Gastroenterite"
+        assert "clarifying_questions" not in result
+        llm.complete.assert_not_awaited()
+
+
+class TestModelCascade:
+    """Test cases for fast-model-first completions."""
+
+    async def test_fast_tier_uses_fast_model_in_one_round(self, orchestrator):
+        """Test that the fast tier calls the fast model and is not retried."""
+        create = AsyncMock(side_effect=RuntimeError("overloaded"))
+        orchestrator.openai_client.chat.completions.create = create
+        orchestrator.anthropic_client.messages.create = AsyncMock(side_effect=RuntimeError("down"))
+
+        with pytest.raises(RuntimeError):
+            await orchestrator.complete("Paciente: Rex", tier="fast")
+
+        assert create.await_count == 1
+        assert create.await_args.kwargs["model"] == settings.openai_fast_model
+
+    @pytest.mark.parametrize(
+        "fast_answer, symptoms, tiers, reason",
+        [
+            ({**STRUCTURED_ANSWER, "confidence": 0.9}, "vomito", ["fast"], None),
+            (
+                {**STRUCTURED_ANSWER, "confidence": 0.4},
+                "vomito",
+                ["fast", "large"],
+                "low_confidence",
+            ),
+            (STRUCTURED_ANSWER, "esta convulsionando", ["large"], "triage_emergency"),
+        ],
+    )
+    async def test_analyzer_escalates_only_when_needed(self, fast_answer, symptoms, tiers, reason):
+        """Test acceptance, low-confidence escalation and the emergency shortcut."""
+        answers = {"fast": json.dumps(fast_answer), "large": json.dumps(STRUCTURED_ANSWER)}
+        seen = []
+
+        async def complete(tier="large", **kwargs):
+            seen.append(tier)
+            return answers[tier]
+
+        llm = AsyncMock()
+        llm.complete = AsyncMock(side_effect=complete)
+        cascade = ModelCascade(confidence_threshold=0.7)
+        analyzer = VeterinaryAnalyzer(llm, triage=TriageEngine(), cascade=cascade)
+
+        await analyzer.analyze_symptoms(symptoms, {"species": "dog"})
+
+        stats = cascade.stats()["symptoms"]
+        assert seen == tiers
+        assert stats["reasons"] == ({reason: 1} if reason else {})
+        assert stats["escalation_rate"] == (1.0 if tiers == ["fast", "large"] else 0.0)
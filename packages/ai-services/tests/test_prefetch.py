@@ -0,0 +1,176 @@
+"""
+Tests for the speculative treatment-protocol prefetch.
+"""
+import asyncio
+from unittest.mock import AsyncMock
+
+from src.diagnosis.analyzer import VeterinaryAnalyzer
+from src.diagnosis.prefetch import TreatmentPrefetcher
+from src.diagnosis.schemas import Diagnosis
+from src.llm.ratelimit import Priority, current_priority
+from src.routers.diagnosis import PetInfo
+
+DIAGNOSIS_ANSWER = (
+    '{"needs_clarification": false, "diagnosis": {"primary": "Otite externa",'
+    ' "differentials": [{"condition": "Sarna otodecica", "probability": 20}],'
+    ' "urgency_level": "low"}, "confidence": 0.9}'
+)
+TREATMENT_ANSWER = (
+    '{"medications": [], "supportive_care": ["Limpeza"], "monitoring": ["Coceira"],'
+    ' "follow_up": "Retorno em 7 dias"}'
+)
+PET_INFO = {"species": "dog", "breed": None, "age": 3, "weight": 12.0}
+
+
+def _llm(treatment_delay: float = 0.0) -> AsyncMock:
+    async def complete(prompt, prompt_prefix, **kwargs):
+        if prompt_prefix.startswith("Forneca um protocolo"):
+            await asyncio.sleep(treatment_delay)
+            return TREATMENT_ANSWER
+        return DIAGNOSIS_ANSWER
+
+    llm = AsyncMock()
+    llm.complete = AsyncMock(side_effect=complete)
+    return llm
+
+
+class TestTreatmentPrefetch:
+    """Test cases for prefetching the protocol after a diagnosis."""
+
+    async def test_treatment_request_reuses_prefetch(self):
+        """Test that /treatment right after /analyze makes no second treatment call."""
+        llm = _llm(treatment_delay=0.05)
+        analyzer = VeterinaryAnalyzer(llm, prefetcher=TreatmentPrefetcher())
+
+        result = await analyzer.analyze_symptoms(
+            "Coceira na orelha", PET_INFO, consultation_id="c-1"
+        )
+        # The client sends the diagnosis back as validated by the API
+        diagnosis = Diagnosis(**result["diagnosis"]).dict()
+        treatment = await analyzer.get_treatment_protocol(
+            diagnosis, PET_INFO, consultation_id="c-1"
+        )
+
+        assert treatment["follow_up"] == "Retorno em 7 dias"
+        assert llm.complete.await_count == 2  # one diagnosis, one treatment
+        assert analyzer.prefetcher.stats()["served_pending"] == 1
+        await analyzer.aclose()
+
+    async def test_flow_treatment_payload_reuses_prefetch(self):
+        """Test a hit when /treatment sends only the pet fields the WhatsApp flow sends."""
+        llm = _llm()
+        analyzer = VeterinaryAnalyzer(llm, prefetcher=TreatmentPrefetcher())
+        first_round = {
+            "species": "dog",
+            "breed": "SRD",
+            "weight": 12.0,
+            "sex": "male",
+            "neutered": True,
+        }
+
+        result = await analyzer.analyze_symptoms(
+            "Coceira na orelha", first_round, consultation_id="c-1"
+        )
+        # showTreatment in consultation.flow.ts, after API validation
+        pet_info = PetInfo(species="dog", weight=12.0).dict()
+        diagnosis = Diagnosis(**result["diagnosis"]).dict()
+        await analyzer.get_treatment_protocol(diagnosis, pet_info, consultation_id="c-1")
+
+        assert llm.complete.await_count == 2
+        assert analyzer.prefetcher.stats()["misses"] == 0
+        await analyzer.aclose()
+
+    async def test_prefetch_runs_below_interactive_priority(self):
+        """Test that the speculative call queues behind live requests unless urgent."""
+        priorities = []
+
+        async def complete(prompt, prompt_prefix, **kwargs):
+            if prompt_prefix.startswith("Forneca um protocolo"):
+                priorities.append(current_priority())
+                return TREATMENT_ANSWER
+            return answer
+
+        llm = AsyncMock()
+        llm.complete = AsyncMock(side_effect=complete)
+        analyzer = VeterinaryAnalyzer(llm, prefetcher=TreatmentPrefetcher())
+
+        answer = DIAGNOSIS_ANSWER
+        await analyzer.analyze_symptoms("Coceira na orelha", PET_INFO, consultation_id="c-1")
+        answer = DIAGNOSIS_ANSWER.replace('"low"', '"emergency"')
+        await analyzer.analyze_symptoms("Coceira e sangue", PET_INFO, consultation_id="c-2")
+        await asyncio.sleep(0.01)
+
+        assert priorities == [Priority.NLP, Priority.EMERGENCY]
+        await analyzer.aclose()
+
+    async def test_other_consultation_or_diagnosis_misses(self):
+        """Test that the prefetch only serves the consultation and diagnosis it was made for."""
+        llm = _llm()
+        analyzer = VeterinaryAnalyzer(llm, prefetcher=TreatmentPrefetcher())
+
+        result = await analyzer.analyze_symptoms(
+            "Coceira na orelha", PET_INFO, consultation_id="c-1"
+        )
+        await analyzer.get_treatment_protocol(result["diagnosis"], PET_INFO, consultation_id="c-2")
+        changed = {**result["diagnosis"], "primary": "Dermatite"}
+        await analyzer.get_treatment_protocol(changed, PET_INFO, consultation_id="c-1")
+
+        assert llm.complete.await_count == 4
+        assert analyzer.prefetcher.stats()["misses"] == 2
+        await analyzer.aclose()
+
+    async def test_expired_prefetch_is_cancelled(self):
+        """Test that a prefetch still running past its TTL is cancelled and not served."""
+        prefetcher = TreatmentPrefetcher(ttl_seconds=0.01)
+        started = asyncio.Event()
+
+        async def call():
+            started.set()
+            await asyncio.sleep(10)
+            return {}
+
+        prefetcher.start("c-1:abc", call)
+        await started.wait()
+        task = next(iter(prefetcher._entries.values())).task
+        await asyncio.sleep(0.02)
+
+        assert await prefetcher.take("c-1:abc") is None
+        await asyncio.sleep(0)
+        assert task.cancelled()
+        assert prefetcher.stats()["expired"] == 1
+
+    async def test_failed_prefetch_falls_back(self):
+        """Test that a failed prefetch is dropped and the caller is told to call again."""
+        prefetcher = TreatmentPrefetcher()
+
+        async def call():
+            raise ValueError("provider down")
+
+        prefetcher.start("c-1:abc", call)
+
+        assert await prefetcher.take("c-1:abc") is None
+        assert prefetcher.stats()["failed"] == 1
+        assert prefetcher.stats()["pending"] == 0
+
+    async def test_full_registry_evicts_oldest_finished(self):
+        """Test that a full registry makes room instead of refusing new prefetches."""
+        prefetcher = TreatmentPrefetcher(max_pending=2)
+        release = asyncio.Event()
+
+        async def done():
+            return {"id": "done"}
+
+        async def running():
+            await release.wait()
+            return {"id": "running"}
+
+        prefetcher.start("c-1:a", running)
+        prefetcher.start("c-2:b", done)
+        await asyncio.sleep(0)
+
+        assert prefetcher.start("c-3:c", done)
+        assert await prefetcher.take("c-2:b") is None  # finished, so evicted first
+        assert prefetcher.start("c-4:d", done)
+        assert await prefetcher.take("c-1:a") is None  # oldest, evicted once none finished
+        assert await prefetcher.take("c-4:d") == {"id": "done"}
+        assert prefetcher.stats()["evicted"] == 2
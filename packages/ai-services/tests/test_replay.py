@@ -0,0 +1,119 @@
+"""
+Tests for recording and replaying provider calls.
+"""
+import asyncio
+import time
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.config import settings
+from src.diagnosis.schemas import ImageAnalysisResponse
+from src.llm.orchestrator import LLMOrchestrator
+from src.llm.replay import ReplayMissError, ReplayStore
+
+ANSWER = "resposta gravada"
+
+
+async def _slow_answer(*args, **kwargs):
+    await asyncio.sleep(0.05)
+    return ANSWER
+
+
+async def _stream_answer(*args, **kwargs):
+    for delta in ("resposta ", "em ", "partes"):
+        await asyncio.sleep(0.02)
+        yield delta
+
+
+async def _record(path, call) -> None:
+    """Run `call` on an orchestrator recording to `path`."""
+    orchestrator = LLMOrchestrator()
+    orchestrator.replay = ReplayStore(str(path), "record")
+    orchestrator._openai_complete = AsyncMock(side_effect=_slow_answer)
+    orchestrator._openai_stream = _stream_answer
+    orchestrator._openai_structured = AsyncMock(
+        return_value=ImageAnalysisResponse(
+            findings=["Alopecia"], concerns=[], recommendations=[], urgency_level="low"
+        )
+    )
+    await call(orchestrator)
+    await orchestrator.aclose()
+
+
+def _replayer(path, speed: float = 1.0) -> LLMOrchestrator:
+    """An orchestrator in replay mode whose providers fail if ever called."""
+    orchestrator = LLMOrchestrator()
+    orchestrator.replay = ReplayStore(str(path), "replay", speed)
+    for name in ("_openai_complete", "_anthropic_complete", "_openai_structured"):
+        setattr(orchestrator, name, AsyncMock(side_effect=AssertionError("provider called")))
+    return orchestrator
+
+
+class TestRecordReplay:
+    """Test cases for the record and replay round trip."""
+
+    async def test_completion_replays_with_recorded_timing(self, tmp_path):
+        """Test that a replayed answer matches and takes the recorded time, or less if faster."""
+        path = tmp_path / "llm.jsonl.gz"
+        await _record(path, lambda o: o.complete("Paciente: Rex", provider="openai"))
+
+        replayer, fast_replayer = _replayer(path), _replayer(path, speed=0)
+
+        start = time.perf_counter()
+        assert await replayer.complete("Paciente: Rex", provider="openai") == ANSWER
+        real_time = time.perf_counter() - start
+        start = time.perf_counter()
+        assert await fast_replayer.complete("Paciente: Rex") == ANSWER
+        no_delay = time.perf_counter() - start
+
+        assert real_time >= 0.045
+        assert no_delay < 0.03
+
+    async def test_structured_answer_and_stream(self, tmp_path):
+        """Test that structured answers come back as models and streams as the same deltas."""
+        path = tmp_path / "llm.jsonl"
+
+        async def calls(orchestrator):
+            await orchestrator.complete_structured(
+                "Imagem", ImageAnalysisResponse, provider="openai"
+            )
+            async for _ in orchestrator.stream("Paciente: Mia", provider="openai"):
+                pass
+
+        await _record(path, calls)
+        replayer = _replayer(path)
+
+        answer = await replayer.complete_structured("Imagem", ImageAnalysisResponse)
+        deltas = [d async for d in replayer.stream("Paciente: Mia")]
+
+        assert answer == ImageAnalysisResponse(
+            findings=["Alopecia"], concerns=[], recommendations=[], urgency_level="low"
+        )
+        assert deltas == ["resposta ", "em ", "partes"]
+        assert replayer.replay.stats()["replayed"] == 2
+
+    async def test_miss_fails_without_touching_circuits(self, tmp_path):
+        """Test that an unrecorded request raises at once and is not a provider failure."""
+        replayer = _replayer(tmp_path / "empty.jsonl")
+
+        with pytest.raises(ReplayMissError):
+            await replayer.complete("Nunca gravado")
+
+        assert replayer.replay.stats()["misses"] == 1
+        assert all(s["state"] == "closed" for s in replayer.router.snapshot().values())
+
+    async def test_replay_without_api_keys(self, tmp_path, monkeypatch):
+        """Test that providers in the recording are routable even without API keys."""
+        path = tmp_path / "llm.jsonl"
+        await _record(path, lambda o: o.complete("Paciente: Rex", provider="openai"))
+        monkeypatch.setattr(settings, "openai_api_key", "")
+        monkeypatch.setattr(settings, "anthropic_api_key", "")
+        monkeypatch.setattr(settings, "llm_replay_mode", "replay")
+        monkeypatch.setattr(settings, "llm_replay_path", str(path))
+        monkeypatch.setattr(settings, "llm_replay_speed", 0.0)
+
+        orchestrator = LLMOrchestrator()
+
+        assert list(orchestrator.router.providers) == ["openai"]
+        assert await orchestrator.complete("Paciente: Rex") == ANSWER
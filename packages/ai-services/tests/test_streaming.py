@@ -0,0 +1,152 @@
+"""
+Tests for streamed (SSE) diagnosis responses.
+"""
+import json
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.diagnosis.analyzer import VeterinaryAnalyzer
+from src.diagnosis.schemas import TreatmentResponse
+from src.llm.streaming import IncrementalJSONParser, match_path
+
+STREAMED_ANALYSIS = """Aqui esta a analise:
+```json
+{
+    "needs_clarification": false,
+    "diagnosis": {
+        "primary": "Obstrucao uretral",
+        "differentials": [{"condition": "Cistite", "probability": 25}],
+        "urgency_level": "emergency"
+    },
+    "confidence": 0.9
+}
+```"""
+
+# Cut off before monitoring and follow_up
+TRUNCATED_TREATMENT = (
+    '{"medications": [{"name": "Meloxicam", "dosage": "0,1 mg/kg", "frequency": "24/24h",'
+    ' "duration": "3 dias"}], "supportive_care": ["Repouso"], "monit'
+)
+
+
+def _chunks(text, size=5):
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+def _parse_sse(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+class TestIncrementalJSONParser:
+    """Test cases for the streaming JSON parser."""
+
+    def test_emits_fields_before_document_completes(self):
+        """Test that a field is reported as soon as its value closes."""
+        parser = IncrementalJSONParser()
+        text = STREAMED_ANALYSIS
+        cut = text.index('"differentials"')
+
+        events = parser.feed(text[:cut])
+
+        assert (("diagnosis", "primary"), "Obstrucao uretral") in events
+        assert not parser.done
+
+    def test_chunked_parse_matches_json_loads(self):
+        """Test that arbitrary chunking yields the complete document."""
+        parser = IncrementalJSONParser()
+        for chunk in _chunks(STREAMED_ANALYSIS, 3):
+            parser.feed(chunk)
+
+        body = STREAMED_ANALYSIS.split("```json")[1].split("```")[0]
+        assert parser.done
+        assert parser.root == json.loads(body)
+
+    def test_skips_comments_and_template_barewords(self):
+        """Test tolerance of echoed prompt templates."""
+        parser = IncrementalJSONParser()
+        parser.feed('{"needs_clarification": true/false, // comentario\n "confidence": 0.5}')
+
+        assert parser.root == {"needs_clarification": True, "confidence": 0.5}
+
+    def test_string_escapes(self):
+        """Test that escaped quotes and unicode are decoded."""
+        parser = IncrementalJSONParser()
+        parser.feed(r'{"primary": "Otite \"externa\" é"}')
+
+        assert parser.root == {"primary": 'Otite "externa" é'}
+
+    def test_match_path_wildcard(self):
+        """Test that '*' matches array indices."""
+        assert match_path(("medications", 2), [("medications", "*")])
+        assert not match_path(("medications", 2, "name"), [("medications", "*")])
+
+
+class TestStreamingEndpoints:
+    """Test cases for the SSE diagnosis endpoints."""
+
+    @pytest.fixture
+    def streaming_llm(self, test_client):
+        """Patch the app's orchestrator to stream a canned completion."""
+        state = test_client.app.state
+
+        async def fake_stream(**kwargs):
+            for chunk in _chunks(STREAMED_ANALYSIS):
+                yield chunk
+
+        state.llm.stream = fake_stream
+        state.analyzer.semantic_cache = None
+        yield
+
+    def test_analyze_stream_sends_urgency_before_final(self, test_client, streaming_llm):
+        """Test that urgency is streamed ahead of the validated result."""
+        response = test_client.post(
+            "/api/v1/diagnosis/analyze/stream",
+            json={
+                "symptoms": "gato nao urina ha um dia",
+                "pet_id": "p1",
+                "consultation_id": "c-stream-1",
+                "pet_info": {"species": "cat", "age": 4},
+            },
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+
+        events = _parse_sse(response.text)
+        fields = [data["field"] for name, data in events if name == "partial"]
+        assert fields.index("diagnosis.urgency_level") < len(events) - 1
+        assert events[-1][0] == "final"
+        assert events[-1][1]["diagnosis"]["urgency_level"] == "emergency"
+
+
+class TestStreamingParity:
+    """Test cases for streamed and unary answers going through the same parsing."""
+
+    async def test_stream_final_matches_unary_repair(self):
+        """Test that a truncated answer is repaired and filled the same way on both paths."""
+        llm = AsyncMock()
+        llm.complete = AsyncMock(return_value=TRUNCATED_TREATMENT)
+
+        async def stream(**kwargs):
+            for chunk in _chunks(TRUNCATED_TREATMENT):
+                yield chunk
+
+        llm.stream = stream
+        analyzer = VeterinaryAnalyzer(llm, structured_output=False)
+        diagnosis = {"primary": "Otite", "differentials": [], "urgency_level": "low"}
+
+        unary = await analyzer.get_treatment_protocol(diagnosis, {"species": "dog"})
+        events = [
+            e async for e in analyzer.stream_treatment_protocol(diagnosis, {"species": "dog"})
+        ]
+
+        final = events[-1]["data"]
+        assert events[-1]["event"] == "final"
+        assert final == unary
+        assert final["monitoring"] == [] and final["follow_up"]
+        TreatmentResponse(**final)
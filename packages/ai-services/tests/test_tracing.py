@@ -0,0 +1,136 @@
+"""
+Tests for request tracing.
+"""
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.diagnosis.analyzer import VeterinaryAnalyzer
+from src.llm.orchestrator import LLMOrchestrator
+from src.telemetry.tracing import (
+    InMemorySpanExporter,
+    OTLPHttpExporter,
+    parse_traceparent,
+    set_attributes,
+    tracer,
+)
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+@pytest.fixture
+def exporter():
+    """Record spans in memory for the duration of a test."""
+    exporter = InMemorySpanExporter()
+    tracer.configure(exporter)
+    yield exporter
+    tracer.configure(None)
+    tracer._queue.clear()
+
+
+class TestTraceContext:
+    """Test cases for trace context parsing and span nesting."""
+
+    def test_parse_traceparent(self):
+        """Test that valid headers parse and malformed ones are ignored."""
+        assert parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-01") == (TRACE_ID, PARENT_ID, True)
+        assert parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-00")[2] is False
+        assert parse_traceparent(f"00-{'0' * 32}-{PARENT_ID}-01") is None
+        assert parse_traceparent("00-abc-def-01") is None
+        assert parse_traceparent(None) is None
+
+    async def test_spans_nest_under_remote_parent(self, exporter):
+        """Test that child spans share the remote trace and link to their parent."""
+        with tracer.span("request", parent=(TRACE_ID, PARENT_ID, True), kind="server"):
+            with tracer.span("child"):
+                set_attributes(**{"cache.hit": True})
+        await tracer.flush()
+
+        child, root = exporter.spans
+        assert root.trace_id == child.trace_id == TRACE_ID
+        assert root.parent_id == PARENT_ID
+        assert child.parent_id == root.span_id
+        assert child.attributes == {"cache.hit": True}
+
+    async def test_no_spans_without_exporter(self):
+        """Test that spans are not recorded while tracing is off."""
+        with tracer.span("ignored") as span:
+            set_attributes(ignored=True)
+
+        assert span is None
+        assert not tracer._queue
+
+    def test_otlp_encoding(self):
+        """Test the OTLP/HTTP JSON shape of an exported span."""
+        exporter = OTLPHttpExporter("http://collector:4318/", "petvet", client=AsyncMock())
+        tracer.configure(exporter)
+        try:
+            with pytest.raises(RuntimeError):
+                with tracer.span("llm.provider_call", **{"llm.attempt": 2}):
+                    raise RuntimeError("503")
+            span = tracer._queue.pop()
+        finally:
+            tracer.configure(None)
+
+        encoded = exporter.encode([span])["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+        assert exporter.url == "http://collector:4318/v1/traces"
+        assert encoded["name"] == "llm.provider_call"
+        assert encoded["attributes"] == [{"key": "llm.attempt", "value": {"intValue": "2"}}]
+        assert encoded["status"] == {"code": 2, "message": "RuntimeError: 503"}
+
+
+class TestInstrumentation:
+    """Test cases for spans recorded by the analyzer and orchestrator."""
+
+    async def test_provider_fallback_spans(self, exporter):
+        """Test that each provider call is a child span of the completion attempt."""
+        orchestrator = LLMOrchestrator()
+        orchestrator._openai_complete = AsyncMock(side_effect=RuntimeError("503"))
+        orchestrator._anthropic_complete = AsyncMock(return_value="ok")
+
+        await orchestrator.complete("Paciente: Rex", provider="openai")
+        await tracer.flush()
+
+        (attempt,) = exporter.named("llm.attempt")
+        failed, succeeded = exporter.named("llm.provider_call")
+        assert attempt.attributes["llm.attempt"] == 1
+        assert failed.parent_id == succeeded.parent_id == attempt.span_id
+        assert failed.attributes["llm.provider"] == "openai"
+        assert failed.error == "RuntimeError: 503"
+        assert succeeded.attributes["llm.provider"] == "anthropic"
+        assert succeeded.error is None
+
+    async def test_analyzer_span_records_cache_and_parse(self, exporter):
+        """Test the analyzer span attributes and its parse child span."""
+        llm = AsyncMock()
+        llm.complete = AsyncMock(return_value='{"needs_clarification": true}')
+        analyzer = VeterinaryAnalyzer(llm)
+
+        await analyzer.analyze_symptoms("Tosse", {"species": "dog"}, consultation_id="c-1")
+        await tracer.flush()
+
+        (analysis,) = exporter.named("analyzer.analyze_symptoms")
+        (parse,) = exporter.named("llm.parse")
+        assert analysis.attributes["cache.hit"] is False
+        assert analysis.attributes["consultation.id"] == "c-1"
+        assert parse.parent_id == analysis.span_id
+        assert parse.attributes["llm.schema"] == "SymptomAnalysisResponse"
+
+
+class TestTraceEndpoint:
+    """Test cases for trace propagation through the API."""
+
+    def test_request_joins_caller_trace(self, test_client, exporter):
+        """Test that the server span continues the trace sent in traceparent."""
+        response = test_client.get(
+            "/health", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"}
+        )
+        asyncio.run(tracer.flush())
+
+        assert parse_traceparent(response.headers["traceparent"])[0] == TRACE_ID
+        (server,) = exporter.named("GET /health")
+        assert server.kind == "server"
+        assert server.parent_id == PARENT_ID
+        assert server.attributes["http.status_code"] == 200
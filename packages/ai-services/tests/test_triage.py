@@ -0,0 +1,121 @@
+"""
+Tests for the local emergency triage.
+"""
+import time
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.diagnosis.analyzer import VeterinaryAnalyzer
+from src.diagnosis.triage import TriageEngine
+from src.llm.ratelimit import Priority, current_priority
+from src.llm.router import ProviderRouter
+
+ANSWER = (
+    '{"needs_clarification": false, "diagnosis": {"primary": "Epilepsia",'
+    ' "differentials": [], "urgency_level": "emergency"}, "confidence": 0.8}'
+)
+
+
+@pytest.fixture(scope="module")
+def engine():
+    """Compiled triage engine."""
+    return TriageEngine()
+
+
+class TestTriageEngine:
+    """Test cases for red-flag matching."""
+
+    @pytest.mark.parametrize(
+        "text, flag",
+        [
+            ("Meu cachorro está CONVULSIONANDO e babando", "convulsao"),
+            ("Ela está com dificuldade pra respirar e a língua roxa", "dificuldade_respiratoria"),
+            ("Acho que comeu chumbinho no quintal", "intoxicacao"),
+            ("Foi atropelado agora há pouco", "trauma"),
+            ("As gengivas estão pálidas", "mucosas_alteradas"),
+        ],
+    )
+    def test_red_flags_are_emergencies(self, engine, text, flag):
+        """Test accent- and case-insensitive matching of emergency signs."""
+        result = engine.assess(text, "dog")
+
+        assert flag in result.red_flags
+        assert result.is_emergency
+
+    def test_negated_signs_are_ignored(self, engine):
+        """Test that "nao teve convulsao" is not a red flag."""
+        result = engine.assess("Não teve convulsão, só coceira na orelha", "dog")
+
+        assert result.red_flags == []
+        assert result.urgency_level is None
+
+    def test_urinary_obstruction_depends_on_species(self, engine):
+        """Test that "nao urina" is an emergency for cats and high for dogs."""
+        assert engine.assess("Não urina desde ontem", "Gato").urgency_level == "emergency"
+        assert engine.assess("Não urina desde ontem", "cachorro").urgency_level == "high"
+        # Unknown species: assume the most severe case
+        assert engine.assess("Não urina desde ontem").urgency_level == "emergency"
+
+    def test_routine_description_is_fast_and_clean(self, engine):
+        """Test that a typical description is checked in well under a millisecond."""
+        text = (
+            "Meu cachorro de 8 anos esta com coceira forte na orelha ha uma semana, "
+            "balanca a cabeca e tem secrecao escura. Esta comendo e brincando normalmente."
+        )
+        start = time.perf_counter()
+        for _ in range(1000):
+            result = engine.assess(text, "dog")
+        per_call = (time.perf_counter() - start) / 1000
+
+        assert result.red_flags == []
+        assert per_call < 0.001
+
+
+class TestAnalyzerTriage:
+    """Test cases for the triage fast path in the analyzer."""
+
+    async def test_signal_attached_and_llm_call_prioritized(self, engine):
+        """Test that an emergency is attached to the result and sent at top priority."""
+        seen = []
+
+        async def complete(**kwargs):
+            seen.append(current_priority())
+            return ANSWER
+
+        llm = AsyncMock()
+        llm.complete = AsyncMock(side_effect=complete)
+        analyzer = VeterinaryAnalyzer(llm, triage=engine)
+
+        result = await analyzer.analyze_symptoms("Está convulsionando", {"species": "dog"})
+
+        assert result["triage"] == {"urgency_level": "emergency", "red_flags": ["convulsao"]}
+        assert seen == [Priority.EMERGENCY]
+
+    async def test_triage_event_streams_before_llm_output(self, engine):
+        """Test that the stream opens with the triage event."""
+
+        async def stream(**kwargs):
+            yield ANSWER
+
+        llm = AsyncMock()
+        llm.stream = stream
+        analyzer = VeterinaryAnalyzer(llm, triage=engine)
+
+        events = [e async for e in analyzer.stream_symptoms("Gato não urina", {"species": "gato"})]
+
+        assert events[0] == {
+            "event": "triage",
+            "data": {"urgency_level": "emergency", "red_flags": ["obstrucao_urinaria"]},
+        }
+        assert events[-1]["data"]["triage"]["urgency_level"] == "emergency"
+
+    def test_emergencies_route_by_latency_alone(self):
+        """Test that a fast but error-prone provider is preferred for emergencies."""
+        router = ProviderRouter(["openai", "anthropic"])
+        router.record_success("openai", 1.5)
+        router.record_success("anthropic", 1.0)
+        router.record_failure("anthropic")
+
+        assert router.order() == ["openai", "anthropic"]
+        assert router.order(fastest=True) == ["anthropic", "openai"]
@@ -1,10 +1,12 @@
 import axios, { AxiosInstance } from 'axios';
+import { randomBytes } from 'crypto';
 import { config } from '../config';
 import { logger } from '../utils/logger';
 import { Diagnosis, Treatment } from './api.client';
 
 export interface SymptomAnalysisRequest {
-  symptoms: string;
+  // May be omitted in follow-ups when the service holds the consultation state
+  symptoms?: string;
   petId: string;
   consultationId: string;
   petInfo?: {
@@ -23,6 +25,11 @@ export interface SymptomAnalysisResponse {
   clarifyingQuestions?: string[];
   diagnosis?: Diagnosis;
   confidence?: number;
+  // Local red-flag check, present when suspected emergency signs were found
+  triage?: {
+    urgencyLevel: 'high' | 'emergency' | null;
+    redFlags: string[];
+  };
 }
 
 export interface TreatmentRequest {
@@ -77,12 +84,23 @@ class AIClient {
       timeout: 60000, // AI can take longer
     });
 
+    // Start a W3C trace per call so AI Services spans can be found by trace id
+    this.client.interceptors.request.use((request) => {
+      if (!request.headers.traceparent) {
+        const traceId = randomBytes(16).toString('hex');
+        const spanId = randomBytes(8).toString('hex');
+        request.headers.traceparent = `00-${traceId}-${spanId}-01`;
+      }
+      return request;
+    });
+
     this.client.interceptors.response.use(
       (response) => response,
       (error) => {
         logger.error('AI Services error', {
           status: error.response?.status,
           url: error.config?.url,
+          traceId: String(error.config?.headers?.traceparent ?? '').split('-')[1],
           message: error.message,
         });
         throw error;
@@ -203,6 +221,29 @@ class AIClient {
     return response.data;
   }
 
+  /**
+   * Classify many texts in one request (e.g. when replaying a backlog).
+   * Results are returned in input order.
+   */
+  async classifyIntents(
+    items: Array<{
+      text: string;
+      context?: { currentFlow?: string; previousIntents?: string[] };
+    }>
+  ): Promise<
+    Array<{
+      intent: string;
+      confidence: number;
+      entities?: Record<string, string>;
+    }>
+  > {
+    const response = await this.client.post('/api/v1/nlp/intent/batch', {
+      items,
+    });
+
+    return response.data.results;
+  }
+
   /**
    * Health check
    */
@@ -335,7 +335,9 @@ export const consultationFlow: ConsultationFlow = {
       };
     }
 
-    // All questions answered, get final diagnosis
+    // All questions answered, get final diagnosis. The symptoms and pet info
+    // are resent so the AI service can rebuild the consultation if its stored
+    // state expired or was lost; when the state is there, it is reused.
     const pet = await apiClient.getPet(state.selectedPetId!);
     const analysis = await aiClient.analyzeSymptoms({
       symptoms: state.symptoms!,